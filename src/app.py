@@ -1,4 +1,6 @@
 import sys
+import uuid
+from contextlib import nullcontext
 from pathlib import Path
 
 # Add project root to PYTHONPATH for Streamlit
@@ -7,8 +9,11 @@ sys.path.append(str(PROJECT_ROOT))
 
 import streamlit as st
 from src.chat.memory import ChatMemory
-from src.chat.router import answer_question
+from src.chat.router import TurnDigest, answer_question_stream
+from src.chat.sql_runner import cancel_session_queries
+from src.chat import profiling, telemetry
 from src.chat.exporter import export_txt, export_pdf
+from src.llm.falcon_chat import model_status, start_warmup
 
 st.set_page_config(page_title="HR Analytics Chatbot", page_icon="💬", layout="centered")
 st.markdown(
@@ -171,6 +176,11 @@ st.caption("Ask questions about the IBM HR Analytics dataset")
 
 if "memory" not in st.session_state:
     st.session_state.memory = ChatMemory(max_turns=10)
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Start loading the local GGUF in the background (once per process)
+start_warmup()
 
 
 with st.sidebar:
@@ -182,6 +192,43 @@ with st.sidebar:
         help="Local Falcon runs on CPU. Groq uses a cloud API (faster)."
     )
 
+    if provider == "local":
+        status = model_status()
+        if status["state"] == "ready":
+            st.caption(f"Local model ready ({status['settings']['n_threads']} threads, n_batch {status['settings']['n_batch']})")
+            if status.get("backend") == "server":
+                st.caption(f"Served by falcon_server ({status['queued']} queued, {status['served']} served)")
+        elif status["state"] in ("loading", "calibrating"):
+            st.caption(f"Local model {status['state']}... first answer will wait for it")
+        elif status["state"] == "missing":
+            st.caption("Local model not found in models/ - use Groq or download the GGUF")
+        elif status["state"] == "error":
+            st.caption(f"Local model failed to load: {status['error']}")
+
+    # Per session: tracing is switched on around this session's turns only
+    debug = st.toggle(
+        "Debug panel",
+        value=telemetry.enabled(),
+        key="debug_panel",
+        help="Trace this session's turns: stage timings, LLM/SQL calls, cache hits (see src/chat/telemetry.py)",
+    )
+
+    with st.expander("Profiling"):
+        profile_turns = st.number_input("Turns to profile", min_value=1, max_value=20, value=1)
+        if st.button("Profile next turns"):
+            profiling.arm(profile_turns)
+        if profiling.remaining():
+            st.caption(f"Profiling the next {profiling.remaining()} turn(s)")
+        last = profiling.last_profile()
+        if last:
+            st.caption(f"Last profile: {last['wall_ms']:.0f} ms, {last['samples']} samples")
+            st.download_button(
+                label="Download flame graph input (collapsed)",
+                data=Path(last["collapsed"]).read_text(encoding="utf-8"),
+                file_name=Path(last["collapsed"]).name,
+                mime="text/plain",
+            )
+
     transcript = st.session_state.memory.as_text()
 
     st.download_button(
@@ -199,6 +246,15 @@ with st.sidebar:
     )
 
 
+def stream_text(stream, turn: dict):
+    """Text chunks for st.write_stream; the trailing TurnDigest goes to turn["digest"]."""
+    for item in stream:
+        if isinstance(item, TurnDigest):
+            turn["digest"] = item.text
+        else:
+            yield item
+
+
 # Render chat history
 for msg in st.session_state.memory.messages:
     with st.chat_message(msg.role):
@@ -207,12 +263,76 @@ for msg in st.session_state.memory.messages:
 user_text = st.chat_input("Ask a question (e.g., attrition rate for overtime employees)...")
 
 if user_text:
+    # A new message supersedes whatever query the previous one still runs
+    cancel_session_queries(st.session_state.session_id)
     st.session_state.memory.add("user", user_text)
     with st.chat_message("user"):
         st.markdown(user_text)
 
-    answer = answer_question(user_text, provider=provider, conversation_history=st.session_state.memory.messages)
+    # Stream: the SQL result shows first, then the insight/advice tokens
+    tracing = telemetry.session_tracing(st.session_state.session_id) if debug else nullcontext()
+    turn = {}
+    with st.chat_message("assistant"), tracing:
+        answer = st.write_stream(stream_text(
+            answer_question_stream(
+                user_text,
+                provider=provider,
+                conversation_history=st.session_state.memory.messages,
+                session_id=st.session_state.session_id,
+            ),
+            turn,
+        ))
+
+    st.session_state.memory.add("assistant", answer, digest=turn.get("digest", ""))
+
+
+def render_debug_panel():
+    """Span breakdown and counters of this session's last traced turn."""
+    trace = telemetry.last_trace(st.session_state.session_id)
+    st.subheader("Last turn")
+    if trace is None:
+        st.caption("No traced turn yet - ask a question.")
+        return
+    st.caption(f"{trace['attrs'].get('question', '')} - {trace['duration_ms']:.0f} ms")
+    st.dataframe(
+        [
+            {
+                "span": "  " * depth + s["name"],
+                "start ms": s["start_ms"],
+                "ms": s["duration_ms"],
+                "details": ", ".join(f"{k}={v}" for k, v in s["attrs"].items() if k != "question"),
+            }
+            for depth, s in _span_tree(trace["spans"])
+        ],
+        hide_index=True,
+    )
+    if trace["counts"]:
+        st.json(trace["counts"])
+    with st.expander("Events"):
+        for s in trace["spans"]:
+            for e in s["events"]:
+                st.text(f"{s['start_ms'] + e['t_ms']:8.1f} ms  {e['message']}")
+    st.download_button(
+        label="Download metrics (Prometheus)",
+        data=telemetry.prometheus_text(),
+        file_name="metrics.txt",
+        mime="text/plain",
+    )
+
+
+def _span_tree(spans: list) -> list:
+    """[(depth, span)] in start order, children under their parent."""
+    children = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+    out, stack = [], [(0, s) for s in reversed(children.get(None, []))]
+    while stack:
+        depth, s = stack.pop()
+        out.append((depth, s))
+        stack.extend((depth + 1, c) for c in reversed(children.get(s["span_id"], [])))
+    return out
+
 
-    st.session_state.memory.add("assistant", answer)
-    with st.chat_message("assistant"):
-        st.markdown(answer)
+if debug:
+    with st.sidebar:
+        render_debug_panel()
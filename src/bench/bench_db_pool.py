@@ -0,0 +1,73 @@
+"""
+Benchmark: connection-per-query (the old sql_runner) vs the pooled,
+read-only, tuned connections from src/chat/db_pool.py.
+
+Run from the project root:
+    python -m src.bench.bench_db_pool [iterations]
+
+The result cache is bypassed so every call reaches SQLite.
+"""
+
+import sqlite3
+import statistics
+import sys
+import time
+
+from src.chat.db_pool import DB_PATH, read_connection
+from src.chat.sql_runner import run_sql
+
+QUERIES = {
+    "point count": "SELECT COUNT(*) FROM employees WHERE Department = 'Sales';",
+    "rate by group": (
+        "SELECT Department, ROUND(100.0 * SUM(CASE WHEN Attrition = 'Yes' THEN 1 ELSE 0 END) / COUNT(*), 2) "
+        "FROM employees GROUP BY Department;"
+    ),
+    "top 10 rows": "SELECT EmployeeNumber, JobRole, MonthlyIncome FROM employees ORDER BY MonthlyIncome DESC LIMIT 10;",
+}
+
+
+def run_sql_per_connection(query: str):
+    """What run_sql did before the pool: open, query, close."""
+    with sqlite3.connect(DB_PATH) as conn:
+        cur = conn.cursor()
+        cur.execute(query)
+        rows = cur.fetchall()
+        cols = [desc[0] for desc in cur.description]
+    return cols, rows
+
+
+def _time(fn, query: str, iterations: int) -> list:
+    fn(query)  # warm the OS page cache / pool
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def _fmt(samples: list) -> str:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50 {p50:8.1f} us   p99 {p99:8.1f} us"
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"Database: {DB_PATH}")
+    with read_connection() as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM employees;").fetchone()[0]
+    print(f"Rows: {rows}   iterations per query: {iterations}\n")
+
+    pooled = lambda q: run_sql(q, use_cache=False)  # noqa: E731
+    for name, query in QUERIES.items():
+        old = _time(run_sql_per_connection, query, iterations)
+        new = _time(pooled, query, iterations)
+        speedup = statistics.median(old) / statistics.median(new)
+        print(f"{name:14s} connect-per-query: {_fmt(old)}")
+        print(f"{'':14s} pooled read-only:  {_fmt(new)}   ({speedup:.1f}x)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Benchmark: per-stage latency of the answer pipeline.
+
+Replays a corpus of HR conversations (src/bench/router_corpus.json) through
+router.answer_question with every Groq / Falcon call replaced by a
+deterministic local stub that sleeps a configurable latency. Each router
+stage is timed by wrapping the router-level function that implements it:
+
+    follow-up, template, schema, classification, sql cache, schema pruning,
+    sql generation, repair, validation, execution, formatting, insight,
+    explanation, plus one "llm: <purpose>" stage per stubbed model call
+
+Stage times are exclusive (time in nested stages is not counted twice), so
+"sql generation" is router overhead and "llm: sql" is the stub wait.
+Stages that overlap (speculative SQL runs next to classification) can add
+up to more than the end-to-end time. Results go to JSON; --compare prints
+the p50 change against an earlier run.
+
+Run from the project root:
+    python -m src.bench.bench_router [--iterations 5] [--llm-latency-ms 50] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+CORPUS_PATH = Path(__file__).with_name("router_corpus.json")
+RESULTS_DIR = PROJECT_ROOT / "db" / "bench"
+
+# Router-level functions -> stage they implement
+STAGES = {
+    "follow-up": ["is_followup_question", "rewrite_followup_to_full_question"],
+    "template": ["match_template"],
+    "schema": ["get_schema_text"],
+    "classification": ["classify_question_type"],
+    "sql cache": ["lookup_sql", "store_sql"],
+    "schema pruning": ["pruned_schema"],
+    "sql generation": ["generate_validated_sql"],
+    "repair": ["repair_sql"],
+    "validation": ["validate_sql"],
+    "execution": ["execute_with_fallback"],
+    "formatting": ["format_results"],
+    "insight": ["_provider_chat"],
+    "explanation": ["_explain_and_cache"],
+}
+FALLBACK_SQL = "SELECT COUNT(*) AS EmployeeCount FROM employees;"
+STUB_INSIGHT = (
+    "Attrition is concentrated where overtime is common; review workload and "
+    "recognition in those groups first, then track the rate monthly."
+)
+
+
+class StageTimer:
+    """Exclusive wall time per stage for the current turn (thread-safe)."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages = defaultdict(float)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)  # time spent in nested stages
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self.stages[name] += (elapsed - nested) * 1000
+
+    def wrap(self, name: str, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class StubLLM:
+    """Deterministic stand-in for Groq and Falcon with a fixed (optionally jittered) latency."""
+
+    def __init__(self, timer: StageTimer, latency_ms: float, jitter_ms: float = 0.0, seed: int = 7):
+        self.timer = timer
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.expected_sql = None  # scripted answer for the current turn
+        self.calls = 0
+
+    def _wait(self, purpose: str, text: str) -> str:
+        with self.timer.stage(f"llm: {purpose}"):
+            self.calls += 1
+            delay = self.latency_ms + (self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+            time.sleep(max(0.0, delay) / 1000)
+        return text
+
+    def chat_completion(self, model: str = "", messages: list = None, **kwargs):
+        prompt = (messages or [{}])[-1].get("content", "")
+        if prompt.startswith("Classify this question"):
+            from src.chat.router import _classify_by_keywords
+            question = prompt.split('Question: "', 1)[-1].split('"', 1)[0]
+            text = self._wait("classify", _classify_by_keywords(question))
+        elif prompt.startswith("Explain this SQL"):
+            text = self._wait("explain", "It summarizes the requested HR metric from the employees table.")
+        else:
+            text = self._wait("sql", self.expected_sql or FALLBACK_SQL)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+    def local_sql(self, question: str, schema: str, notes: str = "") -> str:
+        return self._wait("sql", self.expected_sql or FALLBACK_SQL)
+
+    def chat(self, prompt: str, system_prompt: str = None, **kwargs) -> str:
+        return self._wait("insight", STUB_INSIGHT)
+
+    def chat_stream(self, prompt: str, system_prompt: str = None, **kwargs):
+        yield self._wait("insight", STUB_INSIGHT)
+
+
+def install(timer: StageTimer, stub: StubLLM, sql_provider: str):
+    """Patch the router: stubbed model calls, timed stages. Returns the router module."""
+    from src.chat import router
+
+    router.chat_completion = stub.chat_completion
+    router.groq_chat = router.falcon_chat = stub.chat
+    router.groq_chat_stream = router.falcon_chat_stream = stub.chat_stream
+    router.generate_local_sql = stub.local_sql
+    router.local_sql_available = lambda: True
+    router.SQL_PROVIDER = sql_provider
+    for stage, names in STAGES.items():
+        for name in names:
+            setattr(router, name, timer.wrap(stage, getattr(router, name)))
+    return router
+
+
+def _percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+def replay(corpus: list, iterations: int, provider: str, timer: StageTimer, stub: StubLLM,
+           warm: bool = False, verbose: bool = False) -> tuple[list, dict]:
+    """Run the corpus `iterations` times; returns (per-turn records, stage -> samples)."""
+    from src.chat.memory import Message
+    from src.chat.router import answer_with_digest
+    from src.chat.sql_cache import clear_cache
+    from src.chat.sql_runner import result_cache
+
+    turns, stage_samples = [], defaultdict(list)
+    for iteration in range(iterations):
+        if not warm:
+            clear_cache()
+            result_cache.clear()
+        for conversation in corpus:
+            history = []
+            for turn in conversation["turns"]:
+                stub.expected_sql = turn.get("sql")
+                timer.reset()
+                sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+                start = time.perf_counter()
+                with sink:
+                    answer, digest = answer_with_digest(turn["question"], provider, history, session_id="bench")
+                total_ms = (time.perf_counter() - start) * 1000
+
+                stages = dict(timer.stages)
+                for name, ms in stages.items():
+                    stage_samples[name].append(ms)
+                turns.append({
+                    "iteration": iteration,
+                    "conversation": conversation.get("name", ""),
+                    "question": turn["question"],
+                    "total_ms": round(total_ms, 3),
+                    "stages_ms": {k: round(v, 3) for k, v in sorted(stages.items())},
+                })
+                history += [Message("user", turn["question"]), Message("assistant", answer, digest)]
+    return turns, stage_samples
+
+
+def summarize(turns: list, stage_samples: dict) -> dict:
+    total = sum(t["total_ms"] for t in turns)
+    stages = {
+        name: {**_percentiles(samples), "turns": len(samples), "share": round(sum(samples) / total, 4)}
+        for name, samples in sorted(stage_samples.items(), key=lambda kv: -sum(kv[1]))
+    }
+    by_question = defaultdict(list)
+    for t in turns:
+        by_question[t["question"]].append(t["total_ms"])
+    return {
+        "end_to_end": _percentiles([t["total_ms"] for t in turns]),
+        "stages": stages,
+        "questions": {q: _percentiles(samples) for q, samples in by_question.items()},
+    }
+
+
+def print_report(summary: dict, previous: dict = None) -> None:
+    prev_stages = (previous or {}).get("summary", {}).get("stages", {})
+
+    def delta(name, p50):
+        before = prev_stages.get(name, {}).get("p50_ms")
+        return f"   {p50 - before:+9.2f} ms" if before is not None else ""
+
+    e2e = summary["end_to_end"]
+    print(f"\nEnd to end: p50 {e2e['p50_ms']:.2f} ms   p99 {e2e['p99_ms']:.2f} ms")
+    print(f"\n{'stage':<22} {'p50 ms':>10} {'p99 ms':>10} {'share':>7} {'turns':>6}" + ("   Δ p50" if previous else ""))
+    for name, s in summary["stages"].items():
+        print(f"{name:<22} {s['p50_ms']:>10.2f} {s['p99_ms']:>10.2f} {s['share']:>7.1%} {s['turns']:>6}"
+              + delta(name, s["p50_ms"]))
+    print("\nSlowest questions (p50):")
+    ranked = sorted(summary["questions"].items(), key=lambda kv: -kv[1]["p50_ms"])
+    for question, s in ranked[:5]:
+        print(f"  {s['p50_ms']:9.2f} ms  {question}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage router latency with a stubbed LLM")
+    parser.add_argument("--corpus", default=str(CORPUS_PATH))
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="stub latency per model call")
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0, help="uniform +/- jitter (seeded)")
+    parser.add_argument("--provider", default="groq", choices=["groq", "local"], help="answer provider")
+    parser.add_argument("--sql-provider", default="groq", choices=["groq", "local"])
+    parser.add_argument("--warm", action="store_true", help="keep SQL/result caches between iterations")
+    parser.add_argument("--out", help="JSON output (default: db/bench/router-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier JSON result to diff against")
+    parser.add_argument("--verbose", action="store_true", help="show router logs")
+    args = parser.parse_args()
+
+    # Isolated SQL cache; the stub never uses the key but the router checks for one
+    os.environ["HR_SQL_CACHE_PATH"] = str(Path(tempfile.mkdtemp(prefix="hr-bench-")) / "query_cache.sqlite")
+    os.environ.setdefault("GROQ_API_KEY", "bench-stub")
+
+    timer = StageTimer()
+    stub = StubLLM(timer, args.llm_latency_ms, args.llm_jitter_ms)
+    install(timer, stub, args.sql_provider)
+
+    corpus = json.loads(Path(args.corpus).read_text(encoding="utf-8"))
+    n_turns = sum(len(c["turns"]) for c in corpus)
+    print(f"Replaying {n_turns} turns x {args.iterations} iterations "
+          f"(stub latency {args.llm_latency_ms:g} ms, {'warm' if args.warm else 'cold'} caches)")
+    turns, stage_samples = replay(corpus, args.iterations, args.provider, timer, stub, args.warm, args.verbose)
+    summary = summarize(turns, stage_samples)
+
+    previous = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_report(summary, previous)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"router-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "verbose")},
+        "llm_calls": stub.calls,
+        "summary": summary,
+        "turns": turns,
+    }, indent=2), encoding="utf-8")
+    print(f"\nSaved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Benchmark: the SQLite layer at enterprise scale.
+
+For each scale a synthetic employees database is generated once
+(src/bench/synth_workforce.py, cached under db/bench/) and a fresh worker
+process - HR_DB_PATH pointed at it - times a fixed set of HR KPI queries
+through the real path: sql_runner.run_query (pool, governor; result cache
+bypassed), router.format_results and router.get_sample_data. Per scale it
+records p50/p99 per query, the cold schema-catalog build and the worker's
+peak RSS, and writes everything to a JSON file so runs can be compared.
+
+Run from the project root:
+    python -m src.bench.bench_scale [--scales 10k,1m,10m] [--iterations 20] [--out results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from src.bench.synth_workforce import BENCH_DIR, generate_database, parse_scale, scale_label
+
+DEFAULT_SCALES = "10k,1m"  # 10m takes a few minutes to generate
+QUERY_TIMEOUT = 120.0  # seconds; large scans must not trip the interactive 5s governor
+
+RATE = "ROUND(SUM(CASE WHEN Attrition = 'Yes' THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2)"
+QUERIES = {
+    "headcount": ("SELECT COUNT(*) AS EmployeeCount FROM employees;", ()),
+    "attrition rate": (f"SELECT {RATE} AS AttritionRate FROM employees;", ()),
+    "rate by department": (
+        f"SELECT Department, COUNT(*) AS EmployeeCount, {RATE} AS AttritionRate "
+        "FROM employees GROUP BY Department ORDER BY AttritionRate DESC;", ()),
+    "rate by role | overtime": (
+        f"SELECT JobRole, {RATE} AS AttritionRate FROM employees WHERE OverTime = ? "
+        "GROUP BY JobRole ORDER BY AttritionRate DESC;", ("Yes",)),
+    "avg income by level": (
+        "SELECT JobLevel, ROUND(AVG(MonthlyIncome), 2) AS AvgMonthlyIncome FROM employees GROUP BY JobLevel;", ()),
+    "filtered avg (indexed)": (
+        "SELECT ROUND(AVG(MonthlyIncome), 2) FROM employees WHERE Department = ? AND Gender = ?;",
+        ("Sales", "Female")),
+    "range filter count": ("SELECT COUNT(*) FROM employees WHERE MonthlyIncome > ? AND Age < ?;", (15000, 30)),
+    "top 10 earners": (
+        "SELECT EmployeeNumber, JobRole, MonthlyIncome FROM employees ORDER BY MonthlyIncome DESC LIMIT 10;", ()),
+    "wide listing (row cap)": ("SELECT * FROM employees WHERE Attrition = ?;", ("Yes",)),
+}
+# Same KPIs through the template fast path (summary cube when covered)
+TEMPLATE_QUESTIONS = {
+    "template: rate by department": "attrition rate by department",
+    "template: avg salary by role | overtime": "average salary by job role for overtime employees",
+    "template: headcount in sales": "how many employees in sales",
+}
+
+
+def _percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:  # Windows
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+
+
+def _time_ms(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def worker(iterations: int) -> dict:
+    """Runs inside the per-scale process (HR_DB_PATH already set)."""
+    from src.chat.router import format_results, get_sample_data
+    from src.chat.schema_catalog import get_catalog
+    from src.chat.sql_runner import DB_PATH, run_query
+    from src.chat.sql_templates import match_template
+
+    catalog_ms, catalog = _time_ms(get_catalog)
+    queries = dict(QUERIES)
+    for name, question in TEMPLATE_QUESTIONS.items():
+        match = match_template(question)
+        if match:
+            queries[name + (" (cube)" if match.from_cube else "")] = (match.sql, match.params)
+
+    out = {"rows": catalog.row_count, "db_mb": round(os.path.getsize(DB_PATH) / 1e6, 1),
+           "catalog_build_ms": round(catalog_ms, 1), "queries": {}}
+    for name, (sql, params) in queries.items():
+        run_query(sql, params, use_cache=False, timeout=QUERY_TIMEOUT)  # warm pool / page cache
+        run_ms, format_ms = [], []
+        for _ in range(iterations):
+            ms, result = _time_ms(run_query, sql, params, use_cache=False, timeout=QUERY_TIMEOUT)
+            run_ms.append(ms)
+            ms, _ = _time_ms(format_results, result.cols, result.rows, name, result.total, result.total_exact)
+            format_ms.append(ms)
+        out["queries"][name] = {
+            **_percentiles(run_ms),
+            "format_p50_ms": _percentiles(format_ms)["p50_ms"],
+            "rows_kept": len(result.rows),
+            "rows_total": result.total,
+        }
+
+    sample_ms = [_time_ms(get_sample_data)[0] for _ in range(iterations)]
+    out["sample_data"] = _percentiles(sample_ms)
+    out["peak_rss_mb"] = _peak_rss_mb()
+    return out
+
+
+def run_scale(rows: int, iterations: int, regenerate: bool = False) -> dict:
+    db_path = BENCH_DIR / f"hr_{scale_label(rows)}.sqlite"
+    if regenerate or not db_path.exists():
+        print(f"Generating {rows:,} rows -> {db_path} ...")
+        stats = generate_database(rows, db_path)
+        print(f"  done in {stats['seconds']}s")
+
+    env = {**os.environ, "HR_DB_PATH": str(db_path)}
+    proc = subprocess.run(
+        [sys.executable, "-m", "src.bench.bench_scale", "--worker", "--iterations", str(iterations)],
+        env=env, capture_output=True, text=True, cwd=Path(__file__).resolve().parents[2],
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"worker for {scale_label(rows)} failed:\n{proc.stderr}")
+    # The last stdout line is the JSON result (router imports may print before it)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_report(results: dict) -> None:
+    for label, res in results.items():
+        print(f"\n== {label}: {res['rows']:,} rows, {res['db_mb']} MB, "
+              f"catalog build {res['catalog_build_ms']:.0f} ms, peak RSS {res['peak_rss_mb']} MB")
+        for name, q in res["queries"].items():
+            print(f"  {name:<48} p50 {q['p50_ms']:9.2f} ms   p99 {q['p99_ms']:9.2f} ms   "
+                  f"format {q['format_p50_ms']:6.2f} ms   rows {q['rows_kept']:,}/{q['rows_total']:,}")
+        print(f"  {'get_sample_data':<48} p50 {res['sample_data']['p50_ms']:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite layer scale benchmark")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="comma-separated, e.g. 10k,1m,10m")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--out", help="JSON output (default: db/bench/scale-<timestamp>.json)")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild the synthetic databases")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.iterations)))
+        return
+
+    results = {}
+    for scale in args.scales.split(","):
+        rows = parse_scale(scale)
+        results[scale_label(rows)] = run_scale(rows, args.iterations, args.regenerate)
+    print_report(results)
+
+    out = Path(args.out) if args.out else BENCH_DIR / f"scale-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "scales": results,
+    }, indent=2))
+    print(f"\nSaved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Synthetic workforce generator
+Writes an `employees` database of any size that follows the source CSV:
+rows are drawn from the real employees (so every column distribution and
+every attrition correlation - OverTime, JobRole, JobLevel, income... - is
+kept), then pay, rates, commute and age get a small bounded jitter so the
+table is not just repeated copies. EmployeeNumber is renumbered 1..N.
+
+The output goes through the regular ingest writer (indexes, summary cube,
+ANALYZE, atomic swap), so it is queried exactly like db/hr.sqlite.
+
+Run from the project root:
+    python -m src.bench.synth_workforce 1m [--out db/bench/hr_1m.sqlite] [--seed 7]
+"""
+
+import argparse
+import csv
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.ingest.load_to_sqlite import (
+    CHUNK_ROWS, KEY_COLUMN, PROJECT_ROOT, TABLE_NAME, clean_column, find_csv, infer_types,
+    row_converter, write_database,
+)
+
+BENCH_DIR = PROJECT_ROOT / "db" / "bench"
+
+# column -> ("mul", relative sd) or ("add", max absolute step); results are clamped to the source range
+JITTER = {
+    "MonthlyIncome": ("mul", 0.06),
+    "MonthlyRate": ("mul", 0.10),
+    "DailyRate": ("mul", 0.10),
+    "HourlyRate": ("add", 3),
+    "DistanceFromHome": ("add", 1),
+    "Age": ("add", 1),
+}
+MIN_WORKING_AGE = 18
+
+
+def parse_scale(text: str) -> int:
+    """'10k' / '1m' / '2.5M' / '1470' -> row count."""
+    text = text.strip().lower().replace("_", "")
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * factor)
+
+
+def scale_label(rows: int) -> str:
+    if rows >= 1_000_000 and rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}m"
+    if rows >= 1_000 and rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+def load_source(csv_path: Path = None) -> tuple[list, list, dict]:
+    """(header, types, column -> numpy array) of the source CSV."""
+    csv_path = csv_path or find_csv()
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [clean_column(c) for c in next(reader)]
+        raw = list(reader)
+    types = infer_types(header, raw)
+    convert = row_converter(types)
+    typed = [convert(row) for row in raw]
+    columns = {}
+    for i, (name, col_type) in enumerate(zip(header, types)):
+        values = [row[i] for row in typed]
+        if col_type == "INTEGER" and None not in values:
+            columns[name] = np.array(values, dtype=np.int64)
+        elif col_type == "REAL" and None not in values:
+            columns[name] = np.array(values, dtype=np.float64)
+        else:
+            columns[name] = np.array(values, dtype=object)
+    return header, types, columns
+
+
+def _jitter(values: np.ndarray, spec: tuple, lo, hi, rng: np.random.Generator) -> np.ndarray:
+    kind, amount = spec
+    if kind == "mul":
+        out = values * rng.normal(1.0, amount, size=len(values))
+    else:
+        out = values + rng.integers(-amount, amount + 1, size=len(values))
+    out = np.clip(out, lo, hi)
+    return np.rint(out).astype(values.dtype) if values.dtype.kind == "i" else out
+
+
+def generate_chunks(header: list, columns: dict, rows: int, seed: int = 7, chunk_rows: int = CHUNK_ROWS):
+    """Chunks of typed rows (tuples in header order), no row hashes."""
+    rng = np.random.default_rng(seed)
+    source_rows = len(next(iter(columns.values())))
+    bounds = {c: (columns[c].min(), columns[c].max()) for c in JITTER if c in columns and columns[c].dtype.kind in "if"}
+
+    for offset in range(0, rows, chunk_rows):
+        size = min(chunk_rows, rows - offset)
+        idx = rng.integers(0, source_rows, size=size)
+        chunk = {name: values[idx] for name, values in columns.items()}
+        for name, spec in JITTER.items():
+            if name in bounds:
+                chunk[name] = _jitter(chunk[name], spec, *bounds[name], rng)
+        if "Age" in bounds and "TotalWorkingYears" in chunk:
+            # Keep careers possible: nobody started working before MIN_WORKING_AGE
+            chunk["Age"] = np.maximum(chunk["Age"], chunk["TotalWorkingYears"] + MIN_WORKING_AGE)
+        if KEY_COLUMN in chunk:
+            chunk[KEY_COLUMN] = np.arange(offset + 1, offset + size + 1, dtype=np.int64)
+        yield list(zip(*(chunk[name].tolist() for name in header))), None
+
+
+def generate_database(rows: int, db_path: Path = None, seed: int = 7, csv_path: Path = None) -> dict:
+    db_path = Path(db_path or BENCH_DIR / f"hr_{scale_label(rows)}.sqlite")
+    header, types, columns = load_source(csv_path)
+    stats = write_database(header, types, generate_chunks(header, columns, rows, seed), db_path,
+                           TABLE_NAME, source=f"synthetic:{rows}:seed={seed}")
+    stats["db_path"] = str(db_path)
+    return stats
+
+
+def fidelity_report(db_path: Path, csv_path: Path = None) -> list:
+    """Attrition rate / mean income by a few dimensions: (label, source, synthetic)."""
+    _, _, columns = load_source(csv_path)
+    left = columns["Attrition"] == "Yes"
+    rate_sql = "SUM(Attrition = 'Yes') * 100.0 / COUNT(*)"
+    lines = [
+        ("attrition rate", left.mean() * 100, rate_sql, None),
+        ("avg MonthlyIncome", columns["MonthlyIncome"].mean(), "AVG(MonthlyIncome)", None),
+    ]
+    for dim in ("OverTime", "Department", "JobLevel"):
+        for value in sorted(set(columns[dim].tolist())):
+            mask = columns[dim] == value
+            lines.append((f"attrition rate | {dim}={value}", left[mask].mean() * 100, rate_sql, (dim, value)))
+
+    conn = sqlite3.connect(f"{Path(db_path).as_uri()}?mode=ro", uri=True)
+    try:
+        report = []
+        for label, expected, metric, cond in lines:
+            where, params = (f" WHERE {cond[0]} = ?", (cond[1],)) if cond else ("", ())
+            actual = conn.execute(f"SELECT {metric} FROM {TABLE_NAME}{where};", params).fetchone()[0]
+            report.append((label, float(expected), actual))
+    finally:
+        conn.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic employees database")
+    parser.add_argument("rows", help="row count, e.g. 10k, 1m, 10m")
+    parser.add_argument("--out", help="database path (default: db/bench/hr_<rows>.sqlite)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--csv", help="source CSV (default: first CSV in data/raw)")
+    parser.add_argument("--check", action="store_true", help="compare key statistics with the source")
+    args = parser.parse_args()
+
+    rows = parse_scale(args.rows)
+    start = time.perf_counter()
+    stats = generate_database(rows, args.out, args.seed, Path(args.csv) if args.csv else None)
+    print(f"Wrote {stats['rows']:,} rows to {stats['db_path']} in {time.perf_counter() - start:.1f}s "
+          f"(summary cube: {stats['cube_rows']} rows)")
+
+    if args.check:
+        print(f"\n{'statistic':<50} {'source':>10} {'synthetic':>10}")
+        for label, expected, actual in fidelity_report(stats["db_path"], Path(args.csv) if args.csv else None):
+            print(f"{label:<50} {expected:>10.2f} {actual:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
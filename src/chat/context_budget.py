@@ -0,0 +1,104 @@
+"""
+Token-budgeted conversation context
+The previous-conversation block of the classifier and SQL prompts. Each
+answered turn is kept as a compact digest (question, SQL, first result
+rows) instead of its rendered markdown, and the block holds the newest
+turns that fit the token budget of the model that reads it - small for
+Falcon, whose whole prompt has to fit in n_ctx=2048. A turn that does not
+fit in full drops its result rows, then its SQL.
+
+Token counts are cached per entry, so a new turn only tokenizes itself.
+Falcon counts come from its own tokenizer (vocab-only GGUF load) when the
+model file is present; Groq and the fallback use the ~4 chars/token estimate.
+"""
+
+import os
+from functools import lru_cache
+
+from src.chat.schema_pruner import estimate_tokens
+from src.llm.falcon_chat import count_tokens as falcon_count_tokens
+
+TOKEN_BUDGETS = {
+    "groq": int(os.getenv("HR_CONTEXT_TOKENS_GROQ", "600")),
+    "local": int(os.getenv("HR_CONTEXT_TOKENS_LOCAL", "200")),
+}
+RESULT_ROWS = 3  # result rows kept in a digest
+VALUE_CHARS = 40
+MESSAGE_CHARS = 180  # messages without a digest (e.g. loaded transcripts)
+
+
+def _value(v) -> str:
+    if isinstance(v, float):
+        v = round(v, 2)
+    text = str(v)
+    return text if len(text) <= VALUE_CHARS else text[:VALUE_CHARS - 3] + "..."
+
+
+def turn_digest(question: str, sql: str = "", cols: list = None, rows: list = None, total: int = None) -> str:
+    """'Q: ...' plus the SQL and its first rows as col=value pairs."""
+    lines = [f"Q: {question.strip()}"]
+    if sql:
+        lines.append(f"SQL: {' '.join(sql.split())}")
+    if cols and rows:
+        shown = " | ".join(
+            ", ".join(f"{c}={_value(v)}" for c, v in zip(cols, row)) for row in rows[:RESULT_ROWS]
+        )
+        total = len(rows) if total is None else total
+        more = f" (+{total - RESULT_ROWS} more rows)" if total > RESULT_ROWS else ""
+        lines.append(f"Result: {shown}{more}")
+    return "\n".join(lines)
+
+
+def _compact(text: str) -> str:
+    """Rendered markdown -> one short line (tables and emphasis dropped)."""
+    kept = [line for line in (text or "").splitlines() if not line.lstrip().startswith("|")]
+    flat = " ".join(" ".join(kept).replace("**", "").replace("•", "").split())
+    return flat[:MESSAGE_CHARS]
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, provider: str) -> int:
+    if provider == "local":
+        n = falcon_count_tokens(text)
+        if n is not None:
+            return n
+    return estimate_tokens(text)
+
+
+def _entries(conversation_history: list, question: str) -> list:
+    """Oldest-first context entries; each is a list of variants, longest first."""
+    messages = [m for m in conversation_history if getattr(m, "role", None) in ("user", "assistant")]
+    if messages and messages[-1].role == "user" and messages[-1].content.strip() == (question or "").strip():
+        messages = messages[:-1]  # the question being answered is already in the prompt
+
+    entries = []
+    for i, m in enumerate(messages):
+        if m.role == "user":
+            answered = i + 1 < len(messages) and getattr(messages[i + 1], "digest", "")
+            if not answered:  # a digest repeats its question
+                entries.append([f"USER: {m.content.strip()[:MESSAGE_CHARS]}"])
+        elif getattr(m, "digest", ""):
+            lines = m.digest.splitlines()
+            entries.append(["\n".join(lines[:k]) for k in range(len(lines), 0, -1)])
+        else:
+            entries.append([f"ASSISTANT: {_compact(m.content)}"])
+    return entries
+
+
+def build_context(conversation_history: list, question: str = "", provider: str = "groq",
+                  budget: int = None) -> str:
+    """Newest turns that fit `budget` tokens (default: the provider's), oldest first."""
+    if not conversation_history:
+        return ""
+    remaining = TOKEN_BUDGETS.get(provider, TOKEN_BUDGETS["groq"]) if budget is None else budget
+    chosen = []
+    for variants in reversed(_entries(conversation_history, question)):
+        for text in variants:
+            cost = count_tokens(text, provider) + 1  # + newline
+            if cost <= remaining:
+                chosen.append(text)
+                remaining -= cost
+                break
+        else:
+            break  # keep the context contiguous: nothing older once a turn is dropped
+    return "\n".join(reversed(chosen))
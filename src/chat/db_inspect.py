@@ -1,8 +1,9 @@
+import os
 import sqlite3
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DB_PATH = PROJECT_ROOT / "db" / "hr.sqlite"
+DB_PATH = Path(os.getenv("HR_DB_PATH", PROJECT_ROOT / "db" / "hr.sqlite"))
 
 def main():
     if not DB_PATH.exists():
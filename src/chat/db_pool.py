@@ -0,0 +1,150 @@
+"""
+Read-only SQLite connection pool for the HR database
+Connections are opened once with URI mode=ro (plus immutable=1 when
+HR_DB_IMMUTABLE=1, i.e. between ingests), tuned with mmap/page-cache/temp
+pragmas and a larger prepared-statement cache, and handed out one caller at
+a time. The pool is module-level, so it survives Streamlit reruns (each rerun
+runs on a new script thread, which would defeat plain thread-locals).
+A changed database version token (re-ingest / atomic swap) drops every idle
+connection so readers never see a replaced file through a stale handle.
+Incremental ingests write in place, so keep HR_DB_IMMUTABLE=0 while they run.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DB_PATH = Path(os.getenv("HR_DB_PATH", PROJECT_ROOT / "db" / "hr.sqlite"))
+
+IMMUTABLE = os.getenv("HR_DB_IMMUTABLE", "0") == "1"
+MMAP_BYTES = int(os.getenv("HR_DB_MMAP_MB", "256")) * 1024 * 1024
+CACHE_KIB = int(os.getenv("HR_DB_CACHE_MB", "64")) * 1024
+CACHED_STATEMENTS = 256
+MAX_IDLE = int(os.getenv("HR_DB_POOL_SIZE", "8"))
+BUSY_TIMEOUT_MS = 5000  # wait out the commit of an in-place (delta) ingest
+META_TABLE = "ingest_meta"
+
+
+def db_version_token(db_path: Path = DB_PATH) -> tuple:
+    """
+    Changes whenever the database file is rewritten or replaced
+    (re-ingest, atomic swap, writes through the WAL).
+    """
+    parts = []
+    for p in (Path(db_path), Path(f"{db_path}-wal")):
+        try:
+            st = os.stat(p)
+            parts.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            parts.append(None)
+    return tuple(parts)
+
+
+def open_readonly(db_path: Path = DB_PATH, immutable: bool = IMMUTABLE) -> sqlite3.Connection:
+    """A tuned read-only connection (usable from any thread, one at a time)."""
+    path = Path(db_path)
+    if not path.exists():
+        # mode=ro would fail with the less helpful "unable to open database file"
+        raise sqlite3.OperationalError(f"database not found: {path} (run src/ingest/load_to_sqlite.py)")
+    uri = f"{path.as_uri()}?mode=ro" + ("&immutable=1" if immutable else "")
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+    conn.execute(f"PRAGMA mmap_size = {MMAP_BYTES};")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_KIB};")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA query_only = 1;")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, db_path: Path = DB_PATH, max_idle: int = MAX_IDLE):
+        self.db_path = Path(db_path)
+        self.max_idle = max_idle
+        self._idle = []
+        self._version = None
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def _take(self, version: tuple) -> sqlite3.Connection:
+        with self._lock:
+            if version != self._version:
+                for conn in self._idle:
+                    conn.close()
+                self._idle.clear()
+                self._version = version
+            if self._idle:
+                return self._idle.pop()
+        self.opened += 1
+        return open_readonly(self.db_path)
+
+    def _give_back(self, conn: sqlite3.Connection, version: tuple) -> None:
+        with self._lock:
+            if version == self._version and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        version = db_version_token(self.db_path)
+        conn = self._take(version)
+        try:
+            yield conn
+        finally:
+            self._give_back(conn, version)
+
+    def close_all(self) -> None:
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+            self._version = None
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path = DB_PATH) -> ConnectionPool:
+    key = str(db_path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(db_path)
+        return _pools[key]
+
+
+def read_connection(db_path: Path = DB_PATH):
+    """`with read_connection() as conn:` - pooled read-only connection."""
+    return get_pool(db_path).connection()
+
+
+_data_versions = {}  # db path -> (file version token, data version)
+
+
+def data_version(db_path: Path = DB_PATH) -> int | None:
+    """
+    Ingest data version (ingest_meta.data_version), bumped by every load that
+    changes rows. None for databases built without the meta table.
+    Looked up once per file version token, so it costs a stat() per call.
+    """
+    token = db_version_token(db_path)
+    cached = _data_versions.get(str(db_path))
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    try:
+        with read_connection(db_path) as conn:
+            row = conn.execute(f"SELECT value FROM {META_TABLE} WHERE key = 'data_version';").fetchone()
+        version = int(row[0]) if row else None
+    except sqlite3.OperationalError:
+        version = None
+    _data_versions[str(db_path)] = (token, version)
+    return version
+
+
+def cache_version(db_path: Path = DB_PATH):
+    """Key for result caches: the data version, or the file token for older databases."""
+    version = data_version(db_path)
+    return ("data", version) if version is not None else db_version_token(db_path)
@@ -0,0 +1,91 @@
+"""
+Local intent classifier (DATA / ADVICE / GREETING)
+Hashed word + character n-gram features and a linear softmax model in NumPy.
+Runs in microseconds, so the LLM classifier is only needed for questions the
+model is unsure about.
+
+The weights and the calibrated confidence threshold are bundled as
+intent_model.npz; rebuild them with:
+    python -m src.chat.train_intent
+"""
+
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+MODEL_PATH = Path(__file__).resolve().parent / "intent_model.npz"
+N_FEATURES = 2 ** 12
+LABELS = ["DATA", "ADVICE", "GREETING"]
+DEFAULT_THRESHOLD = 0.8  # artifacts saved before the threshold was calibrated
+
+_TOKEN_RE = re.compile(r"[a-z0-9&]+")
+_model = None
+
+
+def _hash(feature: str) -> int:
+    # crc32 instead of hash(): Python string hashing is salted per process
+    return zlib.crc32(feature.encode("utf-8")) % N_FEATURES
+
+
+def featurize(text: str) -> tuple[np.ndarray, np.ndarray]:
+    """Sparse (indices, values) feature vector, L2-normalized."""
+    words = _TOKEN_RE.findall((text or "").lower())
+    feats = [f"w:{w}" for w in words]
+    feats += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    if words:
+        feats.append(f"first:{words[0]}")
+    for w in words:
+        padded = f"<{w}>"
+        feats += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    if not feats:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    counts = Counter(_hash(f) for f in feats)
+    idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    vals = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return idx, vals / np.sqrt(vals @ vals)
+
+
+def featurize_dense(texts: list) -> np.ndarray:
+    X = np.zeros((len(texts), N_FEATURES), dtype=np.float32)
+    for i, t in enumerate(texts):
+        idx, vals = featurize(t)
+        X[i, idx] = vals
+    return X
+
+
+def load_model():
+    """Load the bundled weights once; None if the artifact is missing."""
+    global _model
+    if _model is None and MODEL_PATH.exists():
+        data = np.load(MODEL_PATH)
+        threshold = float(data["threshold"]) if "threshold" in data.files else DEFAULT_THRESHOLD
+        _model = (data["W"].astype(np.float32), data["b"].astype(np.float32), [str(x) for x in data["labels"]], threshold)
+    return _model
+
+
+def confidence_threshold() -> float:
+    """Confidence at/above which a prediction can be trusted alone (calibrated by train_intent.py)."""
+    model = load_model()
+    return model[3] if model is not None else DEFAULT_THRESHOLD
+
+
+def predict_intent(question: str) -> tuple[str, float] | None:
+    """
+    Returns (label, confidence) from the local model,
+    or None if no model artifact is available.
+    """
+    model = load_model()
+    if model is None:
+        return None
+    W, b, labels, _ = model
+    idx, vals = featurize(question)
+    logits = b + vals @ W[idx] if len(idx) else b.copy()
+    logits = logits - logits.max()
+    probs = np.exp(logits)
+    probs /= probs.sum()
+    best = int(probs.argmax())
+    return labels[best], float(probs[best])
@@ -34,14 +34,15 @@ Role = Literal["system", "user", "assistant"]
 class Message:
     role: Role
     content: str
+    digest: str = ""  # compact turn summary sent to the LLMs instead of content (src/chat/context_budget.py)
 
 class ChatMemory:
     def __init__(self, max_turns: int = 10):
         self.max_turns = max_turns
         self.messages: List[Message] = []
 
-    def add(self, role: Role, content: str):
-        self.messages.append(Message(role=role, content=content))
+    def add(self, role: Role, content: str, digest: str = ""):
+        self.messages.append(Message(role=role, content=content, digest=digest))
         # Keep last N turns
         if len(self.messages) > self.max_turns * 2:
             self.messages = self.messages[-(self.max_turns * 2):]
@@ -0,0 +1,237 @@
+"""
+On-demand turn profiler
+Profiles the next N answer_question / answer_question_stream calls with a
+wall-clock sampling profiler: a background thread snapshots the Python stack
+of every thread each HR_PROFILE_INTERVAL_MS, so time shows up where it is
+spent - waiting on the Groq socket, inside llama.cpp's eval, in SQLite, or in
+Streamlit rendering between streamed chunks. Stacks of idle threads (no
+frame under src/ and not the thread that asked the question) are dropped.
+
+Each profiled turn writes to HR_PROFILE_DIR (default db/profiles):
+- turn-<timestamp>-<n>.collapsed: flame-graph input ("frame;frame;frame count",
+  one sample = one interval), e.g. `flamegraph.pl x.collapsed > x.svg` or speedscope
+- turn-<timestamp>-<n>.txt: wall time, top frames by self time and top src/
+  functions by total time (per thread, so overlapping threads add up)
+
+Arm it with HR_PROFILE_TURNS=N, arm(N) (Streamlit sidebar) or run it
+headless over a question file:
+    python -m src.chat.profiling questions.txt [--provider groq] [--interval-ms 5]
+
+While nothing is armed, profiled_turn() is a single integer check.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from src.chat.telemetry import event
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SRC_DIR = str(PROJECT_ROOT / "src")
+PROFILE_DIR = Path(os.getenv("HR_PROFILE_DIR", str(PROJECT_ROOT / "db" / "profiles")))
+INTERVAL_MS = float(os.getenv("HR_PROFILE_INTERVAL_MS", "5"))
+TOP_FRAMES = 15
+
+_armed = int(os.getenv("HR_PROFILE_TURNS", "0"))
+_lock = threading.Lock()
+_seq = 0
+_last_profile = None
+_NOOP = nullcontext()
+
+
+def arm(turns: int) -> None:
+    """Profile the next `turns` chat turns (0 disarms)."""
+    global _armed
+    with _lock:
+        _armed = max(0, int(turns))
+
+
+def remaining() -> int:
+    return _armed
+
+
+def last_profile() -> dict | None:
+    """{"collapsed": path, "summary": path, "wall_ms": ..., "samples": ...} of the latest profiled turn."""
+    return _last_profile
+
+
+def _take_turn() -> int | None:
+    global _armed, _seq
+    with _lock:
+        if not _armed:
+            return None
+        _armed -= 1
+        _seq += 1
+        return _seq
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(SRC_DIR):
+        path = os.path.relpath(path, PROJECT_ROOT)
+    else:
+        # site-packages/groq/_base_client.py -> groq/_base_client.py
+        marker = "site-packages" + os.sep
+        path = path.split(marker, 1)[1] if marker in path else os.path.basename(path)
+    return f"{code.co_name} ({path.replace(os.sep, '/')})"
+
+
+class Sampler:
+    """Collects collapsed stacks of all busy threads until stop()."""
+
+    def __init__(self, interval_ms: float = INTERVAL_MS, owner: int = None):
+        self.interval = interval_ms / 1000
+        self.owner = owner or threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hr-profiler", daemon=True)
+
+    def start(self) -> "Sampler":
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.wall_ms = (time.perf_counter() - self.started) * 1000
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels, busy = [], ident == self.owner
+                while frame is not None:
+                    code = frame.f_code
+                    busy = busy or code.co_filename.startswith(SRC_DIR)
+                    labels.append(_frame_label(code))
+                    frame = frame.f_back
+                if not busy:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                labels.append(f"thread: {names.get(ident, ident)}")
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def top(self, n: int = TOP_FRAMES) -> tuple[list, list]:
+        """([(frame, self samples)], [(src/ frame, total samples)]) - most samples first."""
+        self_counts, total_counts = Counter(), Counter()
+        for stack, hits in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += hits
+            for frame in set(frames[1:]):
+                if "(src/" in frame:
+                    total_counts[frame] += hits
+        return self_counts.most_common(n), total_counts.most_common(n)
+
+
+def write_profile(sampler: Sampler, question: str, turn: int, out_dir: Path = None) -> dict:
+    out_dir = Path(out_dir or PROFILE_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = out_dir / f"turn-{time.strftime('%Y%m%d-%H%M%S')}-{turn}"
+    collapsed = stem.with_suffix(".collapsed")
+    collapsed.write_text("".join(f"{stack} {hits}\n" for stack, hits in sorted(sampler.stacks.items())),
+                         encoding="utf-8")
+
+    # Sampling itself stretches the interval a little; spread the wall time over the samples
+    ms = sampler.wall_ms / max(sampler.samples, 1)
+    by_self, by_total = sampler.top()
+    lines = [
+        f"Question: {question}",
+        f"Wall: {sampler.wall_ms:.1f} ms, {sampler.samples} samples (~{ms:.1f} ms each)",
+        "",
+        f"{'self ms':>9}  frame",
+        *(f"{hits * ms:>9.1f}  {frame}" for frame, hits in by_self),
+        "",
+        f"{'total ms':>9}  frame",
+        *(f"{hits * ms:>9.1f}  {frame}" for frame, hits in by_total),
+    ]
+    summary = stem.with_suffix(".txt")
+    summary.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return {"question": question, "collapsed": str(collapsed), "summary": str(summary),
+            "wall_ms": round(sampler.wall_ms, 1), "samples": sampler.samples}
+
+
+@contextmanager
+def _profiling(question: str, turn: int):
+    global _last_profile
+    sampler = Sampler(INTERVAL_MS).start()
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
+        _last_profile = write_profile(sampler, question, turn)
+        event(f"Turn profile: {_last_profile['summary']} ({_last_profile['wall_ms']} ms)", component="Profiler")
+
+
+def profiled_turn(question: str):
+    """`with profiled_turn(question): ...` - samples the block if a turn is armed."""
+    if not _armed:
+        return _NOOP
+    turn = _take_turn()
+    return _profiling(question, turn) if turn else _NOOP
+
+
+# =========================
+# Headless run
+# =========================
+
+def read_questions(path: Path) -> list:
+    """One question per line; blank lines and # comments are skipped."""
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile chat turns from a question file")
+    parser.add_argument("questions", help="text file, one question per line")
+    parser.add_argument("--provider", default="groq", choices=["groq", "local"])
+    parser.add_argument("--interval-ms", type=float, default=INTERVAL_MS)
+    parser.add_argument("--out", default=str(PROFILE_DIR), help="profile directory")
+    parser.add_argument("--conversation", action="store_true",
+                        help="ask the questions as one conversation (follow-ups see earlier turns)")
+    args = parser.parse_args()
+
+    # Under `python -m` this file is __main__; the router uses the imported module
+    from src.chat import profiling
+    from src.chat.memory import Message
+    from src.chat.router import answer_with_digest
+
+    profiling.PROFILE_DIR, profiling.INTERVAL_MS = Path(args.out), args.interval_ms
+
+    questions = read_questions(args.questions)
+    history, profiles = [], []
+    profiling.arm(len(questions))
+    for question in questions:
+        answer, digest = answer_with_digest(question, args.provider, history if args.conversation else [],
+                                            session_id="profile")
+        profiles.append(profiling.last_profile())
+        history += [Message("user", question), Message("assistant", answer, digest)]
+    profiling.arm(0)
+
+    combined = profiling.PROFILE_DIR / f"run-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+    totals = Counter()
+    for p in profiles:
+        for line in Path(p["collapsed"]).read_text(encoding="utf-8").splitlines():
+            stack, hits = line.rsplit(" ", 1)
+            totals[stack] += int(hits)
+    combined.write_text("".join(f"{s} {h}\n" for s, h in sorted(totals.items())), encoding="utf-8")
+
+    print(f"\n{'wall ms':>9}  question")
+    for p in profiles:
+        print(f"{p['wall_ms']:>9.1f}  {p['question']}  -> {p['summary']}")
+    print(f"\nAll turns (flame graph input): {combined}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+In-process SQL result cache
+Byte-bounded LRU keyed by canonicalized SQL + a database version token, so
+repeated questions and dashboards are served from memory and every entry is
+dropped as soon as the data changes (the ingest data_version is bumped, or
+the file changes for databases without one).
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+MAX_BYTES = int(float(os.getenv("HR_RESULT_CACHE_MB", "64")) * 1024 * 1024)
+
+# String literals / quoted identifiers are kept verbatim
+_TOKEN_RE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|(\s+)")
+
+
+def canonicalize_sql(sql: str) -> str:
+    """Collapse whitespace outside quotes and drop trailing semicolons."""
+    def repl(m):
+        return m.group(1) if m.group(1) else " "
+    return _TOKEN_RE.sub(repl, (sql or "").strip()).rstrip("; ")
+
+
+def estimate_bytes(cols: list, rows: list) -> int:
+    size = sys.getsizeof(rows) + sum(sys.getsizeof(c) for c in cols)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+    return size
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (cols, rows, size, total)
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self, version) -> None:
+        # A new version token makes every older entry unreachable -> free them
+        if version != self._version:
+            self._entries.clear()
+            self.total_bytes = 0
+            self._version = version
+
+    def get(self, sql: str, version, params: tuple = ()):
+        key = (canonicalize_sql(sql), tuple(params))
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1], entry[3]
+
+    def put(self, sql: str, version, cols: list, rows: list, params: tuple = (), total: int = None) -> None:
+        """total: full result size when rows were capped (defaults to len(rows))."""
+        size = estimate_bytes(cols, rows)
+        # One huge result should not flush the whole cache
+        if size > self.max_bytes // 4:
+            return
+        key = (canonicalize_sql(sql), tuple(params))
+        with self._lock:
+            self._check_version(version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            self._entries[key] = (cols, rows, size, len(rows) if total is None else total)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and self._entries:
+                _, (_, _, evicted, _) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+result_cache = ResultCache()
@@ -1,15 +1,39 @@
+import asyncio
+import concurrent.futures
+import contextvars
 import os
 import re
+import threading
+from dataclasses import dataclass
 from dotenv import load_dotenv
-from groq import Groq
 
-from src.chat.sql_runner import run_sql
+from src.chat.sql_runner import QueryCancelled, QueryResult, QueryTimeout, run_query
+from src.chat.context_budget import build_context, turn_digest
+from src.chat.intent_model import confidence_threshold, predict_intent
+from src.chat.profiling import profiled_turn
+from src.chat.schema_catalog import get_catalog
+from src.chat.schema_pruner import PRUNING_ENABLED, pruned_schema
 from src.chat.schema_reader import get_schema_text
-from src.llm.falcon_chat import falcon_chat
-from src.llm.groq_client import groq_chat
+from src.chat.sql_cache import lookup_sql, store_sql
+from src.chat.sql_repair import normalize_literals, repair_sql
+from src.chat.sql_templates import AGG_WORDS, ATTRITION_WORDS, COUNT_WORDS, GROUP_RE, RATE_WORDS, match_template
+from src.chat.sql_validator import check_sql
+from src.chat.telemetry import LOG_CONSOLE, count, event, span
+from src.llm.falcon_chat import falcon_chat, falcon_chat_stream
+from src.llm.falcon_sql import generate_sql as generate_local_sql, local_sql_available
+from src.llm.groq_client import groq_chat, groq_chat_stream
+from src.llm.groq_pool import chat_completion
 
 load_dotenv()
 
+# Local intent model answers on its own at/above this confidence
+# (default: the threshold calibrated with the model, see train_intent.py)
+INTENT_CONFIDENCE_THRESHOLD = os.getenv("INTENT_CONFIDENCE_THRESHOLD")
+
+# Who writes SQL: "groq", "local" (grammar-constrained Falcon, src/llm/falcon_sql.py)
+# or "auto" (Groq when a key is configured, else the local model)
+SQL_PROVIDER = os.getenv("SQL_PROVIDER", "auto").lower()
+
 # =========================
 # Follow-up / context logic
 # =========================
@@ -43,17 +67,6 @@ def _safe_lower(s: str) -> str:
     return (s or "").strip().lower()
 
 
-def build_context(conversation_history: list, max_msgs: int = 8) -> str:
-    if not conversation_history:
-        return ""
-    recent = conversation_history[-max_msgs:]
-    return "\n".join(
-        f"{m.role.upper()}: {m.content[:180]}"
-        for m in recent
-        if getattr(m, "role", None) in ["user", "assistant"]
-    )
-
-
 def last_user_data_question(conversation_history: list) -> str:
     """Return the most recent 'data-like' user question."""
     if not conversation_history:
@@ -140,54 +153,90 @@ def rewrite_followup_to_full_question(current_q: str, prev_q: str) -> str:
 def get_sample_data(limit=3):
     """Get sample data to help LLM understand the dataset."""
     try:
-        cols, rows = run_sql(f"SELECT * FROM employees LIMIT {int(limit)};")
-        sample = "\n".join(
-            f"Sample row {i+1}: " + ", ".join(f"{col}={val}" for col, val in zip(cols, row))
-            for i, row in enumerate(rows)
-        )
-        return sample
+        return get_catalog().sample_text(int(limit)) or "No sample data available"
     except Exception:
         return "No sample data available"
 
 
 def validate_sql(sql: str) -> tuple[bool, str]:
-    """Validate SQL before execution."""
-    sql_lower = (sql or "").lower().strip()
-
-    if not sql_lower.startswith("select"):
-        return False, "Query must start with SELECT"
-
-    if " from " not in sql_lower:
-        return False, "Query must include FROM clause"
-
-    dangerous = ["drop", "delete", "insert", "update", "alter", "create", "truncate"]
-    for word in dangerous:
-        if f" {word} " in sql_lower or sql_lower.startswith(f"{word} "):
-            return False, f"Dangerous operation not allowed: {word.upper()}"
-
-    if "employees" not in sql_lower:
-        return False, "Query must reference 'employees' table"
-
-    if sql.count("(") != sql.count(")"):
-        return False, "Unmatched parentheses"
+    """
+    Validate SQL before execution by preparing it on a read-only connection
+    (see src/chat/sql_validator.py). The error text feeds the retry prompt.
+    """
+    check = check_sql(sql, table=get_catalog().table)
+    if not check.ok:
+        count("hr_sql_validation_failures_total", kind=check.kind)
+    return check.ok, str(check)
+
+
+def _clean_generated_sql(text: str) -> str:
+    sql = (text or "").strip()
+    sql = sql.replace("```sql", "").replace("```", "").strip()
+
+    # If model wrapped it weirdly, try to recover a SELECT line
+    if not sql.lower().startswith("select"):
+        for line in sql.splitlines():
+            if line.strip().lower().startswith("select"):
+                sql = line.strip()
+                break
+
+    if not sql.endswith(";"):
+        sql += ";"
+    return sql
+
+
+def resolve_sql_provider(sql_provider: str = None) -> str:
+    choice = (sql_provider or SQL_PROVIDER).lower()
+    if choice == "auto":
+        if os.getenv("GROQ_API_KEY") or not local_sql_available():
+            return "groq"
+        return "local"
+    return choice
+
+
+def _groq_sql(prompt: str, cancel: threading.Event = None) -> str:
+    response = chat_completion(
+        model="llama-3.3-70b-versatile",
+        messages=[
+            {"role": "system", "content": "You are a SQL expert. Return ONLY valid SQLite queries."},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.0,
+        max_tokens=500,
+        cancel=cancel,
+    )
+    return response.choices[0].message.content
 
-    if not sql_lower.rstrip().endswith(";"):
-        return False, "Query should end with semicolon"
 
-    return True, ""
+def _local_sql_notes(sample_data: str, context: str, previous_sql: str, previous_error: str) -> str:
+    notes = f"Sample data:\n{sample_data}"
+    if context:
+        notes += f"\n\nPrevious conversation:\n{context}"
+    if previous_error:
+        notes += f"\n\nThe query {previous_sql} failed: {previous_error}. Write a corrected query."
+    return notes
 
 
-def generate_sql_with_validation(question: str, schema: str, context: str = "", max_retries: int = 2) -> tuple[str, str]:
+def generate_validated_sql(question: str, schema: str, context: str = "", max_retries: int = 2,
+                           sql_provider: str = None, cancel: threading.Event = None) -> tuple[str, str]:
     """
-    Generate SQL with automatic validation and retry.
-    Returns: (sql_query, explanation)
+    Generate SQL with automatic validation and retry (no explanation call).
+    Returns: (sql_query, error) - on failure sql_query starts with "--".
+    Once `cancel` is set (a discarded speculation) no further LLM call is made.
     """
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
+    provider = resolve_sql_provider(sql_provider)
+    if provider == "groq" and not os.getenv("GROQ_API_KEY"):
         return "-- Error: GROQ_API_KEY not found", "API key missing"
+    event(f"SQL provider: {provider}")
 
-    client = Groq(api_key=api_key)
-    sample_data = get_sample_data()
+    prompt_schema, sample_data = schema, get_sample_data()
+    if PRUNING_ENABLED:
+        try:
+            with span("schema_pruning"):
+                prompt_schema, sample_data, report = pruned_schema(question, context)
+            event(f"Schema pruning: {report}")
+        except Exception:
+            pass
 
     context_section = ""
     if context:
@@ -200,9 +249,19 @@ PREVIOUS CONVERSATION (use to resolve follow-ups like "what about in Sales?"):
     previous_error = ""
 
     for attempt in range(max_retries + 1):
+        if cancel is not None and cancel.is_set():
+            event("SQL generation cancelled")
+            return "-- Cancelled", "cancelled"
+        if attempt:
+            count("hr_sql_retries_total", provider=provider)
         try:
-            if attempt == 0:
-                prompt = f"""You are an expert SQL analyst specializing in SQLite and HR analytics.
+            if provider == "local":
+                # Grammar-constrained: always a parseable SELECT over real columns
+                raw = generate_local_sql(
+                    question, prompt_schema, _local_sql_notes(sample_data, context, previous_sql, previous_error)
+                )
+            elif attempt == 0:
+                raw = _groq_sql(f"""You are an expert SQL analyst specializing in SQLite and HR analytics.
 
 Generate ONE valid SQLite SELECT query to answer the question.
 
@@ -217,7 +276,7 @@ CRITICAL RULES:
 8. Use GROUP BY for aggregations by category
 
 DATABASE SCHEMA:
-{schema}
+{prompt_schema}
 
 SAMPLE DATA:
 {sample_data}
@@ -227,14 +286,14 @@ SAMPLE DATA:
 QUESTION:
 {question}
 
-Return ONLY the SQL:"""
+Return ONLY the SQL:""", cancel)
             else:
-                prompt = f"""The previous SQL had an error: {previous_error}
+                raw = _groq_sql(f"""The previous SQL had an error: {previous_error}
 
 Generate a CORRECTED SQLite SELECT query.
 
 Schema:
-{schema}
+{prompt_schema}
 
 Question:
 {question}
@@ -242,51 +301,28 @@ Question:
 Previous failed SQL:
 {previous_sql}
 
-Return ONLY the corrected SQL:"""
-
-            response = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": "system", "content": "You are a SQL expert. Return ONLY valid SQLite queries."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.0,
-                max_tokens=500,
-            )
+Return ONLY the corrected SQL:""", cancel)
 
-            sql = response.choices[0].message.content.strip()
-            sql = sql.replace("```sql", "").replace("```", "").strip()
+            sql = _clean_generated_sql(raw)
+            with span("sql_repair"):
+                repaired = repair_sql(sql)
+            if repaired.sql != sql:
+                count("hr_sql_repairs_total", stage="generation")
+                event(f"SQL repaired locally: {'; '.join(repaired.changes)}")
+                sql = repaired.sql
 
-            # If model wrapped it weirdly, try to recover a SELECT line
-            if not sql.lower().startswith("select"):
-                for line in sql.splitlines():
-                    if line.strip().lower().startswith("select"):
-                        sql = line.strip()
-                        break
-
-            if not sql.endswith(";"):
-                sql += ";"
-
-            is_valid, error = validate_sql(sql)
+            with span("sql_validate") as s:
+                is_valid, error = validate_sql(sql)
+                s.set(valid=is_valid)
             if is_valid:
-                explain_prompt = f"""Explain this SQL query in 1 simple sentence:
-
-Query: {sql}
-Question: {question}
-
-Explanation:"""
-
-                explain_response = client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[{"role": "user", "content": explain_prompt}],
-                    temperature=0.3,
-                    max_tokens=80,
-                )
-                explanation = explain_response.choices[0].message.content.strip()
-                return sql, explanation
+                return sql, ""
 
             previous_sql = sql
             previous_error = error
+            event(f"SQL rejected locally: {error}")
+            if error.startswith("no such column"):
+                # The pruned schema may have dropped the column it needed
+                prompt_schema = schema or get_schema_text()
 
             if attempt == max_retries:
                 return f"-- Validation error: {error}", error
@@ -298,37 +334,134 @@ Explanation:"""
     return "-- Failed after retries", "Failed to generate valid SQL"
 
 
-def execute_with_fallback(sql: str) -> tuple[list, list, str]:
-    """Execute SQL with basic fallback messaging."""
+def explain_sql(sql: str, question: str) -> str:
+    """One-sentence explanation of a validated query (needs only the SQL)."""
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return "API key missing"
+
+    explain_prompt = f"""Explain this SQL query in 1 simple sentence:
+
+Query: {sql}
+Question: {question}
+
+Explanation:"""
+
+    try:
+        explain_response = chat_completion(
+            model="llama-3.3-70b-versatile",
+            messages=[{"role": "user", "content": explain_prompt}],
+            temperature=0.3,
+            max_tokens=80,
+        )
+        return explain_response.choices[0].message.content.strip()
+    except Exception as e:
+        return f"(explanation unavailable: {e})"
+
+
+def generate_sql_with_validation(question: str, schema: str, context: str = "", max_retries: int = 2) -> tuple[str, str]:
+    """
+    Generate SQL with automatic validation and retry.
+    Returns: (sql_query, explanation)
+    """
+    # SQL written for a follow-up depends on its conversation: never share it
+    use_cache = not (context and is_followup_question(question))
+    cached = lookup_sql(question, schema) if use_cache else None
+    if cached:
+        return cached
+
+    sql, error = generate_validated_sql(question, schema, context, max_retries)
+    if sql.startswith("--"):
+        return sql, error
+    explanation = explain_sql(sql, question)
+    if use_cache:
+        store_sql(question, schema, sql, explanation)
+    return sql, explanation
+
+
+def _is_empty(result: QueryResult) -> bool:
+    """No rows, or one aggregate row of NULL/0 (COUNT/AVG over nothing)."""
+    if not result.rows:
+        return True
+    return len(result.rows) == 1 and all(v is None or v == 0 for v in result.rows[0])
+
+
+def _retry_if_empty(result: QueryResult, sql: str, params: tuple, session_id: str = None) -> QueryResult:
+    """An empty result may come from a misspelled category literal ('sales' for 'Sales'): respell and rerun."""
+    if not _is_empty(result) or "'" not in sql:
+        return result
+    with span("sql_repair"):
+        literals = normalize_literals(sql)
+    if not literals.changed:
+        return result
+    retried = run_query(literals.sql, params, session_id=session_id)
+    if _is_empty(retried):
+        return result
+    count("hr_sql_repairs_total", stage="empty_result")
+    event(f"SQL literals respelled after an empty result: {'; '.join(literals.changes)}")
+    return retried
+
+
+def execute_with_fallback(sql: str, params: tuple = (), session_id: str = None) -> tuple[QueryResult | None, str]:
+    """
+    Execute SQL through the query governor (timeout, row/byte caps,
+    cancellation by a newer message) with basic fallback messaging.
+    """
     try:
-        cols, rows = run_sql(sql)
-        return cols, rows, ""
+        return _retry_if_empty(run_query(sql, params, session_id=session_id), sql, params, session_id), ""
+    except QueryCancelled:
+        count("hr_query_errors_total", kind="cancelled")
+        return None, "Query cancelled because a newer message was submitted."
+    except QueryTimeout as e:
+        count("hr_query_errors_total", kind="timeout")
+        return None, f"The query was too expensive ({e}). Try adding a filter or grouping."
     except Exception as e:
+        count("hr_query_errors_total", kind="error")
+        # Deterministic fix-up (columns, literals, parens) before giving up
+        with span("sql_repair"):
+            repaired = repair_sql(sql, params=params)
+        if repaired.sql != sql:
+            try:
+                result = run_query(repaired.sql, params, session_id=session_id)
+                count("hr_sql_repairs_total", stage="execution")
+                event(f"SQL repaired locally: {'; '.join(repaired.changes)}")
+                return result, ""
+            except Exception:
+                pass
+
         error_str = str(e).lower()
 
         if "no such column" in error_str:
             m = re.search(r"no such column: (\w+)", error_str)
             if m:
-                return [], [], f"Column '{m.group(1)}' doesn't exist. Please use exact schema column names."
-            return [], [], "Column name error. Please rephrase using exact column names."
+                return None, f"Column '{m.group(1)}' doesn't exist. Please use exact schema column names."
+            return None, "Column name error. Please rephrase using exact column names."
 
         if "no such table" in error_str:
-            return [], [], "Table not found. Make sure you ran load_to_sqlite.py and DB path is correct."
+            return None, "Table not found. Make sure you ran load_to_sqlite.py and DB path is correct."
 
         if "syntax error" in error_str:
-            return [], [], "SQL syntax error. Try rephrasing your question."
+            return None, "SQL syntax error. Try rephrasing your question."
 
-        return [], [], str(e)
+        return None, str(e)
 
 
 # =========================
 # Classification
 # =========================
 
+def _has_data_terms(question: str) -> bool:
+    """Metric, aggregation or grouping words: a greeting in front of them is a question."""
+    q = _safe_lower(question)
+    if any(re.search(rf"\b{re.escape(k)}", q) for k in DATA_WORDS):
+        return True
+    return any(p.search(q) for p in (ATTRITION_WORDS, RATE_WORDS, COUNT_WORDS, GROUP_RE, *AGG_WORDS.values()))
+
+
 def _classify_by_keywords(question: str) -> str:
     q = _safe_lower(question)
     greetings = ["hi", "hello", "hey", "good morning", "good evening", "howdy"]
-    if any(q.startswith(g) for g in greetings):
+    if any(q.startswith(g) for g in greetings) and not _has_data_terms(q):
         return "GREETING"
     if any(k in q for k in DATA_WORDS):
         return "DATA"
@@ -339,19 +472,23 @@ def classify_question_type(question: str, context: str = "", conversation_histor
     """
     Smarter classifier:
     - If follow-up and previous looks like DATA => DATA
+    - Else the local intent model, if it is confident enough
     - Else use LLM classifier if possible, fallback keywords
     """
     # Hard override: follow-up after data
     if conversation_history and is_followup_question(question) and last_assistant_looks_like_data(conversation_history):
         return "DATA"
 
+    prediction = predict_intent(question)
+    threshold = float(INTENT_CONFIDENCE_THRESHOLD) if INTENT_CONFIDENCE_THRESHOLD else confidence_threshold()
+    if prediction and prediction[1] >= threshold and not (prediction[0] == "GREETING" and _has_data_terms(question)):
+        return prediction[0]
+
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         return _classify_by_keywords(question)
 
     try:
-        client = Groq(api_key=api_key)
-
         context_info = ""
         if context:
             context_info = f"""
@@ -374,7 +511,7 @@ Categories:
 
 Return ONLY ONE WORD: DATA, ADVICE, or GREETING"""
 
-        response = client.chat.completions.create(
+        response = chat_completion(
             model="llama-3.3-70b-versatile",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.0,
@@ -393,8 +530,9 @@ Return ONLY ONE WORD: DATA, ADVICE, or GREETING"""
 # Formatting
 # =========================
 
-def format_results(cols, rows, question: str) -> str:
-    if len(rows) == 1 and len(cols) == 1:
+def format_results(cols, rows, question: str, total: int = None, total_exact: bool = True) -> str:
+    """total: rows the query produced when `rows` was capped by the query governor."""
+    if len(rows) == 1 and len(cols) == 1 and (total or 1) == 1:
         value = rows[0][0]
         col_name = cols[0].lower()
         ql = _safe_lower(question)
@@ -420,7 +558,9 @@ def format_results(cols, rows, question: str) -> str:
         return f"**Result:** {value}"
 
     # Multi-row => markdown table
-    response = f"**Results ({len(rows)} rows):**\n\n"
+    total = len(rows) if total is None else total
+    total_text = f"{total:,}" + ("" if total_exact else "+")
+    response = f"**Results ({total_text} rows):**\n\n"
     response += "| " + " | ".join(cols) + " |\n"
     response += "|" + "|".join(["---"] * len(cols)) + "|\n"
 
@@ -428,8 +568,8 @@ def format_results(cols, rows, question: str) -> str:
     for row in rows[:display_limit]:
         response += "| " + " | ".join(str(v) for v in row) + " |\n"
 
-    if len(rows) > display_limit:
-        response += f"\n*Showing first {display_limit} of {len(rows)} rows*"
+    if total > display_limit:
+        response += f"\n*Showing first {min(display_limit, len(rows))} of {total_text} rows*"
 
     return response
 
@@ -438,95 +578,354 @@ def format_results(cols, rows, question: str) -> str:
 # Main Router
 # =========================
 
-def answer_question(question: str, provider: str = "local", conversation_history: list = None) -> str:
-    print(f"\n{'='*70}")
-    print(f"[Router] Question: {question}")
-    print(f"[Router] Provider: {provider}")
+GREETING_TEXT = (
+    "**Hello! I'm your HR Analytics AI Assistant.**\n\n"
+    "Try asking:\n"
+    "• What's the average salary?\n"
+    "• What about in Sales?\n"
+    "• Attrition rate among overtime employees?\n"
+)
+
+ADVICE_SYSTEM_PROMPT = (
+    "You are a senior HR consultant with 20+ years of experience. "
+    "Provide specific, actionable advice. Be concise and practical."
+)
+
+
+def _provider_chat(provider: str, prompt: str, system_prompt: str = None) -> str:
+    if provider == "groq":
+        return groq_chat(prompt, system_prompt)
+    return falcon_chat(prompt, system_prompt)
+
+
+def _provider_chat_stream(provider: str, prompt: str, system_prompt: str = None):
+    if provider == "groq":
+        return groq_chat_stream(prompt, system_prompt)
+    return falcon_chat_stream(prompt, system_prompt)
+
+
+def _unexpected_error(e: Exception) -> str:
+    return (
+        f"**Unexpected error:**\n\n{str(e)}\n\n"
+        "**Please try:**\n"
+        "• Rephrasing your question\n"
+        "• Asking a simpler question\n"
+    )
+
+
+def _build_insight_prompt(question: str, rows: list) -> str:
+    return f"""As an HR expert, provide a brief insight (2-3 sentences) about this data.
+
+Question: {question}
+Result (sample): {rows[:3]}
+
+Professional insight:"""
+
+
+@dataclass
+class SqlPlan:
+    sql: str
+    params: tuple = ()
+    error: str = ""
+    explanation: str | None = None  # None -> still needs the LLM explanation
+    schema: str = ""
+    source: str = "llm"  # "template" | "cache" | "llm"
+    cacheable: bool = True  # False for follow-ups: their SQL depends on the conversation
+
 
-    context = build_context(conversation_history)
+# Speculative work runs here rather than on the loop's default executor:
+# asyncio.run() joins the default executor on exit, so a discarded SQL
+# generation would otherwise hold up the ADVICE/GREETING answer.
+_speculation_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="hr-speculative")
 
-    # If follow-up, rewrite question using previous DATA question
-    if conversation_history and is_followup_question(question):
+
+def _in_background(fn, *args) -> asyncio.Future:
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(_speculation_pool, contextvars.copy_context().run, fn, *args)
+
+
+def _should_speculate(question: str) -> bool:
+    """Keyword-DATA questions, unless the local intent model leans elsewhere."""
+    if _classify_by_keywords(question) != "DATA":
+        return False
+    prediction = predict_intent(question)
+    return prediction is None or prediction[0] == "DATA"
+
+
+async def _speculative_sql(schema_task: asyncio.Future, question: str, context: str,
+                          use_cache: bool = True, cancel: threading.Event = None) -> SqlPlan:
+    schema = await schema_task
+    if use_cache:
+        with span("sql_cache_lookup"):
+            cached = await _in_background(lookup_sql, question, schema)
+        if cached:
+            count("hr_cache_hits_total", cache="sql")
+            event("SQL cache hit")
+            return SqlPlan(sql=cached[0], explanation=cached[1], schema=schema, source="cache")
+        count("hr_cache_misses_total", cache="sql")
+    with span("sql_generation"):
+        sql, error = await _in_background(generate_validated_sql, question, schema, context, 2, None, cancel)
+    return SqlPlan(sql=sql, error=error, schema=schema, cacheable=use_cache)
+
+
+def _discard(task: asyncio.Future | None, cancel: threading.Event = None) -> None:
+    """
+    Cancel a speculative task and swallow whatever it ends with. A worker
+    thread already running finishes its current LLM call, then sees `cancel`
+    and stops (no further attempts, retries or backoff sleeps).
+    """
+    if cancel is not None:
+        cancel.set()
+    if task is None:
+        return
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+@dataclass
+class PreparedAnswer:
+    """Everything up to the final LLM call; prompt is None when text is the whole answer."""
+    text: str
+    prompt: str | None = None
+    system_prompt: str | None = None
+    prefix: str = ""  # goes between text and the LLM completion
+    question: str = ""
+    plan: SqlPlan | None = None
+    digest: str = ""  # what the next turns' context keeps of this one
+
+
+async def _prepare_answer(question: str, provider: str, conversation_history: list,
+                          session_id: str = None) -> PreparedAnswer:
+    """
+    Concurrent answer pipeline up to (not including) the insight/advice call.
+
+    Independent stages overlap instead of running back to back:
+    - schema loading and (for keyword-DATA questions) SQL generation start
+      while the classifier call is still in flight
+    Common KPI shapes skip classification and SQL generation entirely
+    through the template fast path (src/chat/sql_templates.py).
+    """
+    if LOG_CONSOLE:
+        print(f"\n{'='*70}")
+    event(f"Question: {question}")
+    event(f"Provider: {provider}")
+
+    context = build_context(conversation_history, question, resolve_sql_provider())
+
+    # If follow-up, rewrite question using previous DATA question. Its SQL
+    # still depends on the conversation (context below), so it stays out of the SQL cache.
+    followup = bool(conversation_history) and is_followup_question(question)
+    if followup:
         prev_q = last_user_data_question(conversation_history)
         if prev_q:
-            rewritten = rewrite_followup_to_full_question(question, prev_q)
+            with span("followup_rewrite"):
+                rewritten = rewrite_followup_to_full_question(question, prev_q)
             if rewritten != question:
-                print(f"[Router] Follow-up detected. Rewritten question:\n  {rewritten}")
+                event(f"Follow-up detected. Rewritten question:\n  {rewritten}")
                 question = rewritten
 
-    q_type = classify_question_type(question, context, conversation_history)
-    print(f"[Router] Type: {q_type}")
+    schema_task = None
+    sql_task = None
+    cancel = threading.Event()  # stops a discarded speculative SQL generation
+    with span("template_match"):
+        template = match_template(question)
+    if template:
+        count("hr_cache_hits_total", cache="template_cube" if template.from_cube else "template")
+        event(f"Template match: {template.shape}" + (" (summary cube)" if template.from_cube else ""))
+        q_type = "DATA"
+    else:
+        schema_task = _in_background(get_schema_text)
+        if _should_speculate(question):
+            # Speculate: most keyword-DATA questions are classified DATA too
+            sql_task = asyncio.create_task(_speculative_sql(schema_task, question, context, not followup, cancel))
+
+        with span("classification"):
+            try:
+                q_type = await asyncio.to_thread(classify_question_type, question, context, conversation_history)
+            except BaseException:  # turn abandoned or classifier crashed: stop the speculation too
+                _discard(sql_task, cancel)
+                raise
+    event(f"Type: {q_type}")
+    count("hr_turns_total", type=q_type)
+
+    if q_type != "DATA":
+        _discard(sql_task, cancel)
+        _discard(schema_task)
 
     # GREETING
     if q_type == "GREETING":
-        return (
-            "**Hello! I'm your HR Analytics AI Assistant.**\n\n"
-            "Try asking:\n"
-            "• What's the average salary?\n"
-            "• What about in Sales?\n"
-            "• Attrition rate among overtime employees?\n"
-        )
+        return PreparedAnswer(text=GREETING_TEXT)
 
     # DATA
     if q_type == "DATA":
         try:
-            schema = get_schema_text()
-            print("[Router] Generating validated SQL...")
-            sql, explanation = generate_sql_with_validation(question, schema, context)
+            if template:
+                plan = SqlPlan(sql=template.sql, params=template.params,
+                               explanation=template.explanation, source="template")
+            else:
+                event("Generating validated SQL...")
+                if sql_task is None:
+                    sql_task = asyncio.create_task(_speculative_sql(schema_task, question, context, not followup))
+                plan = await sql_task
+            sql = plan.sql
 
-            print(f"[Router] SQL: {sql}")
-            print(f"[Router] Explanation: {explanation}")
+            event(f"SQL: {sql}", source=plan.source)
 
             if sql.startswith("--"):
-                return (
+                return PreparedAnswer(text=(
                     f"**I couldn't generate a valid SQL query.**\n\n"
-                    f"**Issue:** {explanation}\n\n"
+                    f"**Issue:** {plan.error}\n\n"
                     "**Try:**\n"
                     "• Use simpler phrasing\n"
                     "• Mention the metric (average/count/rate)\n"
                     "• Ask about one thing at a time\n"
-                )
+                ))
 
-            cols, rows, error = execute_with_fallback(sql)
+            with span("sql_execution"):
+                result, error = await asyncio.to_thread(execute_with_fallback, sql, plan.params, session_id)
             if error:
-                return (
+                return PreparedAnswer(text=(
                     f"**Query execution failed:**\n\n{error}\n\n"
                     "**Suggestions:**\n"
                     "• Rephrase your question\n"
                     "• Use exact column names\n"
                     "• Try a simpler question first\n"
-                )
+                ))
 
-            if not rows:
-                return "**No results found.**\n\nThe query ran successfully but returned no data."
-
-            result_text = format_results(cols, rows, question)
+            if not result.rows:
+                return PreparedAnswer(text="**No results found.**\n\nThe query ran successfully but returned no data.")
 
             # Insight (LLM) - interpretation only
-            insight_prompt = f"""As an HR expert, provide a brief insight (2-3 sentences) about this data.
+            with span("formatting"):
+                text = format_results(result.cols, result.rows, question, result.total, result.total_exact)
+            return PreparedAnswer(
+                text=text,
+                prompt=_build_insight_prompt(question, result.rows),
+                prefix="\n\n**HR Insight:**\n\n",
+                question=question,
+                plan=plan,
+                digest=turn_digest(question, template.base_sql if template else sql,
+                                   result.cols, result.rows, result.total),
+            )
 
-Question: {question}
-Result (sample): {rows[:3]}
+        except Exception as e:
+            return PreparedAnswer(text=_unexpected_error(e))
 
-Professional insight:"""
+    # ADVICE
+    return PreparedAnswer(text="", prompt=question, system_prompt=ADVICE_SYSTEM_PROMPT, question=question)
 
-            insight = groq_chat(insight_prompt) if provider == "groq" else falcon_chat(insight_prompt)
-            return result_text + "\n\n**HR Insight:**\n\n" + insight
 
-        except Exception as e:
-            return (
-                f"**Unexpected error:**\n\n{str(e)}\n\n"
-                "**Please try:**\n"
-                "• Rephrasing your question\n"
-                "• Asking a simpler question\n"
+@dataclass
+class TurnDigest:
+    """Last item of answer_question_stream: what ChatMemory.add(..., digest=...) keeps of the turn."""
+    text: str
+
+
+def _digest_of(prepared: PreparedAnswer, question: str) -> str:
+    return prepared.digest or turn_digest(prepared.question or question)
+
+
+def _explain_and_cache(prepared: PreparedAnswer) -> None:
+    """Explanation for freshly generated SQL; cached together with the SQL."""
+    plan = prepared.plan
+    if plan is None:
+        return
+    explanation = plan.explanation
+    if explanation is None:
+        with span("explanation"):
+            explanation = explain_sql(plan.sql, prepared.question)
+            if plan.cacheable:
+                store_sql(prepared.question, plan.schema, plan.sql, explanation)
+    event(f"Explanation: {explanation}")
+
+
+async def answer_with_digest_async(question: str, provider: str = "local", conversation_history: list = None,
+                                   session_id: str = None) -> tuple[str, str]:
+    """
+    Concurrent version of the answer pipeline; returns (answer, digest of the turn).
+
+    On top of the overlap in _prepare_answer, the SQL explanation and the HR
+    insight both only need the validated SQL and its rows, so they run at
+    the same time.
+    """
+    with profiled_turn(question), span("turn", provider=provider, question=question):
+        prepared = await _prepare_answer(question, provider, conversation_history, session_id)
+        digest = _digest_of(prepared, question)
+        if prepared.prompt is None:
+            return prepared.text, digest
+
+        try:
+            _, completion = await asyncio.gather(
+                asyncio.to_thread(_explain_and_cache, prepared),
+                asyncio.to_thread(_insight, provider, prepared),
             )
+        except Exception as e:
+            if prepared.plan is None:
+                raise
+            return _unexpected_error(e), digest
+        return prepared.text + prepared.prefix + completion, digest
 
-    # ADVICE
-    system_prompt = (
-        "You are a senior HR consultant with 20+ years of experience. "
-        "Provide specific, actionable advice. Be concise and practical."
-    )
 
-    if provider == "groq":
-        return groq_chat(question, system_prompt)
-    return falcon_chat(question, system_prompt)
+async def answer_question_async(question: str, provider: str = "local", conversation_history: list = None,
+                                session_id: str = None) -> str:
+    """answer_with_digest_async without the digest."""
+    answer, _ = await answer_with_digest_async(question, provider, conversation_history, session_id)
+    return answer
+
+
+def _insight(provider: str, prepared: PreparedAnswer) -> str:
+    with span("insight" if prepared.plan else "advice", provider=provider):
+        return _provider_chat(provider, prepared.prompt, prepared.system_prompt)
+
+
+def _run_sync(coro):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Already inside an event loop (e.g. a notebook): run on a helper thread
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(contextvars.copy_context().run, asyncio.run, coro).result()
+
+
+def answer_question(question: str, provider: str = "local", conversation_history: list = None,
+                    session_id: str = None) -> str:
+    """Synchronous wrapper around answer_question_async."""
+    return _run_sync(answer_question_async(question, provider, conversation_history, session_id))
+
+
+def answer_with_digest(question: str, provider: str = "local", conversation_history: list = None,
+                       session_id: str = None) -> tuple[str, str]:
+    """Synchronous wrapper around answer_with_digest_async: (answer, digest for ChatMemory)."""
+    return _run_sync(answer_with_digest_async(question, provider, conversation_history, session_id))
+
+
+def answer_question_stream(question: str, provider: str = "local", conversation_history: list = None,
+                           session_id: str = None):
+    """
+    Streaming variant: yields the formatted SQL result first, then the
+    insight/advice tokens as the provider produces them, and last a
+    TurnDigest (keep it out of st.write_stream, store it with the answer).
+    """
+    with profiled_turn(question), span("turn", provider=provider, question=question, stream=True):
+        prepared = _run_sync(_prepare_answer(question, provider, conversation_history, session_id))
+        digest = TurnDigest(_digest_of(prepared, question))
+        if prepared.text:
+            yield prepared.text
+        if prepared.prompt is None:
+            yield digest
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            explanation = pool.submit(contextvars.copy_context().run, _explain_and_cache, prepared)
+            if prepared.prefix:
+                yield prepared.prefix
+            try:
+                with span("insight" if prepared.plan else "advice", provider=provider):
+                    yield from _provider_chat_stream(provider, prepared.prompt, prepared.system_prompt)
+            except Exception as e:
+                if prepared.plan is None:
+                    raise
+                yield f"\n\n{_unexpected_error(e)}"
+            explanation.result()
+        yield digest
@@ -0,0 +1,160 @@
+"""
+Schema catalog
+Column types and statistics for the employees table, built once and rebuilt
+only when the database version changes. Prompt builders, templates and
+validators read from it instead of querying SQLite on the request path.
+
+The statistics come from the column_stats table the ingest step writes
+(src/ingest/load_to_sqlite.py), so building the catalog is a few small
+reads. Databases loaded before column_stats existed fall back to one full
+scan of the table - re-run the ingest to avoid it.
+"""
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+
+from src.chat.db_pool import DB_PATH, META_TABLE, db_version_token, read_connection
+from src.chat.telemetry import event
+
+TABLE_NAME = "employees"
+STATS_TABLE = "column_stats"
+MAX_CATEGORY_VALUES = 15  # columns with <= this many distinct values keep their value list
+SAMPLE_ROWS = 3
+
+NUMERIC_TYPES = ("INT", "REAL", "FLOA", "DOUB", "NUM", "DEC")
+
+
+@dataclass
+class ColumnStats:
+    name: str
+    type: str
+    null_count: int = 0
+    min: object = None
+    max: object = None
+    distinct_count: int = 0
+    values: list | None = None  # only for low-cardinality columns
+
+    @property
+    def is_numeric(self) -> bool:
+        return any(t in self.type.upper() for t in NUMERIC_TYPES)
+
+    @property
+    def is_categorical(self) -> bool:
+        # Constant columns (EmployeeCount, StandardHours) are not useful categories
+        return self.values is not None and (not self.is_numeric or self.distinct_count > 1)
+
+
+@dataclass
+class SchemaCatalog:
+    table: str
+    row_count: int
+    columns: dict = field(default_factory=dict)  # name -> ColumnStats, table order
+    sample_cols: list = field(default_factory=list)
+    sample_rows: list = field(default_factory=list)
+    version: tuple = ()
+
+    @property
+    def numeric(self) -> list:
+        return [c.name for c in self.columns.values() if c.is_numeric]
+
+    @property
+    def categorical(self) -> dict:
+        return {c.name: c.values for c in self.columns.values() if c.is_categorical}
+
+    def has_column(self, name: str) -> bool:
+        return name.lower() in {c.lower() for c in self.columns}
+
+    def schema_text(self, columns: list = None) -> str:
+        """Schema for SQL prompts (optionally only the given columns)."""
+        col_lines = []
+        for col in self.columns.values():
+            if columns is not None and col.name not in columns:
+                continue
+            line = f"- {col.name} ({col.type})"
+            if col.values is not None and not col.is_numeric:
+                line += " values: " + ", ".join(f"'{v}'" for v in col.values)
+            col_lines.append(line)
+        return f"Table: {self.table}\nColumns:\n" + "\n".join(col_lines)
+
+    def sample_text(self, limit: int = SAMPLE_ROWS, columns: list = None) -> str:
+        keep = [i for i, c in enumerate(self.sample_cols) if columns is None or c in columns]
+        return "\n".join(
+            f"Sample row {i+1}: " + ", ".join(f"{self.sample_cols[j]}={row[j]}" for j in keep)
+            for i, row in enumerate(self.sample_rows[:limit])
+        )
+
+
+def _stored_stats(conn: sqlite3.Connection, names: list) -> tuple[int, list] | None:
+    """(row count, [(nulls, min, max, distinct, values)]) from column_stats, or None if absent/stale."""
+    try:
+        rows = conn.execute(
+            f'SELECT name, null_count, min, max, distinct_count, "values" FROM {STATS_TABLE} ORDER BY position;'
+        ).fetchall()
+        row_count = conn.execute(f"SELECT value FROM {META_TABLE} WHERE key = 'row_count';").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row_count is None or [r[0] for r in rows] != names:
+        return None
+    return int(row_count[0]), [(n, lo, hi, d, json.loads(v) if v is not None else None) for _, n, lo, hi, d, v in rows]
+
+
+def _scanned_stats(conn: sqlite3.Connection, table: str, names: list) -> tuple[int, list]:
+    """Scan the table once for per-column stats, then list low-cardinality values."""
+    aggregates = ["COUNT(*)"]
+    for name in names:
+        aggregates += [f'COUNT(*) - COUNT("{name}")', f'MIN("{name}")', f'MAX("{name}")', f'COUNT(DISTINCT "{name}")']
+    stats = conn.execute(f"SELECT {', '.join(aggregates)} FROM {table};").fetchone()
+
+    columns = []
+    for i, name in enumerate(names):
+        nulls, lo, hi, distinct = stats[1 + 4 * i: 5 + 4 * i]
+        values = None
+        if distinct <= MAX_CATEGORY_VALUES:
+            values = [r[0] for r in conn.execute(
+                f'SELECT DISTINCT "{name}" FROM {table} WHERE "{name}" IS NOT NULL ORDER BY 1;'
+            )]
+        columns.append((nulls, lo, hi, distinct, values))
+    return stats[0], columns
+
+
+def build_catalog(db_path=DB_PATH, table: str = TABLE_NAME) -> SchemaCatalog:
+    """Column types from PRAGMA table_info, stats from column_stats (or a table scan)."""
+    version = db_version_token(db_path)
+    with read_connection(db_path) as conn:
+        info = conn.execute(f"PRAGMA table_info({table});").fetchall()
+        if not info:
+            raise sqlite3.OperationalError(f"no such table: {table}")
+        names = [row[1] for row in info]
+
+        stored = _stored_stats(conn, names) if table == TABLE_NAME else None
+        if stored is None:
+            event(f"No {STATS_TABLE} for {table}; scanning it (re-run the ingest to skip this)", component="Catalog")
+        row_count, stats = stored or _scanned_stats(conn, table, names)
+
+        catalog = SchemaCatalog(table=table, row_count=row_count, version=version)
+        for (_, name, col_type, *_), (nulls, lo, hi, distinct, values) in zip(info, stats):
+            catalog.columns[name] = ColumnStats(name=name, type=col_type or "", null_count=nulls, min=lo, max=hi,
+                                                distinct_count=distinct, values=values)
+
+        cur = conn.execute(f"SELECT * FROM {table} LIMIT {SAMPLE_ROWS};")
+        catalog.sample_cols = [d[0] for d in cur.description]
+        catalog.sample_rows = cur.fetchall()
+    return catalog
+
+
+_catalog = None
+_lock = threading.Lock()
+
+
+def get_catalog() -> SchemaCatalog:
+    """Cached catalog; rebuilt only when the database version token changes."""
+    global _catalog
+    version = db_version_token()
+    if _catalog is not None and _catalog.version == version:
+        return _catalog
+    with _lock:
+        if _catalog is None or _catalog.version != version:
+            _catalog = build_catalog()
+    return _catalog
@@ -0,0 +1,151 @@
+"""
+Question-aware schema pruning
+Ranks employees columns by relevance to the question (lexical, synonym and
+value-match signals) so SQL prompts only carry the columns likely needed,
+plus a few key columns. Smaller prompts mean less prefill time and lower
+Groq cost; the Falcon path also keeps room for the question in n_ctx=2048.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+
+from src.chat.schema_catalog import SchemaCatalog, get_catalog
+from src.chat.sql_templates import FILTER_ALIASES, GROUP_SYNONYMS, NUMERIC_SYNONYMS, split_identifier
+
+PRUNING_ENABLED = os.getenv("HR_SCHEMA_PRUNING", "1") != "0"
+MAX_COLUMNS = int(os.getenv("HR_SCHEMA_MAX_COLUMNS", "12"))
+
+# Always sent: the attrition flag and the main grouping dimension
+KEY_COLUMNS = ["Attrition", "Department"]
+
+# Extra concept words -> columns (on top of the template synonyms)
+CONCEPT_SYNONYMS = {
+    "satisfaction": ["JobSatisfaction", "EnvironmentSatisfaction", "RelationshipSatisfaction"],
+    "happy": ["JobSatisfaction", "EnvironmentSatisfaction"],
+    "promotion": ["YearsSinceLastPromotion"], "promoted": ["YearsSinceLastPromotion"],
+    "manager": ["YearsWithCurrManager", "JobRole"],
+    "balance": ["WorkLifeBalance"], "stock": ["StockOptionLevel"],
+    "performance": ["PerformanceRating"], "rating": ["PerformanceRating"],
+    "companies": ["NumCompaniesWorked"], "hike": ["PercentSalaryHike"],
+    "senior": ["JobLevel", "TotalWorkingYears"], "years": ["YearsAtCompany", "TotalWorkingYears"],
+    "involvement": ["JobInvolvement"], "hours": ["OverTime"],
+    "married": ["MaritalStatus"], "single": ["MaritalStatus"], "divorced": ["MaritalStatus"],
+    "earn": ["MonthlyIncome"], "paid": ["MonthlyIncome"], "compensation": ["MonthlyIncome"],
+    "old": ["Age"], "young": ["Age"], "id": ["EmployeeNumber"],
+}
+
+WEIGHT_NAME = 3.0      # full column name ("job satisfaction")
+WEIGHT_SYNONYM = 2.5   # synonym / alias ("salary" -> MonthlyIncome)
+WEIGHT_VALUE = 2.5     # a category value is mentioned ("Sales")
+WEIGHT_PART = 1.0      # one word of a multi-word name ("years")
+CONTEXT_FACTOR = 0.5   # previous conversation counts half
+MIN_SCORE = 0.75       # drops lone partial hits ("company" -> YearsAtCompany)
+
+
+@dataclass
+class PruneReport:
+    columns: list
+    total_columns: int
+    full_tokens: int
+    pruned_tokens: int
+
+    @property
+    def saved_pct(self) -> float:
+        return 100.0 * (1 - self.pruned_tokens / self.full_tokens) if self.full_tokens else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.total_columns} -> {len(self.columns)} columns, "
+            f"~{self.full_tokens} -> ~{self.pruned_tokens} schema tokens ({self.saved_pct:.0f}% saved)"
+        )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count (~4 chars/token for English + identifiers)."""
+    return (len(text or "") + 3) // 4
+
+
+def _words(text: str) -> set:
+    words = set(re.findall(r"[a-z0-9&]+", (text or "").lower()))
+    return words | {w[:-1] for w in words if w.endswith("s") and len(w) > 3}
+
+
+def _score_text(text: str, catalog: SchemaCatalog) -> dict:
+    scores = {}
+    words = _words(text)
+    low = " " + re.sub(r"[^a-z0-9&]+", " ", (text or "").lower()) + " "
+    low += " ".join(w for w in words if f" {w} " not in low) + " "
+
+    def add(col, w):
+        if col in catalog.columns:
+            scores[col] = scores.get(col, 0.0) + w
+
+    for name in catalog.columns:
+        split = split_identifier(name)
+        if f" {split} " in low or f" {name.lower()} " in low:
+            add(name, WEIGHT_NAME)
+        else:
+            parts = [p for p in split.split() if len(p) > 2]
+            hits = sum(1 for p in parts if p in words)
+            if hits:
+                add(name, WEIGHT_PART * hits / len(parts))
+
+    for syn, col in {**NUMERIC_SYNONYMS, **GROUP_SYNONYMS}.items():
+        if f" {syn} " in low:
+            add(col, WEIGHT_SYNONYM)
+    for syn, cols in CONCEPT_SYNONYMS.items():
+        if syn in words:
+            for col in cols:
+                add(col, WEIGHT_SYNONYM)
+    for pattern, col, _ in FILTER_ALIASES:
+        if re.search(pattern, low):
+            add(col, WEIGHT_VALUE)
+
+    for name, values in catalog.categorical.items():
+        for v in values:
+            v_low = re.sub(r"[_\-]+", " ", str(v)).lower()
+            if isinstance(v, str) and len(v_low) > 2 and f" {v_low} " in low:
+                add(name, WEIGHT_VALUE)
+    return scores
+
+
+def rank_columns(question: str, catalog: SchemaCatalog = None, context: str = "") -> list[tuple[str, float]]:
+    """Columns scoring at least MIN_SCORE, best first."""
+    catalog = catalog or get_catalog()
+    scores = _score_text(question, catalog)
+    for col, s in _score_text(context, catalog).items():
+        scores[col] = scores.get(col, 0.0) + CONTEXT_FACTOR * s
+    ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+    return [(col, s) for col, s in ranked if s >= MIN_SCORE]
+
+
+def select_columns(question: str, catalog: SchemaCatalog = None, context: str = "",
+                   max_columns: int = MAX_COLUMNS) -> list | None:
+    """
+    Key columns + the most relevant ones, in table order.
+    None means "send the full schema" (pruning off or nothing recognised).
+    """
+    catalog = catalog or get_catalog()
+    if not PRUNING_ENABLED:
+        return None
+    ranked = [col for col, _ in rank_columns(question, catalog, context)]
+    if not ranked:
+        return None
+    keep = set(KEY_COLUMNS) | set(ranked[:max_columns])
+    return [c for c in catalog.columns if c in keep]
+
+
+def pruned_schema(question: str, context: str = "", catalog: SchemaCatalog = None) -> tuple[str, str, PruneReport]:
+    """(schema_text, sample_text, report) for the SQL prompt."""
+    catalog = catalog or get_catalog()
+    columns = select_columns(question, catalog, context)
+    full = catalog.schema_text() + "\n" + catalog.sample_text()
+    schema, sample = catalog.schema_text(columns), catalog.sample_text(columns=columns)
+    report = PruneReport(
+        columns=columns or list(catalog.columns),
+        total_columns=len(catalog.columns),
+        full_tokens=estimate_tokens(full),
+        pruned_tokens=estimate_tokens(schema + "\n" + sample),
+    )
+    return schema, sample, report
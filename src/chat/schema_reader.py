@@ -1,19 +1,6 @@
-import sqlite3
-from pathlib import Path
+from src.chat.schema_catalog import get_catalog
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DB_PATH = PROJECT_ROOT / "db" / "hr.sqlite"
-TABLE_NAME = "employees"
 
 def get_schema_text() -> str:
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute(f"PRAGMA table_info({TABLE_NAME});")
-        cols = cur.fetchall()
-
-    col_lines = []
-    for _, name, col_type, *_ in cols:
-        col_lines.append(f"- {name} ({col_type})")
-
-    schema = f"Table: {TABLE_NAME}\nColumns:\n" + "\n".join(col_lines)
-    return schema
+    """Schema text for SQL prompts, served from the cached schema catalog."""
+    return get_catalog().schema_text()
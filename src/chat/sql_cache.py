@@ -0,0 +1,154 @@
+"""
+Question -> SQL cache
+Maps a normalized question to its validated SQL + explanation so repeated
+questions skip SQL generation entirely.
+
+Entries live in a small SQLite side database (not hr.sqlite), are keyed on a
+fingerprint of get_schema_text() so a schema change invalidates them, and are
+evicted by TTL and least-recent use.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+CACHE_PATH = Path(os.getenv("HR_SQL_CACHE_PATH", PROJECT_ROOT / "db" / "query_cache.sqlite"))
+MAX_ENTRIES = int(os.getenv("HR_SQL_CACHE_MAX_ENTRIES", "500"))
+TTL_SECONDS = float(os.getenv("HR_SQL_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Multi-word phrases are rewritten before punctuation is stripped
+PHRASES = {
+    "r&d": "research development",
+    "research and development": "research development",
+    "research & development": "research development",
+    "human resources": "hr",
+    "over time": "overtime",
+    "left the company": "attrition",
+    "quit": "attrition",
+}
+
+SYNONYMS = {
+    "turnover": "attrition", "churn": "attrition", "attrited": "attrition",
+    "leavers": "attrition", "left": "attrition", "leaving": "attrition",
+    "salary": "income", "salaries": "income", "pay": "income", "wage": "income", "wages": "income",
+    "earnings": "income", "monthlyincome": "income",
+    "avg": "average", "mean": "average",
+    "percentage": "rate", "percent": "rate", "pct": "rate", "ratio": "rate",
+    "staff": "employees", "workers": "employees", "people": "employees", "headcount": "employees",
+    "employee": "employees",
+    "dept": "department", "departments": "department",
+    "ot": "overtime",
+}
+
+STOPWORDS = {
+    "a", "an", "the", "what", "whats", "is", "are", "was", "were", "please",
+    "show", "me", "tell", "give", "can", "you", "could", "i", "know", "want", "to",
+}
+
+
+def normalize_question(question: str) -> str:
+    """Case/whitespace/punctuation/synonym-insensitive form of a question."""
+    q = (question or "").lower()
+    for phrase, repl in PHRASES.items():
+        q = re.sub(rf"\b{re.escape(phrase)}\b", repl, q)
+    q = q.replace("'", "")
+    q = re.sub(r"[^a-z0-9]+", " ", q)
+    words = [SYNONYMS.get(w, w) for w in q.split()]
+    return " ".join(w for w in words if w not in STOPWORDS)
+
+
+def schema_fingerprint(schema: str) -> str:
+    return hashlib.sha256((schema or "").encode("utf-8")).hexdigest()[:16]
+
+
+@contextmanager
+def _connect():
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(CACHE_PATH, timeout=5)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS question_sql_cache (
+                schema_fp TEXT NOT NULL,
+                question_key TEXT NOT NULL,
+                question TEXT,
+                sql TEXT NOT NULL,
+                explanation TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (schema_fp, question_key)
+            );
+            """
+        )
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def lookup_sql(question: str, schema: str) -> tuple[str, str] | None:
+    """Return cached (sql, explanation) for the question, or None."""
+    key = normalize_question(question)
+    if not key:
+        return None
+    try:
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT sql, explanation FROM question_sql_cache "
+                "WHERE schema_fp = ? AND question_key = ? AND created_at >= ?;",
+                (schema_fingerprint(schema), key, time.time() - TTL_SECONDS),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE question_sql_cache SET last_used = ?, hits = hits + 1 "
+                "WHERE schema_fp = ? AND question_key = ?;",
+                (time.time(), schema_fingerprint(schema), key),
+            )
+        return row[0], row[1] or ""
+    except sqlite3.Error:
+        return None
+
+
+def store_sql(question: str, schema: str, sql: str, explanation: str = "") -> None:
+    """Cache a validated query, then evict stale / least-recently-used entries."""
+    key = normalize_question(question)
+    if not key or sql.startswith("--"):
+        return
+    fp = schema_fingerprint(schema)
+    now = time.time()
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO question_sql_cache "
+                "(schema_fp, question_key, question, sql, explanation, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0);",
+                (fp, key, question, sql, explanation, now, now),
+            )
+            # Other fingerprints belong to an older schema
+            conn.execute(
+                "DELETE FROM question_sql_cache WHERE schema_fp != ? OR created_at < ?;",
+                (fp, now - TTL_SECONDS),
+            )
+            conn.execute(
+                "DELETE FROM question_sql_cache WHERE rowid NOT IN ("
+                "SELECT rowid FROM question_sql_cache ORDER BY last_used DESC LIMIT ?);",
+                (MAX_ENTRIES,),
+            )
+    except sqlite3.Error:
+        pass
+
+
+def clear_cache() -> None:
+    try:
+        with _connect() as conn:
+            conn.execute("DELETE FROM question_sql_cache;")
+    except sqlite3.Error:
+        pass
@@ -0,0 +1,193 @@
+"""
+Deterministic SQL repair
+Fixes the usual LLM slips without another model call:
+- unknown columns / table -> closest schema name (synonyms, then fuzzy match)
+- categorical literals -> the real stored value ('yes' -> 'Yes', 'R&D' -> 'Research & Development')
+- missing closing parentheses / semicolon
+Each column/table fix is driven by the error SQLite reports when preparing
+the statement (src/chat/sql_validator.py), so only real problems are touched.
+Literals are only respelled (case, spacing, an alias of the same column),
+never swapped for a merely similar value, and only once the SQL has failed
+validation or come back empty (the router calls normalize_literals then).
+"""
+
+import difflib
+import re
+from dataclasses import dataclass, field
+
+from src.chat.schema_catalog import SchemaCatalog, get_catalog
+from src.chat.sql_templates import FILTER_ALIASES, GROUP_SYNONYMS, NUMERIC_SYNONYMS, split_identifier
+from src.chat.sql_validator import check_sql
+
+MAX_PASSES = 4
+IDENT_CUTOFF = 0.75
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+# column <op> 'literal'  /  column IN ('a', 'b', 'literal'
+LITERAL_CONTEXT_RE = re.compile(
+    r"\"?(\w+)\"?\s*(?:=|==|!=|<>|\bIN\s*\((?:\s*'(?:[^']|'')*'\s*,)*)\s*$", re.IGNORECASE
+)
+
+
+@dataclass
+class RepairResult:
+    sql: str
+    changes: list = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.changes)
+
+
+def _squash(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def _outside_strings(sql: str, fn) -> str:
+    """Apply fn to every part of sql that is not a string literal."""
+    out, pos = [], 0
+    for m in STRING_RE.finditer(sql):
+        out.append(fn(sql[pos:m.start()]))
+        out.append(m.group(0))
+        pos = m.end()
+    out.append(fn(sql[pos:]))
+    return "".join(out)
+
+
+def closest_column(name: str, catalog: SchemaCatalog) -> str | None:
+    columns = list(catalog.columns)
+    squashed = {_squash(c): c for c in columns}
+    if _squash(name) in squashed:
+        return squashed[_squash(name)]
+    words = split_identifier(name)
+    for syn, col in sorted({**NUMERIC_SYNONYMS, **GROUP_SYNONYMS}.items(), key=lambda kv: -len(kv[0])):
+        if col in catalog.columns and (words == syn or _squash(syn) == _squash(name)):
+            return col
+    match = difflib.get_close_matches(_squash(name), list(squashed), n=1, cutoff=IDENT_CUTOFF)
+    return squashed[match[0]] if match else None
+
+
+def _replace_identifier(sql: str, old: str, new: str) -> str:
+    """Rename old -> new outside string literals, leaving `AS old` aliases alone."""
+    pattern = re.compile(rf'(\bAS\s+)?(?<!\w)"?{re.escape(old)}"?(?!\w)', re.IGNORECASE)
+    return _outside_strings(sql, lambda part: pattern.sub(lambda m: m.group(0) if m.group(1) else new, part))
+
+
+def closest_value(literal: str, column: str, values: list) -> str | None:
+    """The stored value of column that literal respells (case, spacing/punctuation or a same-column alias)."""
+    strings = [v for v in values if isinstance(v, str)]
+    if literal in strings:
+        return literal
+    squashed = {_squash(v): v for v in strings}
+    if _squash(literal) and _squash(literal) in squashed:
+        return squashed[_squash(literal)]
+    for pattern, col, value in FILTER_ALIASES:
+        if col == column and value in strings and re.fullmatch(pattern, literal.strip().lower()):
+            return value
+    return None
+
+
+def normalize_literals(sql: str, catalog: SchemaCatalog = None) -> RepairResult:
+    """Map string literals compared to categorical columns onto the stored values."""
+    catalog = catalog or get_catalog()
+    categorical = {c.lower(): (c, vals) for c, vals in catalog.categorical.items()}
+    # A literal that is a real value (of any column) was meant as written
+    stored = {v for vals in catalog.categorical.values() for v in vals if isinstance(v, str)}
+    changes, out, pos = [], [], 0
+    for m in STRING_RE.finditer(sql):
+        literal = m.group(0)[1:-1].replace("''", "'")
+        ctx = LITERAL_CONTEXT_RE.search(sql[:m.start()])
+        replacement = None
+        if ctx and ctx.group(1).lower() in categorical and "%" not in literal and literal not in stored:
+            col, values = categorical[ctx.group(1).lower()]
+            value = closest_value(literal, col, values)
+            if value is not None and value != literal:
+                replacement = value
+                changes.append(f"{col}: '{literal}' -> '{value}'")
+        out.append(sql[pos:m.start()])
+        out.append("'" + replacement.replace("'", "''") + "'" if replacement else m.group(0))
+        pos = m.end()
+    out.append(sql[pos:])
+    return RepairResult("".join(out), changes)
+
+
+CLAUSE_RE = re.compile(r"\(|\)|\b(?:FROM|WHERE|GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT)\b", re.IGNORECASE)
+
+
+def balance_sql(sql: str) -> RepairResult:
+    """
+    Close unbalanced parentheses and terminate with a single semicolon.
+    A function-call paren still open when a clause keyword starts is closed
+    right before that keyword ("ROUND(AVG(x), 2 FROM" -> "ROUND(AVG(x), 2) FROM").
+    """
+    changes = []
+    body = sql.strip().rstrip(";").rstrip()
+    while body.endswith(","):
+        body = body[:-1].rstrip()
+        changes.append("dropped trailing comma")
+
+    # Same length as body, with string contents blanked out
+    code = STRING_RE.sub(lambda m: "'" + " " * (len(m.group(0)) - 2) + "'", body)
+    out, pos, stack, added = [], 0, [], 0
+    for m in CLAUSE_RE.finditer(code):
+        token = m.group(0)
+        if token == "(":
+            stack.append(bool(re.match(r"\(\s*SELECT\b", code[m.start():], re.IGNORECASE)))
+        elif token == ")":
+            if stack:
+                stack.pop()
+        else:
+            # Close call parens (not subqueries) left open before a clause
+            closing = 0
+            while stack and not stack[-1]:
+                stack.pop()
+                closing += 1
+            if closing:
+                out.append(body[pos:m.start()].rstrip() + ")" * closing + " ")
+                pos = m.start()
+                added += closing
+    out.append(body[pos:])
+    body = "".join(out) + ")" * len(stack)
+    added += len(stack)
+    if added:
+        changes.append(f"added {added} closing parenthes{'is' if added == 1 else 'es'}")
+    if not sql.strip().endswith(";"):
+        changes.append("added semicolon")
+    return RepairResult(body + ";", changes)
+
+
+def repair_sql(sql: str, catalog: SchemaCatalog = None, params: tuple = ()) -> RepairResult:
+    """
+    Best-effort local fix-up. Returns the (possibly unchanged) SQL and a list
+    of human-readable changes; never raises for bad SQL.
+    """
+    catalog = catalog or get_catalog()
+    result = balance_sql(sql or "")
+    changes = list(result.changes)
+    sql = result.sql
+
+    failed = False
+    for _ in range(MAX_PASSES):
+        check = check_sql(sql, params, table=catalog.table)
+        if check.ok:
+            break
+        failed = True
+        if check.kind == "column":
+            bad = check.message.split(":", 1)[1].strip()
+            col = closest_column(bad, catalog)
+            if not col or col.lower() == bad.lower():
+                break
+            sql = _replace_identifier(sql, bad, col)
+            changes.append(f"column {bad} -> {col}")
+        elif check.kind == "table" and check.message.startswith("no such table"):
+            bad = check.message.split(":", 1)[1].strip()
+            sql = _replace_identifier(sql, bad, catalog.table)
+            changes.append(f"table {bad} -> {catalog.table}")
+        else:
+            break
+
+    if not failed:
+        # Valid SQL keeps its literals unless its result comes back empty
+        return RepairResult(sql, changes)
+    literals = normalize_literals(sql, catalog)
+    return RepairResult(literals.sql, changes + literals.changes)
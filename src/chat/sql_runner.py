@@ -1,17 +1,152 @@
+import os
 import sqlite3
-from pathlib import Path
+import threading
+import time
+from dataclasses import dataclass
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DB_PATH = PROJECT_ROOT / "db" / "hr.sqlite"
+from src.chat.db_pool import DB_PATH, cache_version, data_version, db_version_token, read_connection  # noqa: F401 (re-exported)
+from src.chat.result_cache import estimate_bytes, result_cache
+from src.chat.telemetry import count, span
 
-def run_sql(query: str):
+# Query governor: generated SQL can be arbitrarily expensive
+QUERY_TIMEOUT = float(os.getenv("HR_QUERY_TIMEOUT", "5"))  # seconds
+MAX_ROWS = int(os.getenv("HR_QUERY_MAX_ROWS", "1000"))  # rows kept in memory
+MAX_BYTES = int(float(os.getenv("HR_QUERY_MAX_MB", "8")) * 1024 * 1024)
+FETCH_SIZE = 256
+PROGRESS_OPS = 1000  # SQLite VM instructions between deadline/cancel checks
+
+
+class QueryTimeout(sqlite3.OperationalError):
+    pass
+
+
+class QueryCancelled(sqlite3.OperationalError):
+    pass
+
+
+@dataclass
+class QueryResult:
+    cols: list
+    rows: list
+    total: int  # rows the query produced (>= len(rows))
+    total_exact: bool = True  # False if the deadline hit while counting past the cap
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.rows)
+
+
+# session id -> cancel event of its running query
+_active = {}
+_active_lock = threading.Lock()
+
+
+def cancel_session_queries(session_id: str) -> bool:
+    """Stop the query a session is running (e.g. the user sent a new message)."""
+    with _active_lock:
+        event = _active.pop(session_id, None)
+    if event is None:
+        return False
+    event.set()
+    return True
+
+
+def _register(session_id: str | None) -> threading.Event:
+    event = threading.Event()
+    if session_id is not None:
+        cancel_session_queries(session_id)
+        with _active_lock:
+            _active[session_id] = event
+    return event
+
+
+def _unregister(session_id: str | None, event: threading.Event) -> None:
+    if session_id is not None:
+        with _active_lock:
+            if _active.get(session_id) is event:
+                del _active[session_id]
+
+
+def _fetch_governed(conn, query: str, params: tuple, timeout: float, cancel: threading.Event,
+                    max_rows: int, max_bytes: int) -> QueryResult:
+    deadline = time.monotonic() + timeout
+
+    def progress():
+        return 1 if cancel.is_set() or time.monotonic() > deadline else 0
+
+    conn.set_progress_handler(progress, PROGRESS_OPS)
+    rows, size, total, exact = [], 0, 0, True
+    try:
+        cur = conn.execute(query, params)
+        cols = [desc[0] for desc in cur.description]
+        while True:
+            try:
+                batch = cur.fetchmany(FETCH_SIZE)
+            except sqlite3.OperationalError:
+                if len(rows) >= max_rows and not cancel.is_set() and time.monotonic() > deadline:
+                    # Deadline hit while only counting past the cap: keep what we have
+                    exact = False
+                    break
+                raise
+            if not batch:
+                break
+            total += len(batch)
+            room = max_rows - len(rows)
+            if room > 0 and size < max_bytes:
+                kept = batch[:room]
+                rows.extend(kept)
+                size += estimate_bytes([], kept)
+                if size >= max_bytes:
+                    max_rows = len(rows)  # byte cap reached: stop keeping rows
+    except sqlite3.OperationalError as e:
+        if cancel.is_set():
+            raise QueryCancelled("query cancelled") from e
+        if time.monotonic() > deadline:
+            raise QueryTimeout(f"query exceeded {timeout:g}s and was stopped") from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+    return QueryResult(cols=cols, rows=rows, total=total, total_exact=exact)
+
+
+def run_query(query: str, params: tuple = (), use_cache: bool = True, session_id: str = None,
+              timeout: float = None, max_rows: int = None, max_bytes: int = None) -> QueryResult:
+    """
+    Governed SELECT: aborts after `timeout` seconds or when the session's query
+    is cancelled, keeps at most max_rows / max_bytes of rows while still
+    counting the full result.
+    """
     q = query.strip().lower()
     if not q.startswith("select"):
         raise ValueError("Only SELECT statements are allowed.")
 
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute(query)
-        rows = cur.fetchall()
-        cols = [desc[0] for desc in cur.description]
-    return cols, rows
+    version = cache_version()
+    if use_cache:
+        cached = result_cache.get(query, version, params)
+        if cached is not None:
+            count("hr_cache_hits_total", cache="result")
+            cols, rows, total = cached
+            return QueryResult(cols=list(cols), rows=list(rows), total=total)
+        count("hr_cache_misses_total", cache="result")
+
+    cancel = _register(session_id)
+    try:
+        with span("sql_query") as s, read_connection() as conn:
+            result = _fetch_governed(
+                conn, query, params, QUERY_TIMEOUT if timeout is None else timeout, cancel,
+                MAX_ROWS if max_rows is None else max_rows,
+                MAX_BYTES if max_bytes is None else max_bytes,
+            )
+            s.set(rows=result.total, truncated=result.truncated)
+    finally:
+        _unregister(session_id, cancel)
+
+    if use_cache and result.total_exact:
+        result_cache.put(query, version, result.cols, result.rows, params, total=result.total)
+    return result
+
+
+def run_sql(query: str, params: tuple = (), use_cache: bool = True, session_id: str = None):
+    """(cols, rows) of a governed query; rows are capped at MAX_ROWS."""
+    result = run_query(query, params, use_cache, session_id)
+    return result.cols, result.rows
@@ -0,0 +1,326 @@
+"""
+Template Text-to-SQL fast path
+Recognizes the common HR KPI shapes and emits parameterized SQL directly,
+with no network or model call:
+
+- attrition rate (Attrition = 'Yes'), optionally filtered / grouped
+- AVG / MIN / MAX of a numeric column, optionally filtered / grouped
+- employee counts, optionally filtered / grouped
+
+Column names and values are resolved against the schema catalog.
+match_template() returns None for anything outside these shapes - negations,
+comparisons, or any word left over once the metric, filters and grouping are
+read - and the router then falls back to generate_sql_with_validation.
+When the filter + group columns are a materialized grouping set, the SQL
+reads the pre-aggregated attrition_cube instead (src/chat/summary_cube.py).
+"""
+
+import re
+import sqlite3
+from dataclasses import dataclass
+
+from src.chat.schema_catalog import get_catalog
+from src.chat.summary_cube import cube_sql
+from src.chat.telemetry import event
+
+# Wording the templates cannot express -> leave it to the LLM
+UNSUPPORTED = re.compile(
+    r"\b(above|below|more than|less than|greater|fewer|at least|at most|between|"
+    r"over \d|under \d|top \d|bottom \d|median|percentile|list|names?|who are|"
+    r"compare|comparison|vs|versus|trend|correlat\w*|difference|relationship|"
+    r"or|distribution|each employee|sum|total income|total salary|"
+    # negations and comparisons: a filter would silently flip or be dropped
+    r"not|no|non|nor|excluding|exclude[sd]?|except|outside|other than|never|without|\w+n't|"
+    r"older|younger|under|over|aged|since|within)\b"
+)
+
+ATTRITION_WORDS = re.compile(r"\b(attrition|turnover|churn|left|leav\w*|quit\w*|resign\w*|leavers)\b")
+RATE_WORDS = re.compile(r"\b(rate|percent|percentage|proportion|share)\b|%")
+COUNT_WORDS = re.compile(r"\b(how many|count|number of|headcount|num of)\b")
+AGG_WORDS = {
+    "AVG": re.compile(r"\b(average|avg|mean|typical)\b"),
+    "MAX": re.compile(r"\b(max|maximum|highest|largest|most)\b"),
+    "MIN": re.compile(r"\b(min|minimum|lowest|smallest|least)\b"),
+}
+GROUP_RE = re.compile(r"\b(?:by|per|for each|for every|across|in each|broken down by|split by)\s+([a-z0-9 ]+)")
+WHICH_RE = re.compile(r"\bwhich\s+([a-z0-9 ]+?)\s+(?:has|have|had|is|are|shows?)\b")
+
+NUMERIC_SYNONYMS = {
+    "salary": "MonthlyIncome", "salaries": "MonthlyIncome", "income": "MonthlyIncome",
+    "pay": "MonthlyIncome", "earnings": "MonthlyIncome", "wage": "MonthlyIncome",
+    "age": "Age", "tenure": "YearsAtCompany", "experience": "TotalWorkingYears",
+    "distance": "DistanceFromHome", "commute": "DistanceFromHome",
+    "salary hike": "PercentSalaryHike", "raise": "PercentSalaryHike",
+    "training": "TrainingTimesLastYear",
+}
+GROUP_SYNONYMS = {
+    "department": "Department", "departments": "Department", "dept": "Department",
+    "role": "JobRole", "roles": "JobRole", "job": "JobRole", "jobs": "JobRole", "position": "JobRole",
+    "gender": "Gender", "sex": "Gender", "marital": "MaritalStatus",
+    "education": "EducationField", "field": "EducationField", "travel": "BusinessTravel",
+    "level": "JobLevel", "levels": "JobLevel", "seniority": "JobLevel", "overtime": "OverTime",
+}
+# Phrase -> (column, value) filters that never appear verbatim in the data
+FILTER_ALIASES = [
+    (r"\b(no overtime|without overtime|not working overtime|don'?t work overtime)\b", "OverTime", "No"),
+    (r"\b(overtime|over time)\b", "OverTime", "Yes"),
+    (r"\b(women|woman|female|females)\b", "Gender", "Female"),
+    (r"\b(men|man|male|males)\b", "Gender", "Male"),
+    (r"\b(r&d|research and development)\b", "Department", "Research & Development"),
+    (r"\bhr\b", "Department", "Human Resources"),
+    (r"\b(frequent travell?ers|travel frequently)\b", "BusinessTravel", "Travel_Frequently"),
+    (r"\b(who left|leavers|who quit|who resigned|former employees)\b", "Attrition", "Yes"),
+    (r"\b(who stayed|current employees|active employees)\b", "Attrition", "No"),
+]
+# Words a template question may contain besides its metric, filters and grouping
+FILLER_WORDS = {
+    "a", "an", "the", "of", "in", "for", "at", "on", "to", "with", "among", "amongst", "and", "as",
+    "what", "what's", "whats", "which", "who", "how", "is", "are", "was", "were", "be", "there",
+    "do", "does", "did", "has", "have", "had", "show", "me", "give", "tell", "get", "find", "calculate",
+    "compute", "please", "can", "you", "i", "we", "our", "my", "us", "all", "overall", "current",
+    "currently", "total", "company", "organization", "org", "whole", "entire", "employees", "employee",
+    "staff", "people", "workers", "workforce", "personnel", "work", "works", "working", "it", "value",
+}
+AGG_NAMES = {"AVG": "Average", "MAX": "Maximum", "MIN": "Minimum"}
+# Category values too generic to be read as filters
+IGNORED_VALUES = {"yes", "no", "y", "n", "other", "none"}
+# When a value exists in several columns ("Human Resources"), the first wins
+COLUMN_PRIORITY = ["Department", "JobRole", "OverTime", "Attrition", "Gender", "MaritalStatus",
+                   "BusinessTravel", "EducationField", "JobLevel"]
+
+
+@dataclass
+class TemplateMatch:
+    sql: str
+    params: tuple
+    explanation: str
+    shape: str
+    from_cube: bool = False
+    base_sql: str = ""  # the same query over the employees table, literals inlined (for display/context)
+
+
+def split_identifier(name: str) -> str:
+    """MonthlyIncome -> 'monthly income'."""
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", name).replace("_", " ").lower()
+
+
+def _normalize_value(value) -> str:
+    return re.sub(r"[_\-]+", " ", str(value)).lower()
+
+
+def _resolve_column(phrase: str, candidates: list, synonyms: dict) -> tuple[str, str] | None:
+    """Longest column-name / synonym match at the start of the phrase -> (column, words)."""
+    phrase = phrase.strip()
+    names = {split_identifier(c): c for c in candidates}
+    names.update({k: v for k, v in synonyms.items() if v in candidates})
+    for words, col in sorted(names.items(), key=lambda kv: -len(kv[0])):
+        if re.match(rf"{re.escape(words)}\b", phrase):
+            return col, words
+    return None
+
+
+def _find_column(text: str, candidates: list, synonyms: dict) -> tuple[str, str] | None:
+    """First column mentioned anywhere in text -> (column, matched words)."""
+    names = {split_identifier(c): c for c in candidates}
+    names.update({k: v for k, v in synonyms.items() if v in candidates})
+    for words, col in sorted(names.items(), key=lambda kv: -len(kv[0])):
+        if re.search(rf"\b{re.escape(words)}\b", text):
+            return col, words
+    return None
+
+
+def _priority(col: str) -> int:
+    return COLUMN_PRIORITY.index(col) if col in COLUMN_PRIORITY else len(COLUMN_PRIORITY)
+
+
+def _find_filters(text: str, categorical: dict, skip: set) -> tuple[dict | None, str]:
+    """
+    Map mentioned category values to ({column: value}, text left over).
+    Filters are None when two different values of one column are mentioned.
+    """
+    filters = {}
+
+    def add(col, value):
+        if col in skip or col not in categorical:
+            return True
+        if col in filters and filters[col] != value:
+            return False
+        filters[col] = value
+        return True
+
+    for pattern, col, value in FILTER_ALIASES:
+        if re.search(pattern, text):
+            text = re.sub(pattern, " ", text)
+            if not add(col, value):
+                return None, text
+
+    # Integer categories need their column named: "job level 2"
+    for col, values in categorical.items():
+        if values and isinstance(values[0], int):
+            m = re.search(rf"\b{re.escape(split_identifier(col))}\s*(?:=|of|is)?\s*(\d+)\b", text)
+            if m and int(m.group(1)) in values:
+                text = text.replace(m.group(0), " ")
+                if not add(col, int(m.group(1))):
+                    return None, text
+
+    candidates = [
+        (_normalize_value(v), col, v)
+        for col, values in categorical.items()
+        for v in values if isinstance(v, str)
+    ]
+    candidates.sort(key=lambda c: (-len(c[0]), _priority(c[1])))
+    for words, col, value in candidates:
+        if len(words) < 2 or words in IGNORED_VALUES:
+            continue
+        pattern = rf"\b{re.escape(words)}s?\b"
+        if re.search(pattern, text):
+            text = re.sub(pattern, " ", text)
+            if not add(col, value):
+                return None, text
+    return filters, text
+
+
+def _unread_words(text: str, filters: dict) -> list:
+    """Words of text that are not metric wording, filler or a filtered column's name ("sales department")."""
+    for pattern in (ATTRITION_WORDS, RATE_WORDS, COUNT_WORDS, *AGG_WORDS.values()):
+        text = pattern.sub(" ", text)
+    known = set(FILLER_WORDS)
+    for col in filters:
+        known.update(split_identifier(col).split())
+        known.update(words for words, c in GROUP_SYNONYMS.items() if c == col)
+    words = (w.removesuffix("'s").strip("'") for w in text.split())
+    return [w for w in words if w and w not in known]
+
+
+def _where(filters: dict) -> tuple[str, tuple]:
+    if not filters:
+        return "", ()
+    clause = " AND ".join(f"{col} = ?" for col in filters)
+    return f" WHERE {clause}", tuple(filters.values())
+
+
+def _inline(sql: str, params: tuple) -> str:
+    for value in params:
+        literal = str(value) if isinstance(value, (int, float)) else "'" + str(value).replace("'", "''") + "'"
+        sql = sql.replace("?", literal, 1)
+    return sql
+
+
+def _describe_filters(filters: dict) -> str:
+    if not filters:
+        return ""
+    return ", filtered to " + " and ".join(f"{c} = '{v}'" for c, v in filters.items())
+
+
+def _strip_aliases(text: str) -> str:
+    for pattern, _, _ in FILTER_ALIASES:
+        text = re.sub(pattern, " ", text)
+    return text
+
+
+def match_template(question: str) -> TemplateMatch | None:
+    q = (question or "").lower().replace("’", "'")
+    q = re.sub(r"[^a-z0-9&%' ]+", " ", q)
+    q = re.sub(r"\s+", " ", q).strip()
+    # Alias phrases are known filters, "no overtime" included
+    if not q or UNSUPPORTED.search(_strip_aliases(q)):
+        return None
+
+    try:
+        catalog = get_catalog()
+    except sqlite3.Error:
+        return None
+    numeric, categorical = catalog.numeric, catalog.categorical
+
+    # Grouping: "by department", "which job role has ..."
+    group_col = None
+    rank_desc = None
+    m = GROUP_RE.search(q) or WHICH_RE.search(q)
+    if m:
+        resolved = _resolve_column(m.group(1), list(categorical), GROUP_SYNONYMS)
+        if resolved is None:
+            return None
+        group_col, words = resolved
+        if m.re is WHICH_RE:
+            q = q[:m.start()] + " " + q[m.end():]
+            rank_desc = not AGG_WORDS["MIN"].search(q)
+        else:
+            end = m.start(1) + len(m.group(1)) - len(m.group(1).lstrip()) + len(words)
+            q = q[:m.start()] + " " + q[end:]
+
+    # Metric
+    is_rate = bool(ATTRITION_WORDS.search(q) and RATE_WORDS.search(q))
+    # "highest attrition rate" ranks something it does not name: not the overall rate
+    if is_rate and group_col is None and (AGG_WORDS["MAX"].search(q) or AGG_WORDS["MIN"].search(q)):
+        return None
+    agg = None
+    if not is_rate:
+        for fn, pattern in AGG_WORDS.items():
+            if pattern.search(q):
+                agg = fn
+                break
+    # "which department has the highest salary" ranks groups by their average
+    if agg in ("MAX", "MIN") and rank_desc is not None:
+        agg = "AVG" if _find_column(q, numeric, NUMERIC_SYNONYMS) else None
+
+    measure = None
+    if agg:
+        found = _find_column(q, numeric, NUMERIC_SYNONYMS)
+        if not found:
+            return None
+        measure, words = found
+        q = re.sub(rf"\b{re.escape(words)}\b", " ", q)
+
+    # "which department has the most employees" ranks by headcount
+    is_count = not is_rate and not agg and (bool(COUNT_WORDS.search(q)) or rank_desc is not None)
+    if not (is_rate or agg or is_count):
+        return None
+
+    skip = {group_col} if group_col else set()
+    if is_rate:
+        skip.add("Attrition")
+    filters, rest = _find_filters(q, categorical, skip)
+    if filters is None:
+        return None
+    unread = _unread_words(rest, filters)
+    if unread:
+        event(f"Template skipped, unread words: {unread}")
+        return None
+    if is_count and "Attrition" not in filters and ATTRITION_WORDS.search(q):
+        filters["Attrition"] = "Yes"
+
+    where, params = _where(filters)
+    select_group = f"{group_col}, " if group_col else ""
+    group_by = f" GROUP BY {group_col}" if group_col else ""
+
+    if is_rate:
+        metric_sql = "ROUND(SUM(CASE WHEN Attrition = 'Yes' THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) AS AttritionRate"
+        order_col, shape = "AttritionRate", "attrition_rate"
+        what = "Attrition rate (share of employees with Attrition = 'Yes')"
+        if group_col:
+            metric_sql = "COUNT(*) AS EmployeeCount, " + metric_sql
+    elif agg:
+        label = {"AVG": "Avg", "MAX": "Max", "MIN": "Min"}[agg]
+        order_col, shape = f"{label}{measure}", "aggregate"
+        rounding = f"ROUND(AVG({measure}), 2)" if agg == "AVG" else f"{agg}({measure})"
+        metric_sql = f"{rounding} AS {order_col}"
+        what = f"{AGG_NAMES[agg]} {measure}"
+    else:
+        metric_sql = "COUNT(*) AS EmployeeCount"
+        order_col, shape = "EmployeeCount", "count"
+        what = "Employee count"
+
+    order = None
+    if group_col:
+        order = f"{order_col} {'ASC' if rank_desc is False else 'DESC'}"
+        what += f" by {group_col}"
+    explanation = what + _describe_filters(filters) + "."
+
+    order_by = f" ORDER BY {order}" if order else ""
+    sql = f"SELECT {select_group}{metric_sql} FROM {catalog.table}{where}{group_by}{order_by};"
+
+    cube = cube_sql(shape, filters, group_col, agg, measure, order)
+    if cube:
+        return TemplateMatch(sql=cube[0], params=cube[1], explanation=explanation, shape=shape,
+                             from_cube=True, base_sql=_inline(sql, params))
+    return TemplateMatch(sql=sql, params=params, explanation=explanation, shape=shape, base_sql=_inline(sql, params))
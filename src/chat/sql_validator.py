@@ -0,0 +1,105 @@
+"""
+SQL validation with SQLite's own parser
+Generated SQL is prepared (EXPLAIN QUERY PLAN, never executed) on a pooled
+read-only connection with an authorizer that only allows reading the employees table
+(and records every table read, so aliases and self-joins pass) and denies load_extension().
+Syntax, column and table errors surface locally in microseconds, and the
+structured error (with close column names) goes into the LLM retry prompt.
+"""
+
+import difflib
+import re
+import sqlite3
+from dataclasses import dataclass, field
+
+from src.chat.db_pool import DB_PATH, read_connection
+from src.chat.schema_catalog import TABLE_NAME, get_catalog
+
+ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+ACTION_NAMES = {
+    getattr(sqlite3, name): name[len("SQLITE_"):]
+    for name in dir(sqlite3)
+    if name.startswith("SQLITE_") and name not in ("SQLITE_OK", "SQLITE_DENY", "SQLITE_IGNORE")
+    and isinstance(getattr(sqlite3, name), int)
+}
+DENIED_FUNCTIONS = {"load_extension"}
+
+
+@dataclass
+class SqlCheck:
+    ok: bool
+    kind: str = ""  # "syntax" | "column" | "table" | "forbidden" | "statement" | "other"
+    message: str = ""
+    suggestions: list = field(default_factory=list)
+
+    def __str__(self) -> str:
+        if self.ok:
+            return ""
+        text = self.message
+        if self.suggestions:
+            text += f" (did you mean: {', '.join(self.suggestions)}?)"
+        return text
+
+
+def _classify(error: str, table: str, denied: list) -> SqlCheck:
+    low = error.lower()
+    if denied:
+        return SqlCheck(False, "forbidden", f"Operation not allowed: {', '.join(denied)} (SELECT from {table} only)")
+
+    m = re.search(r"no such column: ([\w.\"]+)", error, re.IGNORECASE)
+    if m:
+        name = m.group(1).split(".")[-1].strip('"')
+        matches = difflib.get_close_matches(name, list(get_catalog().columns), n=3, cutoff=0.5)
+        return SqlCheck(False, "column", f"no such column: {name}", matches)
+
+    m = re.search(r"no such table: ([\w.]+)", error, re.IGNORECASE)
+    if m:
+        return SqlCheck(False, "table", f"no such table: {m.group(1)}", [table])
+
+    if "one statement at a time" in low:
+        return SqlCheck(False, "statement", "Only one SQL statement is allowed")
+    if "syntax error" in low or "incomplete input" in low or "unrecognized token" in low:
+        return SqlCheck(False, "syntax", error)
+    return SqlCheck(False, "other", error)
+
+
+def check_sql(sql: str, params: tuple = (), db_path=DB_PATH, table: str = TABLE_NAME) -> SqlCheck:
+    """Prepare sql without running it; returns a structured verdict."""
+    text = (sql or "").strip()
+    if not re.match(r"select\b", text, re.IGNORECASE):
+        return SqlCheck(False, "statement", "Query must be a single SELECT statement")
+
+    denied = []
+    read_tables = set()
+
+    def authorizer(action, arg1, arg2, db_name, trigger):
+        if action not in ALLOWED_ACTIONS:
+            denied.append(ACTION_NAMES.get(action, str(action)))
+            return sqlite3.SQLITE_DENY
+        if action == sqlite3.SQLITE_READ:
+            if arg1.lower() != table.lower():
+                denied.append(f"READ {arg1}")
+                return sqlite3.SQLITE_DENY
+            read_tables.add(arg1.lower())
+        if action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() in DENIED_FUNCTIONS:
+            denied.append(f"FUNCTION {arg2}")
+            return sqlite3.SQLITE_DENY
+        return sqlite3.SQLITE_OK
+
+    with read_connection(db_path) as conn:
+        conn.set_authorizer(authorizer)
+        try:
+            conn.execute(f"EXPLAIN QUERY PLAN {text}", params).fetchall()
+        except (sqlite3.Error, sqlite3.Warning) as e:
+            error = str(e)
+        else:
+            error = None
+        finally:
+            conn.set_authorizer(None)
+
+    if error is not None:
+        return _classify(error, table, denied)
+
+    if table.lower() not in read_tables:
+        return SqlCheck(False, "table", f"Query must read from the {table} table")
+    return SqlCheck(True)
@@ -0,0 +1,107 @@
+"""
+Summary cube routing
+The ingest step materializes attrition_cube (src/ingest/load_to_sqlite.py):
+one row per value combination of each grouping set (grand total, every
+dimension, every pair of dimensions) with n, yes_count and per-measure
+cnt_/sum_/sumsq_/min_/max_ columns. Template queries whose filter + group
+columns form one of those grouping sets are answered from a few hundred
+summary rows instead of scanning employees.
+"""
+
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+
+from src.chat.db_pool import db_version_token, read_connection
+
+CUBE_TABLE = "attrition_cube"
+ENABLED = os.getenv("HR_SUMMARY_CUBE", "1") == "1"
+
+
+@dataclass
+class CubeInfo:
+    dimensions: list
+    measures: set
+    groupings: set = field(default_factory=set)  # frozensets of dimensions
+    version: tuple = ()
+
+
+_info = None
+_lock = threading.Lock()
+
+
+def _load_info(version: tuple) -> CubeInfo | None:
+    try:
+        with read_connection() as conn:
+            cols = [row[1] for row in conn.execute(f"PRAGMA table_info({CUBE_TABLE});")]
+            if not cols:
+                return None
+            groupings = {
+                frozenset(g.split(",")) if g else frozenset()
+                for (g,) in conn.execute(f"SELECT DISTINCT grouping FROM {CUBE_TABLE};")
+            }
+    except sqlite3.Error:
+        return None
+    measures = {c[len("sum_"):] for c in cols if c.startswith("sum_")}
+    dimensions = cols[1:cols.index("n")]
+    return CubeInfo(dimensions=dimensions, measures=measures, groupings=groupings, version=version)
+
+
+def cube_info() -> CubeInfo | None:
+    """Cube layout, re-read only when the database version token changes."""
+    global _info
+    version = db_version_token()
+    if _info is not None and _info[0] == version:
+        return _info[1]
+    with _lock:
+        if _info is None or _info[0] != version:
+            _info = (version, _load_info(version))
+    return _info[1]
+
+
+def cube_sql(shape: str, filters: dict, group_col: str | None = None, agg: str = None,
+             measure: str = None, order: str = None) -> tuple[str, tuple] | None:
+    """
+    Cube equivalent of a template query, or None when it is not covered
+    (cube disabled/missing, grouping set not materialized, measure not kept).
+    Output columns and rounding match the employees-table SQL.
+    """
+    if not ENABLED:
+        return None
+    info = cube_info()
+    if info is None:
+        return None
+    dims = set(filters) | ({group_col} if group_col else set())
+    if frozenset(dims) not in info.groupings:
+        return None
+    if shape == "aggregate" and measure not in info.measures:
+        return None
+
+    grouping = ",".join(d for d in info.dimensions if d in dims)
+    where = " AND ".join(["grouping = ?"] + [f"{col} = ?" for col in filters])
+    params = (grouping,) + tuple(filters.values())
+
+    # Grouped queries read one cube row per group; ungrouped ones sum the single matching row
+    # (SUM over no rows keeps the NULL/0 results of the base query)
+    if shape == "attrition_rate":
+        if group_col:
+            metric_sql = "n AS EmployeeCount, ROUND(yes_count * 100.0 / n, 2) AS AttritionRate"
+        else:
+            metric_sql = "ROUND(SUM(yes_count) * 100.0 / SUM(n), 2) AS AttritionRate"
+    elif shape == "aggregate":
+        label = {"AVG": "Avg", "MAX": "Max", "MIN": "Min"}[agg]
+        if agg == "AVG":
+            value = (f"sum_{measure} * 1.0 / cnt_{measure}" if group_col
+                     else f"SUM(sum_{measure}) * 1.0 / SUM(cnt_{measure})")
+            value = f"ROUND({value}, 2)"
+        else:
+            stat = f"{agg.lower()}_{measure}"
+            value = stat if group_col else f"{agg}({stat})"
+        metric_sql = f"{value} AS {label}{measure}"
+    else:
+        metric_sql = "n AS EmployeeCount" if group_col else "COALESCE(SUM(n), 0) AS EmployeeCount"
+
+    select_group = f"{group_col}, " if group_col else ""
+    order_by = f" ORDER BY {order}" if order else ""
+    return f"SELECT {select_group}{metric_sql} FROM {CUBE_TABLE} WHERE {where}{order_by};", params
@@ -0,0 +1,359 @@
+"""
+Tracing and metrics
+Spans around every router stage, LLM call and SQL call; counters (cache
+hits, retries, validation failures, repairs) and histograms (latency per
+span/provider, prompt/completion tokens per provider).
+
+Exports:
+- Prometheus text: prometheus_text(), served on /metrics when HR_METRICS_PORT is set
+- JSON lines: one finished turn (its spans, events and counters) per line in HR_TELEMETRY_JSONL
+- last_trace(): the breakdown of the latest turn, process-wide or of one
+  session (Streamlit debug panel)
+
+Off unless HR_TELEMETRY=1 (or set_enabled(True)): span() then hands back a
+shared no-op context and count()/observe() return after one flag check.
+session_tracing(session_id) turns it on for the turns run inside the block
+only (one Streamlit session's debug panel), leaving other sessions alone.
+event() replaces the router's print() progress lines; they still go to the
+console unless HR_LOG_CONSOLE=0.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.getenv("HR_TELEMETRY", "0") == "1"
+LOG_CONSOLE = os.getenv("HR_LOG_CONSOLE", "1") == "1"
+JSONL_PATH = os.getenv("HR_TELEMETRY_JSONL", "")
+METRICS_PORT = int(os.getenv("HR_METRICS_PORT", "0"))
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+MAX_SESSION_TRACES = 256  # sessions whose latest trace is kept for last_trace(session_id)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: int
+    span_id: int
+    parent_id: int | None
+    start: float
+    attrs: dict = field(default_factory=dict)
+    events: list = field(default_factory=list)
+    end: float | None = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def to_dict(self, t0: float) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round((self.start - t0) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attrs": self.attrs,
+            "events": self.events,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attrs) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_NOOP_CONTEXT = nullcontext(NOOP_SPAN)
+
+_current = contextvars.ContextVar("hr_telemetry_span", default=None)
+_session = contextvars.ContextVar("hr_telemetry_session", default=None)  # set by session_tracing()
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_open_traces = {}  # trace id -> {"spans": [...], "counts": Counter, "wall": epoch seconds}
+_last_trace = None
+_session_traces = OrderedDict()  # session id -> its latest trace (oldest sessions dropped first)
+
+_counters = {}  # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket bounds, bucket counts, sum, count]
+
+
+def enabled() -> bool:
+    return ENABLED or _session.get() is not None
+
+
+def set_enabled(on: bool) -> None:
+    """Turn instrumentation on/off process-wide at runtime (scripts, benchmarks)."""
+    global ENABLED
+    ENABLED = bool(on)
+    if ENABLED:
+        _maybe_start_server()
+
+
+@contextmanager
+def session_tracing(session_id: str):
+    """Trace the turns run inside the block (contexts copied from it included) for session_id only."""
+    _maybe_start_server()
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+# =========================
+# Metrics
+# =========================
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None and v != ""))
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    if not ENABLED and _session.get() is None:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+        parent = _current.get()
+        if parent is not None and parent.trace_id in _open_traces:
+            _open_traces[parent.trace_id]["counts"][name + _label_text(key[1])] += value
+
+
+def observe(name: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels) -> None:
+    if not ENABLED and _session.get() is None:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [buckets, [0] * len(buckets), 0.0, 0]
+        for i, bound in enumerate(hist[0]):
+            if value <= bound:
+                hist[1][i] += 1
+        hist[2] += value
+        hist[3] += 1
+
+
+def record_tokens(provider: str, prompt_tokens: int = None, completion_tokens: int = None) -> None:
+    """Token usage of one LLM call (attached to the current span too)."""
+    if not ENABLED and _session.get() is None:
+        return
+    for kind, value in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+        if value is not None:
+            observe("hr_llm_tokens", value, TOKEN_BUCKETS, provider=provider, kind=kind)
+    current = _current.get()
+    if current is not None:
+        current.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels: tuple, extra: tuple = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text() -> str:
+    """All counters and histograms in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, [v[0], list(v[1]), v[2], v[3]]) for k, v in _histograms.items())
+    lines, typed = [], set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_label_text(labels)} {value:g}")
+    for (name, labels), (bounds, buckets, total, n) in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        for bound, bucket in zip(bounds, buckets):
+            lines.append(f"{name}_bucket{_label_text(labels, (('le', f'{bound:g}'),))} {bucket}")
+        lines.append(f"{name}_bucket{_label_text(labels, (('le', '+Inf'),))} {n}")
+        lines.append(f"{name}_sum{_label_text(labels)} {total:g}")
+        lines.append(f"{name}_count{_label_text(labels)} {n}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# =========================
+# Tracing
+# =========================
+
+class _SpanContext:
+    __slots__ = ("name", "attrs", "span", "token")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> Span:
+        parent = _current.get()
+        span_id = next(_ids)
+        trace_id = parent.trace_id if parent is not None else span_id
+        self.span = Span(self.name, trace_id, span_id, parent.span_id if parent else None,
+                         time.perf_counter(), dict(self.attrs))
+        if parent is None:
+            with _lock:
+                _open_traces[trace_id] = {"spans": [], "counts": Counter(), "wall": time.time(),
+                                          "session": _session.get()}
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        span = self.span
+        span.end = time.perf_counter()
+        if exc_type is not None and exc_type is not GeneratorExit:
+            span.set(error=f"{exc_type.__name__}: {exc}")
+        try:
+            _current.reset(self.token)
+        except ValueError:
+            # Closed from another context (e.g. a generator finished elsewhere)
+            _current.set(None)
+        observe("hr_span_seconds", span.duration_ms / 1000, span=span.name, provider=span.attrs.get("provider"))
+        with _lock:
+            trace = _open_traces.get(span.trace_id)
+            if trace is not None:
+                trace["spans"].append(span)
+            if span.parent_id is None:
+                trace = _open_traces.pop(span.trace_id, None)
+        if span.parent_id is None and trace is not None:
+            _finish_trace(span, trace)
+
+
+def span(name: str, **attrs):
+    """`with span("sql_execute", rows=10) as s: ... s.set(cached=True)`"""
+    if not ENABLED and _session.get() is None:
+        return _NOOP_CONTEXT
+    return _SpanContext(name, attrs)
+
+
+def current_span():
+    return _current.get() if enabled() else None
+
+
+def event(message: str, component: str = "Router", **attrs) -> None:
+    """A progress line: printed to the console and attached to the current span."""
+    if LOG_CONSOLE:
+        print(f"[{component}] {message}")
+    if not ENABLED and _session.get() is None:
+        return
+    current = _current.get()
+    if current is not None:
+        current.events.append({"t_ms": round(current.duration_ms, 3), "message": message, **attrs})
+
+
+def _finish_trace(root: Span, trace: dict) -> None:
+    global _last_trace
+    spans = sorted(trace["spans"], key=lambda s: s.start)
+    record = {
+        "trace_id": root.trace_id,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(trace["wall"])),
+        "name": root.name,
+        "duration_ms": round(root.duration_ms, 3),
+        "attrs": root.attrs,
+        "spans": [s.to_dict(root.start) for s in spans],
+        "counts": dict(trace["counts"]),
+    }
+    _last_trace = record
+    if trace["session"] is not None:
+        with _lock:
+            _session_traces[trace["session"]] = record
+            _session_traces.move_to_end(trace["session"])
+            while len(_session_traces) > MAX_SESSION_TRACES:
+                _session_traces.popitem(last=False)
+    if JSONL_PATH:
+        line = json.dumps(record, default=str)
+        with _lock:
+            with open(JSONL_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def last_trace(session_id: str = None) -> dict | None:
+    """
+    The latest finished turn: spans (start/duration relative to the turn),
+    events, counters. With session_id, the latest turn traced under
+    session_tracing(session_id) instead of the latest of the process.
+    """
+    if session_id is not None:
+        with _lock:
+            return _session_traces.get(session_id)
+    return _last_trace
+
+
+def stage_breakdown(trace: dict = None) -> list:
+    """[(span name, total ms including nested spans, calls)] of a trace, slowest first."""
+    trace = trace or _last_trace
+    if not trace:
+        return []
+    totals, calls = Counter(), Counter()
+    for s in trace["spans"]:
+        if s["parent_id"] is not None:
+            totals[s["name"]] += s["duration_ms"]
+            calls[s["name"]] += 1
+    return [(name, round(ms, 2), calls[name]) for name, ms in totals.most_common()]
+
+
+# =========================
+# /metrics endpoint
+# =========================
+
+_server = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _maybe_start_server() -> None:
+    global _server
+    if not METRICS_PORT or _server is not None:
+        return
+    with _lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer(("127.0.0.1", METRICS_PORT), _MetricsHandler)
+        except OSError as e:
+            print(f"[telemetry] metrics endpoint not started on port {METRICS_PORT}: {e}")
+            _server = False
+            return
+    threading.Thread(target=_server.serve_forever, name="hr-metrics", daemon=True).start()
+
+
+if ENABLED:
+    _maybe_start_server()
@@ -0,0 +1,61 @@
+"""
+Check of the literal fix-ups in src/chat/sql_repair.py against db/hr.sqlite.
+
+Only respellings of a stored value are rewritten (case, spacing, an alias of
+the compared column); exact values and merely similar ones are left alone,
+and repair_sql keeps the literals of SQL that already validates:
+
+    python -m src.chat.test_sql_repair
+"""
+
+from src.chat.sql_repair import normalize_literals, repair_sql
+
+UNCHANGED = [
+    "SELECT COUNT(*) FROM employees WHERE JobRole = 'Sales Executive';",
+    "SELECT COUNT(*) FROM employees WHERE JobRole = 'Manager';",
+    # Not a stored JobRole, but not a respelling of one either ('Manager' is only similar)
+    "SELECT COUNT(*) FROM employees WHERE JobRole = 'Sales Manager';",
+    "SELECT COUNT(*) FROM employees WHERE JobRole = 'Research Director' OR JobRole = 'Research Scientist';",
+    # A real value of another column is taken as written
+    "SELECT COUNT(*) FROM employees WHERE JobRole = 'Sales';",
+    # Aliases only apply to their own column ('women' is a Gender alias)
+    "SELECT COUNT(*) FROM employees WHERE Department = 'women';",
+    "SELECT COUNT(*) FROM employees WHERE JobRole LIKE '%sales%';",
+]
+
+RESPELLED = {
+    "SELECT COUNT(*) FROM employees WHERE OverTime = 'yes';": "OverTime = 'Yes'",
+    "SELECT COUNT(*) FROM employees WHERE Department = 'R&D';": "Department = 'Research & Development'",
+    "SELECT COUNT(*) FROM employees WHERE Gender = 'women';": "Gender = 'Female'",
+    "SELECT COUNT(*) FROM employees WHERE BusinessTravel = 'travel frequently';":
+        "BusinessTravel = 'Travel_Frequently'",
+    "SELECT COUNT(*) FROM employees WHERE JobRole IN ('sales executive', 'Manager');":
+        "IN ('Sales Executive', 'Manager')",
+}
+
+
+def main():
+    for sql in UNCHANGED:
+        result = normalize_literals(sql)
+        print(f"[test] kept: {sql} {result.changes}")
+        assert result.sql == sql and not result.changes, sql
+
+    for sql, expected in RESPELLED.items():
+        result = normalize_literals(sql)
+        print(f"[test] respelled: {result.sql} {result.changes}")
+        assert expected in result.sql, sql
+
+    # Valid SQL: repair_sql leaves its literals for the empty-result retry
+    sql = "SELECT COUNT(*) FROM employees WHERE OverTime = 'yes';"
+    assert repair_sql(sql).sql == sql
+
+    # Failed validation: the column fix and the literal fix both apply
+    result = repair_sql("SELECT COUNT(*) FROM employees WHERE Overtime_Flag = 'yes'")
+    print(f"[test] repaired: {result.sql} {result.changes}")
+    assert result.sql == "SELECT COUNT(*) FROM employees WHERE OverTime = 'Yes';", result.sql
+
+    print("[test] OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Check of the template fast path (src/chat/sql_templates.py) against db/hr.sqlite.
+
+Negated, comparative and out-of-vocabulary questions must fall through to the
+LLM (match_template -> None); the supported KPI shapes must still match:
+
+    python -m src.chat.test_sql_templates
+"""
+
+from src.chat.sql_templates import match_template
+
+# Each of these would otherwise come back as a confidently wrong filter (or none)
+REJECTED = [
+    "How many employees did not leave?",
+    "How many employees didn't leave?",
+    "not married",
+    "How many employees are not married?",
+    "excluding managers",
+    "Average salary excluding managers",
+    "non-managers",
+    "attrition rate outside sales",
+    "older than 40",
+    "How many employees are older than 40?",
+    "under 30",
+    "Attrition rate for employees under 30",
+    "aged 25",
+    "Average salary of employees aged 25",
+    "high job satisfaction",
+    "Attrition rate for employees with high job satisfaction",
+    "never been promoted",
+    "How many employees have never been promoted?",
+    "low work life balance",
+    "Attrition rate for low work life balance",
+    "How many employees in sales with 5 years?",
+    "What's the highest attrition rate?",
+    "lowest attrition rate in sales",
+]
+
+MATCHED = {
+    "What is the attrition rate?": "FROM employees;",
+    "Attrition rate by department": "GROUP BY Department",
+    "Which department has the highest attrition rate?": "ORDER BY AttritionRate DESC",
+    "What is the attrition rate for women?": "Gender = 'Female'",
+    "Attrition rate for employees with no overtime": "OverTime = 'No'",
+    "How many employees work overtime?": "OverTime = 'Yes'",
+    "What is the headcount of the sales department?": "Department = 'Sales'",
+    "How many employees in job level 2": "JobLevel = 2",
+    "Which job role has the lowest average salary?": "ORDER BY AvgMonthlyIncome ASC",
+    "Average tenure of employees who left": "Attrition = 'Yes'",
+}
+
+
+def main():
+    for question in REJECTED:
+        match = match_template(question)
+        print(f"[test] {question!r} -> {match.base_sql if match else None}")
+        assert match is None, question
+
+    for question, expected in MATCHED.items():
+        match = match_template(question)
+        print(f"[test] {question!r} -> {match.base_sql if match else None}")
+        assert match is not None and expected in match.base_sql, question
+
+    print("[test] OK")
+
+
+if __name__ == "__main__":
+    main()
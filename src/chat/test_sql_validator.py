@@ -0,0 +1,49 @@
+"""
+Check of src/chat/sql_validator.py (check_sql) against db/hr.sqlite.
+
+Aliased, self-joined and nested reads of employees must pass; other tables,
+writes, load_extension() and queries that read no table must not:
+
+    python -m src.chat.test_sql_validator
+"""
+
+from src.chat.sql_validator import check_sql
+
+ACCEPTED = [
+    "SELECT COUNT(*) FROM employees;",
+    "SELECT COUNT(*) FROM employees e WHERE e.OverTime = 'Yes';",
+    "SELECT emp.Department, AVG(emp.MonthlyIncome) FROM Employees AS emp GROUP BY emp.Department;",
+    "SELECT e.EmployeeNumber, m.EmployeeNumber FROM employees e "
+    "JOIN employees m ON e.JobRole = m.JobRole AND e.EmployeeNumber < m.EmployeeNumber LIMIT 5;",
+    "SELECT Department, COUNT(*) FROM employees WHERE MonthlyIncome > "
+    "(SELECT AVG(MonthlyIncome) FROM employees) GROUP BY Department;",
+]
+
+REJECTED = {
+    "SELECT 1;": "table",
+    "SELECT * FROM sqlite_master;": "forbidden",
+    "SELECT e.Age FROM employees e JOIN ingest_meta m ON 1 = 1;": "forbidden",
+    "SELECT load_extension('/tmp/evil.so');": "forbidden",
+    "SELECT COUNT(*) FROM employees WHERE load_extension('x') IS NULL;": "forbidden",
+    "DELETE FROM employees;": "statement",
+    "SELECT COUNT(*) FROM employes;": "table",
+    "SELECT Salary FROM employees e;": "column",
+}
+
+
+def main():
+    for sql in ACCEPTED:
+        check = check_sql(sql)
+        print(f"[test] ok={check.ok} {sql} {check}")
+        assert check.ok, sql
+
+    for sql, kind in REJECTED.items():
+        check = check_sql(sql)
+        print(f"[test] {check.kind or 'ok'}: {sql} {check}")
+        assert not check.ok and check.kind == kind, sql
+
+    print("[test] OK")
+
+
+if __name__ == "__main__":
+    main()
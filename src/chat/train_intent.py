@@ -0,0 +1,241 @@
+"""
+Train the local intent classifier (src/chat/intent_model.py).
+
+Builds a labelled corpus from HR question templates, fits a softmax
+regression on hashed n-gram features and writes src/chat/intent_model.npz.
+
+The confidence threshold is calibrated on HELDOUT, hand-written phrasings
+that never enter training (greetings with a question attached, short
+follow-ups, loose wording): the lowest threshold at which every held-out
+prediction the model would answer alone is correct. It ships in the .npz
+(INTENT_CONFIDENCE_THRESHOLD overrides it).
+
+    python -m src.chat.train_intent
+"""
+
+import itertools
+import random
+
+import numpy as np
+
+from src.chat.intent_model import LABELS, MODEL_PATH, N_FEATURES, featurize_dense, predict_intent, load_model
+
+SEED = 7
+MIN_THRESHOLD = 0.7  # a few held-out phrasings cannot justify trusting the model below this
+
+METRICS = [
+    "average salary", "average monthly income", "attrition rate", "turnover rate",
+    "number of employees", "employee count", "average age", "headcount",
+    "average years at company", "average job satisfaction", "percentage of employees who left",
+    "median income", "maximum salary", "minimum monthly income", "overtime rate",
+    "average distance from home", "total working years", "average performance rating",
+]
+GROUPS = [
+    "department", "job role", "gender", "marital status", "education field",
+    "business travel", "job level", "overtime", "age group",
+]
+FILTERS = [
+    "in Sales", "in Research & Development", "in Human Resources", "in R&D", "for overtime employees",
+    "for women", "for men", "for single employees", "among managers", "for sales executives",
+    "for employees who travel frequently", "for employees with job level 1", "in HR",
+]
+
+DATA_TEMPLATES = [
+    "What is the {metric}?", "what's the {metric} {filter}", "{metric} by {group}",
+    "Show me the {metric} by {group}", "How does {metric} vary by {group}?",
+    "Compare {metric} across {group}", "What is the {metric} {filter}?",
+    "Give me {metric} per {group} {filter}", "Which {group} has the highest {metric}?",
+    "Which {group} has the lowest {metric}", "list the {metric} for each {group}",
+    "calculate {metric} {filter}", "{metric} {filter}", "Can you show me {metric} by {group}?",
+    "can you tell me the {metric} {filter}", "I need the {metric} per {group}",
+]
+DATA_EXTRA = [
+    "How many employees are in the dataset?", "How many employees left the company?",
+    "How many people work overtime?", "Count employees by department",
+    "What percentage of employees who work overtime left the company?",
+    "Top 5 job roles by attrition", "Show employees with income above average",
+    "How many women work in Sales?", "number of managers in each department",
+    "Is attrition higher for people who work overtime?", "What is the gender split?",
+    "Distribution of employees by education field", "how many staff do we have",
+    "total headcount", "What is the average tenure?", "Who earns the most by job role?",
+    "average salary of employees who left", "attrition among single employees",
+    "Break down turnover by marital status", "how many quit last year",
+]
+
+ADVICE_TOPICS = [
+    "attrition", "employee retention", "burnout", "overtime", "employee engagement",
+    "onboarding", "performance reviews", "career development", "work-life balance",
+    "compensation strategy", "remote work", "diversity and inclusion", "manager training",
+    "exit interviews", "hiring", "team morale", "recognition programs", "succession planning",
+]
+ADVICE_TEMPLATES = [
+    "How can we reduce {topic}?", "What are best practices for {topic}?",
+    "Give me advice on {topic}", "What strategies improve {topic}?",
+    "How should I handle {topic} issues in my team?", "Any tips for {topic}?",
+    "What should HR do about {topic}?", "Recommend a plan to improve {topic}",
+    "Why do employees struggle with {topic}?", "How do I talk to my manager about {topic}?",
+    "What policies help with {topic}", "Suggest ways to address {topic}",
+]
+ADVICE_EXTRA = [
+    "Why do employees leave organizations?", "How do I motivate a disengaged employee?",
+    "What should I include in a retention plan?", "How can managers prevent burnout?",
+    "Should we offer flexible hours?", "How do I give difficult feedback?",
+    "What makes a good onboarding experience?", "How can we keep top performers?",
+    "Write an email announcing a new wellness program", "Explain what a stay interview is",
+    "What is a good way to reward overtime work?", "How can we make overtime less stressful?",
+    "What causes high attrition in sales teams?", "How do we build a culture of trust?",
+]
+
+GREETINGS = [
+    "hi", "hello", "hey", "hey there", "hello!", "hi there", "good morning", "good evening",
+    "good afternoon", "howdy", "hiya", "yo", "greetings", "hello, how are you?", "hi bot",
+    "hey, what can you do?", "hello assistant", "morning!", "hi, who are you?", "thanks!",
+    "thank you", "thanks a lot", "bye", "goodbye", "see you", "hey how's it going",
+    "what can you help me with?", "hello there, nice to meet you",
+]
+
+# A greeting in front of a real question does not make it a greeting
+GREETING_PREFIXES = [
+    "hi", "hello", "hey", "good morning", "good afternoon", "hi there", "hey there", "morning", "hello again",
+]
+MIXED_TEMPLATES = ["{greeting}, {question}", "{greeting}! {question}", "{greeting} - {question}"]
+
+# Short follow-ups to a data answer: no metric, just a new filter or grouping
+FOLLOWUP_SUBJECTS = [
+    "Sales", "R&D", "HR", "Research & Development", "Human Resources", "women", "men", "managers",
+    "sales executives", "single employees", "overtime employees", "job level 2", "lab technicians",
+    "the sales team", "people who travel", "married employees", "research scientists",
+]
+FOLLOWUP_TEMPLATES = [
+    "what about {x}", "what about {x}?", "how about {x}", "and {x}?", "and for {x}", "and in {x}",
+    "same for {x}", "now {x}", "only {x}", "just {x}", "what about for {x}", "and what about {x}?",
+]
+FOLLOWUP_GROUP_TEMPLATES = [
+    "and by {group}", "now split it by {group}", "break that down by {group}", "same but by {group}",
+    "what about per {group}", "can you group it by {group}",
+]
+
+# Calibration only: never trained on
+HELDOUT = [
+    ("good morning, can you show me turnover by department?", "DATA"),
+    ("hi! what's our headcount in sales?", "DATA"),
+    ("hello, how many people left last year?", "DATA"),
+    ("hey there, which department loses the most people?", "DATA"),
+    ("what about R&D", "DATA"),
+    ("and for the research team?", "DATA"),
+    ("how about healthcare representatives?", "DATA"),
+    ("same thing but by gender", "DATA"),
+    ("ok now split by job level", "DATA"),
+    ("can you break attrition down by age group", "DATA"),
+    ("which roles earn the least on average", "DATA"),
+    ("how many of our managers are women?", "DATA"),
+    ("whats the attrition for people who travel a lot", "DATA"),
+    ("percentage of staff working overtime", "DATA"),
+    ("show average income per education field", "DATA"),
+    ("only for single people", "DATA"),
+    ("hi, how do I keep my best engineers from leaving?", "ADVICE"),
+    ("good afternoon, any ideas to improve morale?", "ADVICE"),
+    ("how do I run a good exit interview?", "ADVICE"),
+    ("tips for reducing overtime fatigue", "ADVICE"),
+    ("should we raise salaries to keep people?", "ADVICE"),
+    ("how do I support an employee going through burnout", "ADVICE"),
+    ("what would you recommend to improve onboarding?", "ADVICE"),
+    ("good morning!", "GREETING"),
+    ("hey, how are you doing today?", "GREETING"),
+    ("hello there", "GREETING"),
+    ("thanks, that's helpful", "GREETING"),
+    ("cheers, bye", "GREETING"),
+    ("hi! what kinds of questions can you answer?", "GREETING"),
+]
+
+
+def build_corpus(rng: random.Random) -> list[tuple[str, str]]:
+    data = []
+    for tpl, metric, group, flt in itertools.product(DATA_TEMPLATES, METRICS, GROUPS, FILTERS):
+        if rng.random() < 0.02:
+            data.append((tpl.format(metric=metric, group=group, filter=flt), "DATA"))
+    data += [(q, "DATA") for q in DATA_EXTRA]
+
+    advice = [(tpl.format(topic=t), "ADVICE") for tpl in ADVICE_TEMPLATES for t in ADVICE_TOPICS]
+    advice += [(q, "ADVICE") for q in ADVICE_EXTRA]
+
+    greeting = [(g, "GREETING") for g in GREETINGS]
+    greeting += [(g.capitalize(), "GREETING") for g in GREETINGS]
+
+    mixed = []
+    for question, label in rng.sample(data, min(len(data), 300)) + rng.sample(advice, 100):
+        tpl, g = rng.choice(MIXED_TEMPLATES), rng.choice(GREETING_PREFIXES)
+        mixed.append((tpl.format(greeting=g, question=question[0].lower() + question[1:]), label))
+
+    followups = [(tpl.format(x=x), "DATA") for tpl in FOLLOWUP_TEMPLATES for x in FOLLOWUP_SUBJECTS]
+    followups += [(tpl.format(group=g), "DATA") for tpl in FOLLOWUP_GROUP_TEMPLATES for g in GROUPS]
+
+    corpus = data + advice + greeting + mixed + followups
+    rng.shuffle(corpus)
+    return corpus
+
+
+def train(X: np.ndarray, y: np.ndarray, epochs: int = 400, lr: float = 2.0, l2: float = 1e-4):
+    """Full-batch softmax regression with class-balanced loss."""
+    n, k = X.shape[0], len(LABELS)
+    W = np.zeros((N_FEATURES, k), dtype=np.float32)
+    b = np.zeros(k, dtype=np.float32)
+    Y = np.eye(k, dtype=np.float32)[y]
+    class_w = (n / (k * np.bincount(y, minlength=k).clip(min=1))).astype(np.float32)[y][:, None]
+
+    for _ in range(epochs):
+        logits = X @ W + b
+        logits -= logits.max(axis=1, keepdims=True)
+        P = np.exp(logits)
+        P /= P.sum(axis=1, keepdims=True)
+        G = (P - Y) * class_w / n
+        W -= lr * (X.T @ G + l2 * W)
+        b -= lr * G.sum(axis=0)
+    return W, b
+
+
+def calibrate_threshold(W: np.ndarray, b: np.ndarray, examples: list) -> float:
+    """Lowest threshold (MIN_THRESHOLD..0.99) at which every example predicted at/above it is labelled right."""
+    X = featurize_dense([q for q, _ in examples])
+    logits = X @ W + b
+    P = np.exp(logits - logits.max(axis=1, keepdims=True))
+    P /= P.sum(axis=1, keepdims=True)
+    wrong = [float(p.max()) for p, (_, label) in zip(P, examples) if LABELS[int(p.argmax())] != label]
+    return min(0.99, max([MIN_THRESHOLD] + [np.ceil(c * 100) / 100 + 0.01 for c in wrong]))
+
+
+def main():
+    rng = random.Random(SEED)
+    corpus = build_corpus(rng)
+    split = int(len(corpus) * 0.8)
+    train_set, test_set = corpus[:split], corpus[split:]
+
+    X = featurize_dense([q for q, _ in train_set])
+    y = np.array([LABELS.index(label) for _, label in train_set])
+    W, b = train(X, y)
+
+    Xt = featurize_dense([q for q, _ in test_set])
+    yt = np.array([LABELS.index(label) for _, label in test_set])
+    acc = float(((Xt @ W + b).argmax(axis=1) == yt).mean())
+    print(f"[train] corpus={len(corpus)} train={len(train_set)} held-out acc={acc:.3f}")
+
+    # Final model uses every example
+    X = featurize_dense([q for q, _ in corpus])
+    y = np.array([LABELS.index(label) for _, label in corpus])
+    W, b = train(X, y)
+    W = W.astype(np.float16)
+    threshold = calibrate_threshold(W.astype(np.float32), b, HELDOUT)
+    np.savez_compressed(MODEL_PATH, W=W, b=b, labels=np.array(LABELS), threshold=np.float32(threshold))
+    print("[train] saved:", MODEL_PATH, f"({MODEL_PATH.stat().st_size / 1024:.1f} KB)")
+
+    import src.chat.intent_model as intent_model
+    intent_model._model = None
+    load_model()
+    answered = [(q, label) for q, label in HELDOUT if predict_intent(q)[1] >= threshold]
+    print(f"[train] threshold={threshold:.2f}: answers {len(answered)}/{len(HELDOUT)} held-out phrasings locally")
+    for q, label in HELDOUT:
+        print(f"  {q!r:58} {label:8} -> {predict_intent(q)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,81 @@
-import pandas as pd
-from sqlalchemy import create_engine
+"""
+CSV -> SQLite ingest for the HR dataset.
+
+Streams the CSV (never loads it whole, so extracts larger than RAM work),
+infers column types once from a sample, bulk-inserts in chunks with
+executemany inside one transaction, indexes the categorical filter columns,
+runs ANALYZE, and finally swaps the finished file over db/hr.sqlite with
+os.replace so readers never see a half-loaded table.
+
+--incremental diffs the CSV against the current table by EmployeeNumber
+using per-row hashes (row_hashes table) and applies only the inserts,
+updates and deletes in place, in one transaction. Every load that changes
+data bumps data_version in the ingest_meta table, which the result cache
+keys on (src/chat/db_pool.py: data_version).
+
+A full load builds attrition_cube: counts, Attrition = 'Yes' counts and
+count/sum/sum-of-squares/min/max of the key numeric columns for the grand
+total, each cube dimension and each pair of dimensions. The template fast
+path answers eligible aggregates from it (src/chat/summary_cube.py).
+
+A full load also writes column_stats: null count, min, max and distinct
+count of every column, plus the value list of low-cardinality columns. The
+schema catalog (src/chat/schema_catalog.py) reads it instead of scanning
+the table on the request path.
+
+A delta load does not rescan the table for either: the old and new images
+of the changed rows are captured (temp.delta_rows, signed -1/+1) and the
+cube and stats are adjusted from those. Only a removed min/max that no
+other row still holds is re-read from the table. The distinct count of a
+high-cardinality column (one without a value list) stays as of the last
+full load; the catalog only compares it against 1.
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import time
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = PROJECT_ROOT / "data" / "raw"
-DB_PATH = PROJECT_ROOT / "db" / "hr.sqlite"
+DB_PATH = Path(os.getenv("HR_DB_PATH", PROJECT_ROOT / "db" / "hr.sqlite"))
 TABLE_NAME = "employees"
 
+SAMPLE_ROWS = 10_000  # rows used for type inference
+CHUNK_ROWS = 50_000   # rows per executemany batch
+
+# Filter/grouping columns the chatbot uses most (indexed when present)
+INDEX_COLUMNS = [
+    "Department", "JobRole", "OverTime", "Attrition", "Gender",
+    "MaritalStatus", "BusinessTravel", "EducationField", "JobLevel",
+]
+KEY_COLUMN = "EmployeeNumber"
+HASH_TABLE = "row_hashes"
+META_TABLE = "ingest_meta"
+CUBE_TABLE = "attrition_cube"
+# Grouping sets: (), every dimension, every pair of dimensions
+CUBE_DIMENSIONS = [
+    "Department", "JobRole", "OverTime", "Attrition", "Gender",
+    "MaritalStatus", "BusinessTravel", "EducationField", "JobLevel",
+]
+CUBE_MAX_DIMS = 2
+# Numeric columns the cube keeps count/sum/sum-of-squares/min/max for
+CUBE_MEASURES = [
+    "MonthlyIncome", "Age", "YearsAtCompany", "TotalWorkingYears", "DistanceFromHome",
+    "PercentSalaryHike", "TrainingTimesLastYear", "JobSatisfaction", "WorkLifeBalance",
+    "YearsSinceLastPromotion",
+]
+STATS_TABLE = "column_stats"
+MAX_CATEGORY_VALUES = 15  # keep in sync with src/chat/schema_catalog.py
+KEY_BATCH = 500  # keys per hash lookup (stays under SQLite's variable limit)
+
+
 def find_csv() -> Path:
     csv_files = list(DATA_DIR.glob("*.csv"))
     if not csv_files:
@@ -14,25 +83,626 @@ def find_csv() -> Path:
     # Pick the first CSV file found
     return csv_files[0]
 
+
+def clean_column(name: str) -> str:
+    # Clean column names for SQL safety
+    return name.strip().replace(" ", "_").replace("-", "_")
+
+
+def _is_int(value: str) -> bool:
+    try:
+        int(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_float(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def infer_types(header: list, sample: list) -> list:
+    """INTEGER / REAL / TEXT per column from the sample rows (blanks ignored)."""
+    types = []
+    for i in range(len(header)):
+        values = [row[i].strip() for row in sample if i < len(row) and row[i].strip() != ""]
+        if values and all(_is_int(v) for v in values):
+            types.append("INTEGER")
+        elif values and all(_is_float(v) for v in values):
+            types.append("REAL")
+        else:
+            types.append("TEXT")
+    return types
+
+
+def _converter(col_type: str):
+    def convert(value: str):
+        value = value.strip()
+        if value == "":
+            return None
+        if col_type == "INTEGER":
+            try:
+                return int(value)
+            except ValueError:
+                pass
+        if col_type in ("INTEGER", "REAL"):
+            try:
+                return float(value)
+            except ValueError:
+                pass
+        # Values that break the inferred type are kept as text
+        return value
+    return convert
+
+
+def row_converter(types: list):
+    converters = [_converter(t) for t in types]
+    width = len(types)
+
+    def convert(row: list) -> tuple:
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        return tuple(conv(v) for conv, v in zip(converters, row))
+    return convert
+
+
+def row_hash(row: list) -> int:
+    """64-bit hash of the raw CSV fields (type-independent, so full and delta loads agree)."""
+    digest = hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _chunks(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def create_table(conn: sqlite3.Connection, table: str, columns: list, types: list) -> None:
+    col_defs = ", ".join(f'"{c}" {t}' for c, t in zip(columns, types))
+    conn.execute(f'DROP TABLE IF EXISTS "{table}";')
+    conn.execute(f'CREATE TABLE "{table}" ({col_defs});')
+
+
+def build_indexes(conn: sqlite3.Connection, table: str, columns: list) -> tuple:
+    """Index the filter columns; returns (indexed columns, key index is unique)."""
+    created, unique = [], False
+    for col in INDEX_COLUMNS:
+        if col in columns:
+            conn.execute(f'CREATE INDEX "idx_{table}_{col}" ON "{table}" ("{col}");')
+            created.append(col)
+    if KEY_COLUMN in columns:
+        try:
+            conn.execute(f'CREATE UNIQUE INDEX "idx_{table}_{KEY_COLUMN}" ON "{table}" ("{KEY_COLUMN}");')
+            unique = True
+        except sqlite3.IntegrityError:
+            conn.execute(f'CREATE INDEX "idx_{table}_{KEY_COLUMN}" ON "{table}" ("{KEY_COLUMN}");')
+        created.append(KEY_COLUMN)
+    return created, unique
+
+
+def _cube_layout(columns: list, types: list) -> tuple:
+    """(dimensions, measures) of the cube for this table."""
+    dims = [d for d in CUBE_DIMENSIONS if d in columns]
+    numeric = {c for c, t in zip(columns, types) if t in ("INTEGER", "REAL")}
+    return dims, [m for m in CUBE_MEASURES if m in numeric]
+
+
+def build_cube(conn: sqlite3.Connection, table: str, columns: list, types: list) -> int:
+    """
+    Materialize attrition_cube with UNION ALL grouping sets. The base table is
+    scanned once into a leaf grouping over all dimensions; every grouping set
+    is re-aggregated from that (at most product-of-cardinalities rows).
+    Returns the number of cube rows.
+    """
+    dims, measures = _cube_layout(columns, types)
+    conn.execute(f'DROP TABLE IF EXISTS "{CUBE_TABLE}";')
+    if not dims:
+        return 0
+
+    dim_list = ", ".join(f'"{d}"' for d in dims)
+    yes = "SUM(CASE WHEN \"Attrition\" = 'Yes' THEN 1 ELSE 0 END)" if "Attrition" in columns else "NULL"
+    leaf_stats = ["COUNT(*) AS n", f"{yes} AS yes_count"]
+    for m in measures:
+        leaf_stats += [
+            f'COUNT("{m}") AS "cnt_{m}"', f'SUM("{m}") AS "sum_{m}"', f'SUM("{m}" * "{m}") AS "sumsq_{m}"',
+            f'MIN("{m}") AS "min_{m}"', f'MAX("{m}") AS "max_{m}"',
+        ]
+    conn.execute("DROP TABLE IF EXISTS temp.cube_leaf;")
+    conn.execute(
+        f'CREATE TEMP TABLE cube_leaf AS SELECT {dim_list}, {", ".join(leaf_stats)} '
+        f'FROM "{table}" GROUP BY {dim_list};'
+    )
+
+    rollup = ["SUM(n) AS n", "SUM(yes_count) AS yes_count"]
+    for m in measures:
+        rollup += [
+            f'SUM("cnt_{m}") AS "cnt_{m}"', f'SUM("sum_{m}") AS "sum_{m}"', f'SUM("sumsq_{m}") AS "sumsq_{m}"',
+            f'MIN("min_{m}") AS "min_{m}"', f'MAX("max_{m}") AS "max_{m}"',
+        ]
+    selects = []
+    for size in range(CUBE_MAX_DIMS + 1):
+        for group in itertools.combinations(dims, size):
+            dim_cols = ", ".join(f'"{d}"' if d in group else f'NULL AS "{d}"' for d in dims)
+            group_cols = ", ".join(f'"{d}"' for d in group)
+            group_by = f" GROUP BY {group_cols}" if group else ""
+            selects.append(
+                f"SELECT '{','.join(group)}' AS grouping, {dim_cols}, {', '.join(rollup)} FROM temp.cube_leaf{group_by}"
+            )
+    conn.execute(f'CREATE TABLE "{CUBE_TABLE}" AS {" UNION ALL ".join(selects)};')
+    conn.execute(f'CREATE INDEX "idx_{CUBE_TABLE}_grouping" ON "{CUBE_TABLE}" (grouping);')
+    conn.execute("DROP TABLE temp.cube_leaf;")
+    return conn.execute(f'SELECT COUNT(*) FROM "{CUBE_TABLE}";').fetchone()[0]
+
+
+def build_column_stats(conn: sqlite3.Connection, table: str, columns: list) -> int:
+    """Scan the table once for per-column stats into column_stats; returns the row count."""
+    aggregates = ["COUNT(*)"]
+    for name in columns:
+        aggregates += [f'COUNT(*) - COUNT("{name}")', f'MIN("{name}")', f'MAX("{name}")', f'COUNT(DISTINCT "{name}")']
+    stats = conn.execute(f'SELECT {", ".join(aggregates)} FROM "{table}";').fetchone()
+
+    rows = []
+    for i, name in enumerate(columns):
+        nulls, lo, hi, distinct = stats[1 + 4 * i: 5 + 4 * i]
+        values = None
+        if distinct <= MAX_CATEGORY_VALUES:
+            values = json.dumps([r[0] for r in conn.execute(
+                f'SELECT DISTINCT "{name}" FROM "{table}" WHERE "{name}" IS NOT NULL ORDER BY 1;'
+            )])
+        rows.append((i, name, nulls, lo, hi, distinct, values))
+
+    conn.execute(f'DROP TABLE IF EXISTS "{STATS_TABLE}";')
+    conn.execute(
+        f'CREATE TABLE "{STATS_TABLE}" (position INTEGER PRIMARY KEY, name TEXT NOT NULL, '
+        f'null_count INTEGER, min, max, distinct_count INTEGER, "values" TEXT);'
+    )
+    conn.executemany(f'INSERT INTO "{STATS_TABLE}" VALUES (?, ?, ?, ?, ?, ?, ?);', rows)
+    return stats[0]
+
+
+def _sqlite_order(value) -> tuple:
+    """Sort key matching SQLite's order of non-NULL values: numbers, then text, then blobs."""
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (1, value) if isinstance(value, str) else (2, value)
+
+
+def _extreme(fn, *values):
+    """min/max (fn) of the non-NULL values in SQLite order, or None."""
+    values = [v for v in values if v is not None]
+    return fn(values, key=_sqlite_order) if values else None
+
+
+def _group_filter(group: tuple, values: tuple) -> tuple:
+    """WHERE conditions and parameters selecting one cube group (NULL matches NULL)."""
+    conditions, params = [], []
+    for d, v in zip(group, values):
+        if v is None:
+            conditions.append(f'"{d}" IS NULL')
+        else:
+            conditions.append(f'"{d}" = ?')
+            params.append(v)
+    return conditions, params
+
+
+def _reread_extreme(conn: sqlite3.Connection, table: str, conditions: list, params: list,
+                    column: str, removed, fn: str):
+    """
+    The min/max (fn) of column over the rows matching conditions after removed
+    (the old extreme) was deleted or changed: kept if another row still holds
+    it (cheap with LIMIT 1 for common values), otherwise re-aggregated.
+    """
+    where = " AND ".join(conditions + [f'"{column}" = ?'])
+    if conn.execute(f'SELECT 1 FROM "{table}" WHERE {where} LIMIT 1;', (*params, removed)).fetchone():
+        return removed
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return conn.execute(f'SELECT {fn}("{column}") FROM "{table}"{where};', params).fetchone()[0]
+
+
+def _capture_rows(conn: sqlite3.Connection, table: str, keys: list, sign: int) -> None:
+    """Copy the current rows of keys into temp.delta_rows with sign -1 (old image) or +1 (new image)."""
+    for i in range(0, len(keys), KEY_BATCH):
+        batch = keys[i:i + KEY_BATCH]
+        conn.execute(
+            f'INSERT INTO temp.delta_rows SELECT *, {sign} FROM "{table}" '
+            f'WHERE "{KEY_COLUMN}" IN ({", ".join("?" for _ in batch)});', batch
+        )
+
+
+def update_cube(conn: sqlite3.Connection, table: str, columns: list, types: list) -> int:
+    """
+    Apply the captured delta (temp.delta_rows) to attrition_cube in place:
+    counts and sums of every grouping set move by the signed delta rows, new
+    groups are added and emptied ones dropped. Falls back to build_cube when
+    the cube is missing or its layout changed. Returns the number of cube rows.
+    """
+    dims, measures = _cube_layout(columns, types)
+    values = ["n", "yes_count"] + [f"{p}_{m}" for m in measures for p in ("cnt", "sum", "sumsq", "min", "max")]
+    layout = [r[1] for r in conn.execute(f'PRAGMA table_info("{CUBE_TABLE}");')]
+    if not dims or layout != ["grouping", *dims, *values]:
+        return build_cube(conn, table, columns, types)
+
+    yes = "SUM(CASE WHEN \"Attrition\" = 'Yes' THEN delta_sign ELSE 0 END)" if "Attrition" in columns else "NULL"
+    deltas = ["SUM(delta_sign)", yes]
+    for m in measures:
+        deltas += [
+            f'SUM(CASE WHEN "{m}" IS NOT NULL THEN delta_sign ELSE 0 END)',
+            f'COALESCE(SUM(delta_sign * "{m}"), 0)', f'COALESCE(SUM(delta_sign * "{m}" * "{m}"), 0)',
+            f'MIN(CASE WHEN delta_sign > 0 THEN "{m}" END)', f'MAX(CASE WHEN delta_sign > 0 THEN "{m}" END)',
+            f'MIN(CASE WHEN delta_sign < 0 THEN "{m}" END)', f'MAX(CASE WHEN delta_sign < 0 THEN "{m}" END)',
+        ]
+    value_list = ", ".join(f'"{v}"' for v in values)
+    insert = f'INSERT INTO "{CUBE_TABLE}" VALUES ({", ".join("?" for _ in range(1 + len(dims) + len(values)))});'
+
+    for size in range(CUBE_MAX_DIMS + 1):
+        for group in itertools.combinations(dims, size):
+            group_cols = ", ".join(f'"{d}"' for d in group)
+            select = f"{group_cols}, " if group else ""
+            group_by = f" GROUP BY {group_cols}" if group else ""
+            for row in conn.execute(f"SELECT {select}{', '.join(deltas)} FROM temp.delta_rows{group_by};").fetchall():
+                keys, delta = row[:size], row[size:]
+                if delta[0] is None:  # no delta rows at all
+                    continue
+                conditions, params = _group_filter(group, keys)
+                current = conn.execute(
+                    f'SELECT rowid, {value_list} FROM "{CUBE_TABLE}" '
+                    f'WHERE {" AND ".join(["grouping = ?"] + conditions)};', [",".join(group), *params]
+                ).fetchone()
+
+                if current is None:
+                    if delta[0] <= 0:
+                        continue
+                    new = list(delta[:2])
+                    for i in range(len(measures)):
+                        cnt, total, squares, add_lo, add_hi = delta[2 + 7 * i: 7 + 7 * i]
+                        new += [cnt, total, squares, add_lo, add_hi] if cnt else [0, None, None, None, None]
+                    by_dim = dict(zip(group, keys))
+                    conn.execute(insert, [",".join(group), *[by_dim.get(d) for d in dims], *new])
+                    continue
+
+                rowid, n, yes_count = current[:3]
+                if n + delta[0] <= 0:
+                    conn.execute(f'DELETE FROM "{CUBE_TABLE}" WHERE rowid = ?;', (rowid,))
+                    continue
+                new = [n + delta[0], None if yes_count is None else yes_count + delta[1]]
+                for i, m in enumerate(measures):
+                    cnt, total, squares, lo, hi = current[3 + 5 * i: 8 + 5 * i]
+                    d_cnt, d_total, d_squares, add_lo, add_hi, rem_lo, rem_hi = delta[2 + 7 * i: 9 + 7 * i]
+                    cnt += d_cnt
+                    if not cnt:
+                        new += [0, None, None, None, None]
+                        continue
+                    if rem_lo is not None and lo is not None and _sqlite_order(rem_lo) <= _sqlite_order(lo):
+                        lo = _reread_extreme(conn, table, conditions, params, m, lo, "MIN")
+                    if rem_hi is not None and hi is not None and _sqlite_order(rem_hi) >= _sqlite_order(hi):
+                        hi = _reread_extreme(conn, table, conditions, params, m, hi, "MAX")
+                    new += [cnt, (total or 0) + d_total, (squares or 0) + d_squares,
+                            _extreme(min, lo, add_lo), _extreme(max, hi, add_hi)]
+                assignments = ", ".join(f'"{v}" = ?' for v in values)
+                conn.execute(f'UPDATE "{CUBE_TABLE}" SET {assignments} WHERE rowid = ?;', [*new, rowid])
+    return conn.execute(f'SELECT COUNT(*) FROM "{CUBE_TABLE}";').fetchone()[0]
+
+
+def update_column_stats(conn: sqlite3.Connection, table: str, columns: list, row_count) -> int:
+    """
+    Apply the captured delta (temp.delta_rows) to column_stats in place and
+    return the new row count. Value lists gain the added values and lose the
+    removed ones no row still holds. Falls back to build_column_stats when the
+    stats or the stored row count are missing or the columns changed.
+    """
+    try:
+        current = conn.execute(
+            f'SELECT position, name, null_count, min, max, distinct_count, "values" FROM "{STATS_TABLE}" ORDER BY position;'
+        ).fetchall()
+    except sqlite3.OperationalError:
+        current = []
+    if row_count is None or [r[1] for r in current] != list(columns):
+        return build_column_stats(conn, table, columns)
+
+    aggregates = ["COALESCE(SUM(delta_sign), 0)"]
+    for name in columns:
+        aggregates += [
+            f'COALESCE(SUM(CASE WHEN "{name}" IS NULL THEN delta_sign ELSE 0 END), 0)',
+            f'MIN(CASE WHEN delta_sign > 0 THEN "{name}" END)', f'MAX(CASE WHEN delta_sign > 0 THEN "{name}" END)',
+            f'MIN(CASE WHEN delta_sign < 0 THEN "{name}" END)', f'MAX(CASE WHEN delta_sign < 0 THEN "{name}" END)',
+        ]
+    delta = conn.execute(f'SELECT {", ".join(aggregates)} FROM temp.delta_rows;').fetchone()
+
+    rows = []
+    for i, (position, name, nulls, lo, hi, distinct, values) in enumerate(current):
+        d_nulls, add_lo, add_hi, rem_lo, rem_hi = delta[1 + 5 * i: 6 + 5 * i]
+        if values is not None:
+            found = set(json.loads(values))
+            added = {r[0] for r in conn.execute(
+                f'SELECT DISTINCT "{name}" FROM temp.delta_rows WHERE delta_sign > 0 AND "{name}" IS NOT NULL;'
+            )}
+            removed = {r[0] for r in conn.execute(
+                f'SELECT DISTINCT "{name}" FROM temp.delta_rows WHERE delta_sign < 0 AND "{name}" IS NOT NULL;'
+            )}
+            found |= added
+            for value in removed - added:
+                if not conn.execute(f'SELECT 1 FROM "{table}" WHERE "{name}" = ? LIMIT 1;', (value,)).fetchone():
+                    found.discard(value)
+            ordered = sorted(found, key=_sqlite_order)
+            distinct = len(ordered)
+            lo, hi = (ordered[0], ordered[-1]) if ordered else (None, None)
+            values = json.dumps(ordered) if distinct <= MAX_CATEGORY_VALUES else None
+        else:
+            if rem_lo is not None and lo is not None and _sqlite_order(rem_lo) <= _sqlite_order(lo):
+                lo = _reread_extreme(conn, table, [], [], name, lo, "MIN")
+            if rem_hi is not None and hi is not None and _sqlite_order(rem_hi) >= _sqlite_order(hi):
+                hi = _reread_extreme(conn, table, [], [], name, hi, "MAX")
+            lo, hi = _extreme(min, lo, add_lo), _extreme(max, hi, add_hi)
+        rows.append((nulls + d_nulls, lo, hi, distinct, values, position))
+
+    conn.executemany(
+        f'UPDATE "{STATS_TABLE}" SET null_count = ?, min = ?, max = ?, distinct_count = ?, "values" = ? '
+        f'WHERE position = ?;', rows
+    )
+    return int(row_count) + delta[0]
+
+
+def read_meta(db_path: Path) -> dict:
+    """ingest_meta of an existing database ({} if missing or built without it)."""
+    if not Path(db_path).exists():
+        return {}
+    conn = sqlite3.connect(f"{Path(db_path).as_uri()}?mode=ro", uri=True)
+    try:
+        return dict(conn.execute(f'SELECT key, value FROM "{META_TABLE}";').fetchall())
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+
+
+def write_meta(conn: sqlite3.Connection, values: dict) -> None:
+    conn.execute(f'CREATE TABLE IF NOT EXISTS "{META_TABLE}" (key TEXT PRIMARY KEY, value);')
+    conn.executemany(f'INSERT OR REPLACE INTO "{META_TABLE}" (key, value) VALUES (?, ?);', list(values.items()))
+
+
+def typed_row_hash(row: tuple) -> int:
+    """row_hash of an already-typed row (as its CSV export would read)."""
+    return row_hash(["" if v is None else str(v) for v in row])
+
+
+def write_database(header: list, types: list, chunks, db_path: Path = DB_PATH,
+                   table: str = TABLE_NAME, source: str = "") -> dict:
+    """
+    Write a fresh database from chunks of (typed rows, row hashes or None) and
+    atomically replace db_path. Shared by the CSV load and the synthetic
+    workforce generator (src/bench/synth_workforce.py).
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_name(f"{db_path.name}.tmp-{os.getpid()}")
+    tmp_path.unlink(missing_ok=True)
+    version = int(read_meta(db_path).get("data_version", 0)) + 1
+    key = header.index(KEY_COLUMN) if KEY_COLUMN in header else None
+
+    start = time.perf_counter()
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # Private file until the swap: no journal/fsync needed while loading
+        conn.execute("PRAGMA journal_mode = OFF;")
+        conn.execute("PRAGMA synchronous = OFF;")
+        conn.execute("PRAGMA cache_size = -262144;")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+
+        placeholders = ", ".join("?" for _ in header)
+        insert = f'INSERT INTO "{table}" VALUES ({placeholders});'
+        rows = 0
+        with conn:  # one transaction for the whole load
+            create_table(conn, table, header, types)
+            conn.execute(f'CREATE TABLE "{HASH_TABLE}" (key PRIMARY KEY, hash INTEGER NOT NULL);')
+            hashed = True
+            for typed, hashes in chunks:
+                conn.executemany(insert, typed)
+                if hashes is None:
+                    hashed = False
+                elif key is not None:
+                    conn.executemany(
+                        f'INSERT OR REPLACE INTO "{HASH_TABLE}" VALUES (?, ?);',
+                        [(t[key], h) for t, h in zip(typed, hashes) if t[key] is not None],
+                    )
+                rows += len(typed)
+            indexed, unique = build_indexes(conn, table, header)
+            cube_rows = build_cube(conn, table, header, types)
+            row_count = build_column_stats(conn, table, header)
+            if not unique or not hashed:
+                # Without a unique key (or hashes) there is nothing to diff against
+                conn.execute(f'DROP TABLE "{HASH_TABLE}";')
+            write_meta(conn, {
+                "data_version": version, "mode": "full", "source": source,
+                "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S"), "rows": rows,
+                "inserted": rows, "updated": 0, "deleted": 0, "row_count": row_count,
+            })
+        conn.execute("ANALYZE;")
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    conn.close()
+
+    os.replace(tmp_path, db_path)
+    return {
+        "mode": "full",
+        "rows": rows,
+        "columns": header,
+        "types": dict(zip(header, types)),
+        "indexed": indexed,
+        "cube_rows": cube_rows,
+        "data_version": version,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def build_database(csv_path: Path, db_path: Path = DB_PATH, table: str = TABLE_NAME) -> dict:
+    """Load csv_path into a fresh database file and atomically replace db_path."""
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [clean_column(c) for c in next(reader)]
+        sample = list(itertools.islice(reader, SAMPLE_ROWS))
+        types = infer_types(header, sample)
+        convert = row_converter(types)
+        chunks = (
+            ([convert(row) for row in chunk], [row_hash(row) for row in chunk])
+            for chunk in _chunks(itertools.chain(sample, reader), CHUNK_ROWS)
+        )
+        return write_database(header, types, chunks, db_path, table, source=Path(csv_path).name)
+
+
+def _existing_hashes(conn: sqlite3.Connection, keys: list) -> dict:
+    found = {}
+    for i in range(0, len(keys), KEY_BATCH):
+        batch = keys[i:i + KEY_BATCH]
+        found.update(conn.execute(
+            f'SELECT key, hash FROM "{HASH_TABLE}" WHERE key IN ({", ".join("?" for _ in batch)});', batch
+        ).fetchall())
+    return found
+
+
+def apply_delta(csv_path: Path, db_path: Path = DB_PATH, table: str = TABLE_NAME) -> dict:
+    """
+    Diff csv_path against the current table by EmployeeNumber and apply only
+    the changed rows in place, adjusting the cube and column stats from the
+    old/new images of those rows. Falls back to a full build when the
+    database has no row hashes yet or the CSV columns changed.
+    """
+    db_path = Path(db_path)
+    meta = read_meta(db_path)
+    if "data_version" not in meta:
+        return build_database(csv_path, db_path, table)
+
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        info = conn.execute(f'PRAGMA table_info("{table}");').fetchall()
+        has_hashes = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (HASH_TABLE,)
+        ).fetchone()
+        with open(csv_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = [clean_column(c) for c in next(reader)]
+            columns = [row[1] for row in info]
+            if header != columns or not has_hashes:
+                conn.close()
+                print("Columns changed or no row hashes - running a full load")
+                return build_database(csv_path, db_path, table)
+
+            types = [row[2] for row in info]
+            convert = row_converter(types)
+            key = header.index(KEY_COLUMN)
+            key_of = _converter(types[key])
+            insert = f'INSERT INTO "{table}" VALUES ({", ".join("?" for _ in header)});'
+            assignments = ", ".join(f'"{c}" = ?' for c in header)
+            update = f'UPDATE "{table}" SET {assignments} WHERE "{KEY_COLUMN}" = ?;'
+            counts = {"rows": 0, "inserted": 0, "updated": 0, "deleted": 0, "skipped": 0, "cube_rows": None}
+
+            conn.execute("CREATE TEMP TABLE seen_keys (key PRIMARY KEY);")
+            conn.execute(f'CREATE TEMP TABLE delta_rows AS SELECT *, 0 AS delta_sign FROM "{table}" WHERE 0;')
+            with conn:  # one transaction: readers see the old or the new data, never a mix
+                for chunk in _chunks(reader, CHUNK_ROWS):
+                    # Only the key is converted up front; unchanged rows are never typed
+                    keys = [key_of(row[key]) if len(row) > key else None for row in chunk]
+                    existing = _existing_hashes(conn, [k for k in keys if k is not None])
+                    inserts, updates, new_hashes = [], [], []
+                    for row, k in zip(chunk, keys):
+                        if k is None:
+                            counts["skipped"] += 1
+                            continue
+                        h = row_hash(row)
+                        old = existing.get(k)
+                        if old is None:
+                            inserts.append(convert(row))
+                        elif old != h:
+                            updates.append(convert(row) + (k,))
+                        else:
+                            continue
+                        existing[k] = h  # repeated keys in the CSV: last row wins
+                        new_hashes.append((k, h))
+                    conn.executemany("INSERT OR IGNORE INTO temp.seen_keys VALUES (?);", [(k,) for k in keys if k is not None])
+                    # Old images before, new images after (distinct keys: a key may repeat in the chunk)
+                    inserted = {row[key] for row in inserts}
+                    updated = list(dict.fromkeys(row[-1] for row in updates))
+                    _capture_rows(conn, table, [k for k in updated if k not in inserted], -1)
+                    conn.executemany(insert, inserts)
+                    conn.executemany(update, updates)
+                    _capture_rows(conn, table, list(inserted.union(updated)), 1)
+                    conn.executemany(f'INSERT OR REPLACE INTO "{HASH_TABLE}" VALUES (?, ?);', new_hashes)
+                    counts["rows"] += len(chunk)
+                    counts["inserted"] += len(inserts)
+                    counts["updated"] += len(updates)
+
+                gone = f'"{KEY_COLUMN}" NOT IN (SELECT key FROM temp.seen_keys)'
+                conn.execute(f'INSERT INTO temp.delta_rows SELECT *, -1 FROM "{table}" WHERE {gone};')
+                counts["deleted"] = conn.execute(f'DELETE FROM "{table}" WHERE {gone};').rowcount
+                conn.execute(f'DELETE FROM "{HASH_TABLE}" WHERE key NOT IN (SELECT key FROM temp.seen_keys);')
+
+                changed = counts["inserted"] + counts["updated"] + counts["deleted"]
+                version = int(meta["data_version"]) + (1 if changed else 0)
+                if changed:
+                    counts["cube_rows"] = update_cube(conn, table, header, types)
+                    row_count = update_column_stats(conn, table, header, meta.get("row_count"))
+                    write_meta(conn, {
+                        "data_version": version, "mode": "delta", "source": Path(csv_path).name,
+                        "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S"), "rows": counts["rows"] - counts["skipped"],
+                        "inserted": counts["inserted"], "updated": counts["updated"], "deleted": counts["deleted"],
+                        "row_count": row_count,
+                    })
+            if changed:
+                conn.execute("PRAGMA optimize;")
+    finally:
+        conn.close()
+
+    return {
+        "mode": "delta",
+        **counts,
+        "columns": header,
+        "data_version": version,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Load the HR CSV into db/hr.sqlite")
+    parser.add_argument("csv", nargs="?", help="CSV file (default: first CSV in data/raw)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="apply only inserted/updated/deleted employees (by EmployeeNumber)")
+    args = parser.parse_args()
+
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     (PROJECT_ROOT / "db").mkdir(exist_ok=True)
 
-    csv_path = find_csv()
+    csv_path = Path(args.csv) if args.csv else find_csv()
     print("Using CSV:", csv_path.name)
 
-    df = pd.read_csv(csv_path)
-
-    # Clean column names for SQL safety
-    df.columns = [c.strip().replace(" ", "_").replace("-", "_") for c in df.columns]
-
-    engine = create_engine(f"sqlite:///{DB_PATH}")
-    df.to_sql(TABLE_NAME, con=engine, if_exists="replace", index=False)
+    if args.incremental:
+        stats = apply_delta(csv_path, DB_PATH, TABLE_NAME)
+    else:
+        stats = build_database(csv_path, DB_PATH, TABLE_NAME)
 
     print("SQLite DB:", DB_PATH)
     print("Table:", TABLE_NAME)
-    print("Rows:", len(df), "Cols:", len(df.columns))
-    print("Columns:", list(df.columns)[:10], "...")
+    print("Rows:", stats["rows"], "Cols:", len(stats["columns"]))
+    if stats["mode"] == "full":
+        print("Columns:", stats["columns"][:10], "...")
+        print("Indexed:", ", ".join(stats["indexed"]) or "-")
+    else:
+        print(f"Delta: +{stats['inserted']} inserted, ~{stats['updated']} updated, "
+              f"-{stats['deleted']} deleted" + (f", {stats['skipped']} rows without {KEY_COLUMN} skipped" if stats["skipped"] else ""))
+    if stats["cube_rows"] is not None:
+        print("Summary cube rows:", stats["cube_rows"])
+    print("Data version:", stats["data_version"])
+    print(f"Loaded in {stats['seconds']}s")
 
 
 if __name__ == "__main__":
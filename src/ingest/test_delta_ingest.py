@@ -0,0 +1,107 @@
+"""
+Check of the incremental ingest (load_to_sqlite.py --incremental) on a
+scratch copy of the HR CSV: one employee added, one changed, one removed.
+
+The delta must report +1/~1/-1, leave the table, the summary cube and the
+column stats equal to a full load of the new CSV (the removed employee has
+the top MonthlyIncome, the added one a new Department; distinct counts of
+columns without a value list are kept from the last full load), and bump
+data_version once; re-applying the same CSV must change nothing:
+
+    python -m src.ingest.test_delta_ingest
+"""
+
+import csv
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from src.ingest.load_to_sqlite import (
+    CUBE_TABLE, KEY_COLUMN, STATS_TABLE, TABLE_NAME, apply_delta, build_database, find_csv, read_meta,
+)
+
+
+def write_csv(path: Path, header: list, rows: list) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def table_rows(db_path: Path, table: str = TABLE_NAME) -> list:
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(conn.execute(f'SELECT * FROM "{table}";').fetchall(), key=repr)
+    finally:
+        conn.close()
+
+
+def column_stats(db_path: Path) -> list:
+    return [row[:5] + (row[5] if row[6] is not None else None, row[6]) for row in table_rows(db_path, STATS_TABLE)]
+
+
+def scalar(db_path: Path, sql: str):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main():
+    with open(find_csv(), newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = list(reader)
+    key = header.index(KEY_COLUMN)
+    income = header.index("MonthlyIncome")
+    department = header.index("Department")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_path, old_csv, new_csv = tmp / "hr.sqlite", tmp / "old.csv", tmp / "new.csv"
+        write_csv(old_csv, header, rows)
+        build_database(old_csv, db_path)
+        version = int(read_meta(db_path)["data_version"])
+        print("[test] full load, data_version", version)
+
+        added = list(rows[0])
+        added[key] = str(max(int(r[key]) for r in rows) + 1)
+        added[department] = "Legal"
+        changed = list(rows[1])
+        changed[income] = str(int(changed[income]) + 1000)
+        top = max(range(2, len(rows)), key=lambda i: int(rows[i][income]))
+        new_rows = [rows[0], changed] + rows[2:top] + rows[top + 1:] + [added]
+        write_csv(new_csv, header, new_rows)
+
+        stats = apply_delta(new_csv, db_path)
+        print(f"[test] delta: +{stats['inserted']} ~{stats['updated']} -{stats['deleted']}, "
+              f"data_version {stats['data_version']}")
+        assert (stats["inserted"], stats["updated"], stats["deleted"]) == (1, 1, 1)
+        assert stats["data_version"] == version + 1
+        assert int(read_meta(db_path)["data_version"]) == version + 1
+
+        full_path = tmp / "full.sqlite"
+        build_database(new_csv, full_path)
+        assert table_rows(db_path) == table_rows(full_path), "delta and full load differ"
+        assert table_rows(db_path, CUBE_TABLE) == table_rows(full_path, CUBE_TABLE), "cube differs"
+        assert column_stats(db_path) == column_stats(full_path), "column stats differ"
+        print("[test] cube and column stats match a full load")
+
+        cube_total = f"SELECT n FROM {CUBE_TABLE} WHERE grouping = '';"
+        assert scalar(db_path, cube_total) == len(new_rows)
+        assert int(read_meta(db_path)["row_count"]) == len(new_rows)
+        max_income = scalar(db_path, "SELECT max FROM column_stats WHERE name = 'MonthlyIncome';")
+        assert max_income == scalar(db_path, f"SELECT MAX(MonthlyIncome) FROM {TABLE_NAME};")
+
+        stats = apply_delta(new_csv, db_path)
+        print(f"[test] same CSV again: +{stats['inserted']} ~{stats['updated']} -{stats['deleted']}, "
+              f"data_version {stats['data_version']}")
+        assert (stats["inserted"], stats["updated"], stats["deleted"]) == (0, 0, 0)
+        assert int(read_meta(db_path)["data_version"]) == version + 1
+
+    print("[test] OK")
+
+
+if __name__ == "__main__":
+    main()
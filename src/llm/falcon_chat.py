@@ -37,40 +37,259 @@ def falcon_chat(prompt: str, system_prompt: str = None) -> str:
     out = llm(full_prompt, max_tokens=220, temperature=0.3)
     return out["choices"][0]["text"].strip()
     '''
+import os
+import threading
+import time
+from multiprocessing import AuthenticationError
 from pathlib import Path
-from llama_cpp import Llama
+from llama_cpp import Llama, LlamaGrammar
+
+from src.chat.telemetry import observe, record_tokens, span
+from src.llm.falcon_tuning import (
+    BATCH_CANDIDATES, N_CTX, calibrate_batch, default_threads, env_overrides,
+    load_cached_settings, save_settings,
+)
+from src.llm.falcon_prefix_cache import use_prefix
+from src.llm.falcon_server import (
+    PRIORITY_INTERACTIVE, remote_complete, remote_status, remote_stream, server_available,
+)
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 MODEL_PATH = PROJECT_ROOT / "models" / "falcon-local.gguf"
 
 _llm = None
+_lock = threading.Lock()
+# idle -> loading -> (calibrating) -> ready | missing | error
+_status = {"state": "idle", "error": None, "settings": None, "load_seconds": None}
+
+
+def _load_llm() -> Llama:
+    start = time.perf_counter()
+    _status["state"] = "loading"
+
+    cached = load_cached_settings(MODEL_PATH) or {}
+    settings = {"n_threads": default_threads(), **cached, **env_overrides()}
+    calibrate = "n_batch" not in settings
+
+    llm = Llama(
+        model_path=str(MODEL_PATH),
+        n_ctx=N_CTX,
+        n_threads=settings["n_threads"],
+        n_batch=max(BATCH_CANDIDATES) if calibrate else settings["n_batch"],
+        verbose=False
+    )
+
+    if calibrate:
+        _status["state"] = "calibrating"
+        settings["n_batch"], timings = calibrate_batch(llm)
+        print(f"[falcon] n_batch calibration (s): {timings} -> {settings['n_batch']}")
+        save_settings(MODEL_PATH, {"n_threads": settings["n_threads"], "n_batch": settings["n_batch"]})
+
+    # Evaluate (or restore from disk) the fixed prompt prefixes up front
+    for prefix in primed_prefixes():
+        use_prefix(llm, MODEL_PATH, prefix)
+
+    _status.update(state="ready", settings=settings, load_seconds=round(time.perf_counter() - start, 2))
+    print(f"[falcon] model ready in {_status['load_seconds']}s with {settings}")
+    return llm
+
 
 def get_llm():
     global _llm
     if _llm is None:
-        _llm = Llama(
-            model_path=str(MODEL_PATH),
-            n_ctx=2048,
-            n_threads=8,
-            n_batch=128,
-            verbose=False
-        )
+        # A background warm-up may already hold the lock; wait for it
+        with _lock:
+            if _llm is None:
+                try:
+                    _llm = _load_llm()
+                except Exception as e:
+                    _status.update(state="error", error=str(e))
+                    raise
     return _llm
 
-def falcon_chat(prompt: str, system_prompt: str = None) -> str:
+
+def _warmup():
+    try:
+        get_llm()
+    except Exception as e:
+        print(f"[falcon] warm-up failed: {e}")
+
+
+def _start_local_warmup() -> bool:
+    if _llm is not None or _status["state"] in ("loading", "calibrating"):
+        return False
+    if not MODEL_PATH.exists():
+        _status["state"] = "missing"
+        return False
+    _status["state"] = "loading"
+    threading.Thread(target=_warmup, name="falcon-warmup", daemon=True).start()
+    return True
+
+
+def local_status() -> dict:
+    return {**_status, "backend": "in-process"}
+
+
+def model_status() -> dict:
+    """Readiness of the local model for the UI."""
+    if _use_server():
+        try:
+            return remote_status()
+        except (OSError, EOFError, AuthenticationError) as e:
+            return {"state": "error", "error": f"falcon server unreachable: {e}", "backend": "server"}
+    return local_status()
+
+
+_vocab = None  # vocab-only Llama (tokenizer, no weights); False if unavailable
+_vocab_lock = threading.Lock()
+
+
+def count_tokens(text: str) -> int | None:
+    """Exact Falcon token count of text, or None when the GGUF is not available."""
+    global _vocab
+    if _vocab is None:
+        with _vocab_lock:
+            if _vocab is None:
+                try:
+                    _vocab = Llama(model_path=str(MODEL_PATH), vocab_only=True, verbose=False)
+                except Exception:
+                    _vocab = False
+    if not _vocab:
+        return None
+    return len(_vocab.tokenize(text.encode("utf-8"), add_bos=False))
+
+
+# =========================
+# Backend selection
+# =========================
+# in-process: load the model here (one copy per Streamlit process)
+# server:     always use src.llm.falcon_server
+# auto:       use the server when it is reachable, else in-process
+FALCON_BACKEND = os.getenv("FALCON_BACKEND", "auto").lower()
+DEFAULT_SYSTEM_PROMPT = "You are a professional HR consultant. Answer clearly and briefly."
+GENERATION_PARAMS = {"max_tokens": 220, "temperature": 0.3}
+
+# Serializes generation on the in-process Llama object across sessions
+_generate_lock = threading.Lock()
+
+
+def _use_server() -> bool:
+    if FALCON_BACKEND == "server":
+        return True
+    if FALCON_BACKEND == "auto":
+        return server_available()
+    return False
+
+
+_grammars = {}
+
+
+def llama_kwargs(params: dict) -> dict:
+    """
+    Sampling params (plain, picklable dict) -> Llama.__call__ kwargs.
+    A "grammar" entry is GBNF text; it is compiled once per distinct text.
+    """
+    kwargs = dict(params)
+    if kwargs.get("grammar"):
+        text = kwargs["grammar"]
+        if text not in _grammars:
+            _grammars.clear()  # one catalog at a time
+            _grammars[text] = LlamaGrammar.from_string(text, verbose=False)
+        kwargs["grammar"] = _grammars[text]
+    return kwargs
+
+
+def _chat_prefix(system_prompt: str) -> str:
+    return f"{system_prompt}\n\n"
+
+
+def primed_prefixes() -> list:
+    """Prompt prefixes evaluated at load time (chat system prompt, SQL header)."""
+    from src.llm.sql_prompt import SQL_PROMPT_HEADER
+    return [_chat_prefix(DEFAULT_SYSTEM_PROMPT), SQL_PROMPT_HEADER]
+
+
+def falcon_complete(full_prompt: str, params: dict, priority: int = PRIORITY_INTERACTIVE,
+                    prefix: str = None) -> str:
+    """Raw completion of full_prompt; `prefix` is its cacheable fixed start."""
+    grammar = bool(params.get("grammar"))
+    if _use_server():
+        with span("llm_call", provider="falcon", backend="server", grammar=grammar):
+            return remote_complete(full_prompt, params, priority, prefix)
+    with span("llm_call", provider="falcon", backend="local", grammar=grammar):
+        llm = get_llm()
+        with _generate_lock:
+            use_prefix(llm, MODEL_PATH, prefix)
+            out = llm(full_prompt, **llama_kwargs(params))
+        usage = out.get("usage") or {}
+        record_tokens("falcon", usage.get("prompt_tokens"), usage.get("completion_tokens"))
+    return out["choices"][0]["text"]
+
+
+def _local_stream(full_prompt: str, params: dict, prefix: str = None):
+    llm = get_llm()
+    with _generate_lock:
+        use_prefix(llm, MODEL_PATH, prefix)
+        for chunk in llm(full_prompt, stream=True, **llama_kwargs(params)):
+            yield chunk["choices"][0]["text"]
+
+
+def _stream(full_prompt: str, params: dict, priority: int, prefix: str = None):
+    backend = "server" if _use_server() else "local"
+    if backend == "server":
+        texts = remote_stream(full_prompt, params, priority, prefix)
+    else:
+        texts = _local_stream(full_prompt, params, prefix)
+    with span("llm_stream", provider="falcon", backend=backend) as s:
+        start, chunks = time.perf_counter(), 0
+        for text in texts:
+            if not chunks:
+                observe("hr_llm_first_token_seconds", time.perf_counter() - start, provider="falcon")
+                s.set(first_token_ms=round((time.perf_counter() - start) * 1000, 1))
+            chunks += 1  # llama.cpp streams one token per chunk
+            yield text
+        record_tokens("falcon", None, chunks)
+
+
+def start_warmup() -> bool:
+    """Load the model in a background thread (no-op if loaded, loading, missing or served remotely)."""
+    if _use_server():
+        return False
+    return _start_local_warmup()
+
+
+def falcon_chat(prompt: str, system_prompt: str = None, priority: int = PRIORITY_INTERACTIVE) -> str:
     """
     Chat with local Falcon model
     
     Args:
         prompt: User's message
         system_prompt: Optional system instructions
+        priority: Queue priority on the inference server (lower runs first)
     """
-    llm = get_llm()
-    
     # Default system prompt if not provided
     if system_prompt is None:
-        system_prompt = "You are a professional HR consultant. Answer clearly and briefly."
+        system_prompt = DEFAULT_SYSTEM_PROMPT
     
-    full_prompt = f"{system_prompt}\n\nQuestion: {prompt}\n\nAnswer:"
-    out = llm(full_prompt, max_tokens=220, temperature=0.3)
-    return out["choices"][0]["text"].strip()
+    prefix = _chat_prefix(system_prompt)
+    full_prompt = f"{prefix}Question: {prompt}\n\nAnswer:"
+    return falcon_complete(full_prompt, GENERATION_PARAMS, priority, prefix).strip()
+
+
+def falcon_chat_stream(prompt: str, system_prompt: str = None, priority: int = PRIORITY_INTERACTIVE):
+    """
+    Streaming variant of falcon_chat: yields text as llama.cpp decodes it.
+    """
+    if system_prompt is None:
+        system_prompt = DEFAULT_SYSTEM_PROMPT
+
+    prefix = _chat_prefix(system_prompt)
+    full_prompt = f"{prefix}Question: {prompt}\n\nAnswer:"
+    started = False
+    for text in _stream(full_prompt, GENERATION_PARAMS, priority, prefix):
+        if not started:
+            # match falcon_chat's .strip() on the leading side
+            text = text.lstrip()
+            started = bool(text)
+        if text:
+            yield text
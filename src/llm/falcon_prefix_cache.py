@@ -0,0 +1,128 @@
+"""
+KV-cache reuse for fixed prompt prefixes on the local Falcon path.
+
+The HR system prompt and the SQL prompt header are the same on every turn.
+Their llama.cpp state is evaluated once, kept in memory and saved under
+models/kv_cache/ keyed by a model fingerprint, so a restart restores it
+instead of re-running the prefill. Before a generation the prefix state is
+loaded (unless the context already starts with it) and llama.cpp only
+evaluates the rest of the prompt.
+
+FALCON_PREFIX_CACHE=0 turns it off.
+"""
+
+import hashlib
+import os
+import pickle
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from src.llm.falcon_tuning import N_CTX
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+CACHE_DIR = PROJECT_ROOT / "models" / "kv_cache"
+
+ENABLED = os.getenv("FALCON_PREFIX_CACHE", "1") != "0"
+MAX_IN_MEMORY = 4  # prefix states kept in RAM
+MIN_PREFIX_TOKENS = 8  # not worth a state copy below this
+
+_states = OrderedDict()  # key -> (tokens, LlamaState)
+_fingerprints = {}
+_stats = {"hits": 0, "disk_loads": 0, "builds": 0, "already_loaded": 0}
+
+
+def model_fingerprint(model_path: Path) -> str:
+    """Size + mtime + hash of the first MiB; cheap but changes with the model file."""
+    model_path = Path(model_path)
+    st = model_path.stat()
+    key = (str(model_path), st.st_size, int(st.st_mtime))
+    if key not in _fingerprints:
+        h = hashlib.sha1(f"{st.st_size}|{int(st.st_mtime)}".encode())
+        with open(model_path, "rb") as f:
+            h.update(f.read(1 << 20))
+        _fingerprints[key] = h.hexdigest()[:16]
+    return _fingerprints[key]
+
+
+def _key(model_path: Path, prefix: str) -> str:
+    digest = hashlib.sha1(f"{N_CTX}|{prefix}".encode("utf-8")).hexdigest()[:16]
+    return f"{model_fingerprint(model_path)}-{digest}"
+
+
+def _remember(key: str, tokens: list, state) -> None:
+    _states[key] = (tokens, state)
+    _states.move_to_end(key)
+    while len(_states) > MAX_IN_MEMORY:
+        _states.popitem(last=False)
+
+
+def _load_from_disk(key: str):
+    path = CACHE_DIR / f"{key}.state"
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def _save_to_disk(key: str, tokens: list, state) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / f"{key}.state"
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump((tokens, state), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[falcon] could not save prefix state: {e}")
+        tmp.unlink(missing_ok=True)
+
+
+def _context_starts_with(llm, tokens: list) -> bool:
+    n = len(tokens)
+    return llm.n_tokens >= n and list(llm.input_ids[:n]) == tokens
+
+
+def use_prefix(llm, model_path: Path, prefix: str) -> None:
+    """
+    Make llm's context start with the evaluated prefix. Call under the
+    generation lock, right before llm(prompt) with a prompt starting with prefix.
+    """
+    if not ENABLED or not prefix:
+        return
+    key = _key(model_path, prefix)
+
+    if key in _states:
+        tokens, state = _states[key]
+        _states.move_to_end(key)
+        if _context_starts_with(llm, tokens):
+            _stats["already_loaded"] += 1
+            return
+        llm.load_state(state)
+        _stats["hits"] += 1
+        return
+
+    cached = _load_from_disk(key)
+    if cached is not None:
+        tokens, state = cached
+        llm.load_state(state)
+        _remember(key, tokens, state)
+        _stats["disk_loads"] += 1
+        return
+
+    tokens = llm.tokenize(prefix.encode("utf-8"))
+    if len(tokens) < MIN_PREFIX_TOKENS:
+        return
+    start = time.perf_counter()
+    llm.reset()
+    llm.eval(tokens)
+    state = llm.save_state()
+    _remember(key, tokens, state)
+    _save_to_disk(key, tokens, state)
+    _stats["builds"] += 1
+    print(f"[falcon] cached {len(tokens)}-token prompt prefix in {time.perf_counter() - start:.2f}s")
+
+
+def prefix_cache_stats() -> dict:
+    return {**_stats, "in_memory": len(_states)}
@@ -0,0 +1,268 @@
+"""
+Local inference server for the Falcon GGUF model.
+
+One process owns a single memory-mapped model and serves every Streamlit
+session/worker over a local socket, so Falcon memory is paid once per host
+and concurrent requests are queued instead of racing on one Llama object.
+
+- requests are served in priority order (lower value first, FIFO within a level)
+- identical queued requests (same prompt + sampling params) are coalesced
+  into one evaluation and the result is fanned out to every caller
+- consecutive requests reuse llama.cpp's KV cache for their shared prefix
+  (the system prompt), so the queue is the batching point on CPU
+
+Run it with:
+    python -m src.llm.falcon_server
+
+and point the app at it with FALCON_BACKEND=server (or leave the default
+"auto", which uses the server whenever it is reachable).
+
+Connections are authenticated with FALCON_SERVER_KEY when it is set.
+Otherwise the server creates a random key in FALCON_SERVER_KEY_FILE
+(default db/falcon_server.key, mode 0600) and clients on the same host
+read it from there; a key file other users can read is refused.
+"""
+
+import itertools
+import os
+import queue
+import secrets
+import stat
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+from src.llm.falcon_prefix_cache import prefix_cache_stats, use_prefix
+
+HOST = os.getenv("FALCON_SERVER_HOST", "127.0.0.1")
+PORT = int(os.getenv("FALCON_SERVER_PORT", "8799"))
+ADDRESS = (HOST, PORT)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+KEY_FILE = Path(os.getenv("FALCON_SERVER_KEY_FILE", PROJECT_ROOT / "db" / "falcon_server.key"))
+
+PRIORITY_INTERACTIVE = 0  # insight / advice / SQL the user is waiting on (lower runs first)
+
+_DONE = object()
+
+
+def _read_key_file() -> bytes:
+    mode = KEY_FILE.stat().st_mode
+    if mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise PermissionError(f"{KEY_FILE} is readable by other users (chmod 600 it)")
+    return KEY_FILE.read_bytes().strip()
+
+
+def server_authkey() -> bytes:
+    """FALCON_SERVER_KEY, else the key file (created with a random key on first use)."""
+    if os.getenv("FALCON_SERVER_KEY"):
+        return os.environ["FALCON_SERVER_KEY"].encode("utf-8")
+    KEY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return _read_key_file()
+    with os.fdopen(fd, "w") as f:
+        f.write(secrets.token_hex(32))
+    return _read_key_file()
+
+
+def client_authkey() -> bytes:
+    """FALCON_SERVER_KEY, else the server's key file (OSError while no server has created it)."""
+    if os.getenv("FALCON_SERVER_KEY"):
+        return os.environ["FALCON_SERVER_KEY"].encode("utf-8")
+    return _read_key_file()
+
+
+class _Job:
+    def __init__(self, prompt: str, params: dict, stream: bool, prefix: str = None):
+        self.prompt = prompt
+        self.prefix = prefix
+        self.params = params
+        self.stream = stream
+        self.out = queue.Queue()  # text chunks, then _DONE (or an Exception)
+
+    @property
+    def key(self):
+        return self.prompt, tuple(sorted(self.params.items()))
+
+
+class InferenceServer:
+    def __init__(self, address=ADDRESS, authkey: bytes = None):
+        self.address = address
+        self.authkey = authkey or server_authkey()
+        self.jobs = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self.served = 0
+        self.coalesced = 0
+        self.started = time.time()
+
+    # ---- model worker (the only thread that touches the Llama object) ----
+
+    def _take_batch(self) -> list:
+        _, _, job = self.jobs.get()
+        batch = [job]
+        # Coalesce queued duplicates of the same request
+        held = []
+        while True:
+            try:
+                item = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if item[2].key == job.key:
+                batch.append(item[2])
+            else:
+                held.append(item)
+        for item in held:
+            self.jobs.put(item)
+        return batch
+
+    def _run(self, batch: list) -> None:
+        from src.llm.falcon_chat import MODEL_PATH, get_llm, llama_kwargs
+
+        job = batch[0]
+        llm = get_llm()
+        kwargs = llama_kwargs(job.params)
+        use_prefix(llm, MODEL_PATH, job.prefix)
+        if any(j.stream for j in batch):
+            for chunk in llm(job.prompt, stream=True, **kwargs):
+                text = chunk["choices"][0]["text"]
+                for j in batch:
+                    j.out.put(text)
+        else:
+            text = llm(job.prompt, **kwargs)["choices"][0]["text"]
+            for j in batch:
+                j.out.put(text)
+
+    def worker(self) -> None:
+        while True:
+            batch = self._take_batch()
+            try:
+                self._run(batch)
+                for j in batch:
+                    j.out.put(_DONE)
+            except Exception as e:
+                for j in batch:
+                    j.out.put(e)
+            self.served += len(batch)
+            self.coalesced += len(batch) - 1
+
+    # ---- connections ----
+
+    def status(self) -> dict:
+        from src.llm.falcon_chat import local_status
+        return {
+            **local_status(),
+            "backend": "server",
+            "queued": self.jobs.qsize(),
+            "served": self.served,
+            "coalesced": self.coalesced,
+            "prefix_cache": prefix_cache_stats(),
+            "uptime": round(time.time() - self.started, 1),
+        }
+
+    def handle(self, conn) -> None:
+        try:
+            while True:
+                request = conn.recv()
+                if request.get("op") == "status":
+                    conn.send({"ok": True, "status": self.status()})
+                    continue
+
+                job = _Job(request["prompt"], request.get("params", {}), request.get("stream", False),
+                           request.get("prefix"))
+                self.jobs.put((request.get("priority", PRIORITY_INTERACTIVE), next(self._seq), job))
+                while True:
+                    item = job.out.get()
+                    if item is _DONE:
+                        conn.send({"ok": True, "done": True})
+                        break
+                    if isinstance(item, Exception):
+                        conn.send({"ok": False, "error": str(item)})
+                        break
+                    conn.send({"ok": True, "text": item})
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def serve_forever(self) -> None:
+        from src.llm.falcon_chat import get_llm
+
+        print("[falcon-server] loading model...")
+        get_llm()
+        threading.Thread(target=self.worker, name="falcon-worker", daemon=True).start()
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(f"[falcon-server] listening on {self.address[0]}:{self.address[1]}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError, EOFError) as e:
+                    print(f"[falcon-server] rejected connection: {e}")
+                    continue
+                threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+
+# =========================
+# Client side
+# =========================
+
+_available = {"value": None, "checked": 0.0}
+AVAILABILITY_TTL = 10.0  # seconds between reachability probes
+
+
+def _connect():
+    return Client(ADDRESS, authkey=client_authkey())
+
+
+def server_available() -> bool:
+    """Is a falcon_server reachable? (cached for AVAILABILITY_TTL seconds)"""
+    now = time.time()
+    if _available["value"] is None or now - _available["checked"] > AVAILABILITY_TTL:
+        try:
+            with _connect() as conn:
+                conn.send({"op": "status"})
+                _available["value"] = bool(conn.recv().get("ok"))
+        except (OSError, EOFError, AuthenticationError):
+            _available["value"] = False
+        _available["checked"] = now
+    return _available["value"]
+
+
+def remote_status() -> dict:
+    with _connect() as conn:
+        conn.send({"op": "status"})
+        return conn.recv()["status"]
+
+
+def remote_stream(prompt: str, params: dict, priority: int = PRIORITY_INTERACTIVE, prefix: str = None):
+    """Yield text chunks for prompt from the server."""
+    with _connect() as conn:
+        conn.send({"prompt": prompt, "params": params, "priority": priority, "stream": True, "prefix": prefix})
+        while True:
+            reply = conn.recv()
+            if not reply["ok"]:
+                raise RuntimeError(f"falcon server: {reply['error']}")
+            if reply.get("done"):
+                return
+            yield reply["text"]
+
+
+def remote_complete(prompt: str, params: dict, priority: int = PRIORITY_INTERACTIVE, prefix: str = None) -> str:
+    with _connect() as conn:
+        conn.send({"prompt": prompt, "params": params, "priority": priority, "stream": False, "prefix": prefix})
+        text = ""
+        while True:
+            reply = conn.recv()
+            if not reply["ok"]:
+                raise RuntimeError(f"falcon server: {reply['error']}")
+            if reply.get("done"):
+                return text
+            text += reply["text"]
+
+
+if __name__ == "__main__":
+    # This process *is* the backend; never route back to a server
+    os.environ["FALCON_BACKEND"] = "in-process"
+    InferenceServer().serve_forever()
@@ -68,98 +68,94 @@ SQL:
 
     return sql
     '''
-from src.chat.sql_runner import run_sql
-from src.chat.schema_reader import get_schema_text
-from src.chat.hr_formatter import format_hr_insight
-from src.llm.falcon_chat import falcon_chat
-from src.llm.falcon_sql import generate_sql  # ← ADD THIS IMPORT
-from src.llm.qroq_client import groq_chat
-
-def fetch_one(sql: str) -> int:
-    _, rows = run_sql(sql)
-    return int(rows[0][0])
-
-def answer_question(question: str, provider: str = "local") -> str:
+"""
+Local Text-to-SQL with grammar-constrained decoding.
+
+The local model decodes under a GBNF grammar for a SELECT-only SQLite
+subset whose identifiers are the real employees columns and whose string
+literals are the real category values, so every completion parses and
+only references existing columns.
+"""
+
+import threading
+
+from src.chat.schema_catalog import SchemaCatalog, get_catalog
+from src.llm.falcon_chat import MODEL_PATH, falcon_complete
+from src.llm.falcon_server import server_available
+from src.llm.sql_prompt import SQL_PROMPT_HEADER, build_sql_prompt
+
+SQL_PARAMS = {"max_tokens": 160, "temperature": 0.0}
+
+# Table/column/value rules are appended per catalog
+GRAMMAR_CORE = r"""
+root        ::= "SELECT " ("DISTINCT ")? select-list " FROM " table where? group? having? order? limit? ";"
+select-list ::= select-item (", " select-item)*
+select-item ::= "*" | expr (" AS " ident)?
+expr        ::= term (" " arith " " term)*
+arith       ::= "+" | "-" | "*" | "/"
+term        ::= column | number | string | agg | func | case | "(" expr ")" | "(" subquery ")"
+subquery    ::= "SELECT " expr " FROM " table where?
+agg         ::= "COUNT(*)" | agg-name "(" ("DISTINCT ")? expr ")"
+agg-name    ::= "COUNT" | "SUM" | "AVG" | "MIN" | "MAX"
+func        ::= "ROUND(" expr (", " [0-9])? ")" | "CAST(" expr " AS " ("REAL" | "INTEGER") ")"
+case        ::= "CASE WHEN " cond " THEN " expr (" ELSE " expr)? " END"
+cond        ::= pred ((" AND " | " OR ") pred)*
+pred        ::= ("NOT ")? (expr " " cmp " " expr | expr " IN (" literal (", " literal)* ")" | expr " BETWEEN " expr " AND " expr | expr " IS " ("NOT ")? "NULL" | "(" cond ")")
+cmp         ::= "=" | "!=" | "<" | "<=" | ">" | ">="
+literal     ::= number | string
+where       ::= " WHERE " cond
+group       ::= " GROUP BY " column (", " column)*
+having      ::= " HAVING " cond
+order       ::= " ORDER BY " order-item (", " order-item)*
+order-item  ::= (expr | ident) (" ASC" | " DESC")?
+limit       ::= " LIMIT " [1-9] [0-9]? [0-9]?
+number      ::= ("-")? [0-9]+ ("." [0-9]+)?
+ident       ::= [a-z_] [a-z0-9_]*
+"""
+
+
+def _gbnf_literal(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def build_sql_grammar(catalog: SchemaCatalog) -> str:
+    """GBNF for GRAMMAR_CORE over this catalog's table, columns and category values."""
+    columns = " | ".join(_gbnf_literal(c) for c in catalog.columns)
+    values = dict.fromkeys(v for vals in catalog.categorical.values() for v in vals if isinstance(v, str))
+    strings = " | ".join(_gbnf_literal("'" + v.replace("'", "''") + "'") for v in values) or "\"''\""
+    return (
+        GRAMMAR_CORE.strip()
+        + f"\ntable       ::= {_gbnf_literal(catalog.table)}"
+        + f"\ncolumn      ::= {columns}"
+        + f"\nstring      ::= {strings}\n"
+    )
+
+
+_grammar = {"version": None, "text": None}
+_grammar_lock = threading.Lock()
+
+
+def sql_grammar() -> str:
+    """Grammar for the current catalog (rebuilt when the database changes)."""
+    catalog = get_catalog()
+    with _grammar_lock:
+        if _grammar["version"] != catalog.version:
+            _grammar.update(version=catalog.version, text=build_sql_grammar(catalog))
+        return _grammar["text"]
+
+
+def local_sql_available() -> bool:
+    return MODEL_PATH.exists() or server_available()
+
+
+def generate_sql(question: str, schema: str, notes: str = "") -> str:
     """
-    Smart router that uses Text-to-SQL for any data question
+    One grammar-constrained completion. `notes` (sample rows, conversation,
+    previous error) goes after the question so the header prefix stays cacheable.
     """
-    q = question.lower()
-    
-    # Check if it's a data question (needs database)
-    data_keywords = [
-        "how many", "count", "total", "average", "show", "list",
-        "employees", "attrition", "salary", "department", "overtime",
-        "what is", "calculate", "find", "get", "display"
-    ]
-    
-    is_data_question = any(keyword in q for keyword in data_keywords)
-    
-#Data question → Use Text-to-SQL
-
-    if is_data_question:
-        try:
-            # Get database schema
-            schema = get_schema_text()
-            
-            # Generate SQL using LLM
-            print(f"[Router] Generating SQL for: {question}")
-            sql = generate_sql(question, schema)
-            print(f"[Router] Generated SQL: {sql}")
-            
-            # Check if SQL generation failed
-            if sql.startswith("--") or "error" in sql.lower():
-                return (
-                    "I couldn't generate a valid SQL query for that question.\n\n"
-                    "Try rephrasing, for example:\n"
-                    "- How many employees are there?\n"
-                    "- What's the average salary by department?"
-                )
-            
-            # Execute SQL
-            cols, rows = run_sql(sql)
-            
-            # Format results
-            if not rows:
-                return "No results found in the database for that query."
-            
-            # Build response
-            response = "**Query Results:**\n\n"
-            
-            # Show SQL (for transparency)
-            response += f"```sql\n{sql}\n```\n\n"
-            
-            # Show data
-            if len(rows) == 1 and len(cols) == 1:
-                # Single value (like COUNT, AVG)
-                response += f"**Answer:** {rows[0][0]}"
-            else:
-                # Multiple rows/columns
-                response += f"**Data ({len(rows)} rows):**\n\n"
-                
-                # Create markdown table
-                response += "| " + " | ".join(cols) + " |\n"
-                response += "|" + "|".join(["---"] * len(cols)) + "|\n"
-                
-                # Add rows (limit to 10)
-                for row in rows[:10]:
-                    response += "| " + " | ".join(str(v) for v in row) + " |\n"
-                
-                if len(rows) > 10:
-                    response += f"\n*Showing first 10 of {len(rows)} rows*\n"
-            
-            return response
-            
-        except Exception as e:
-            return f"Error executing query: {str(e)}\n\nPlease rephrase your question."
-    
-    #  General HR advice question → Use LLM chat
-    else:
-        system_prompt = (
-            "You are a professional HR consultant. "
-            "Provide clear, actionable advice based on HR best practices."
-        )
-        
-        if provider == "groq":
-            return groq_chat(question, system_prompt)
-        else:
-            return falcon_chat(question, system_prompt)
+    prompt = build_sql_prompt(schema, question, notes)
+    params = {**SQL_PARAMS, "grammar": sql_grammar()}
+    print("[falcon] generating SQL (grammar-constrained)...")
+    sql = falcon_complete(prompt, params, prefix=SQL_PROMPT_HEADER).strip()
+    print("[falcon] SQL:", sql)
+    return sql
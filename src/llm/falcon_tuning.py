@@ -0,0 +1,100 @@
+"""
+Host-specific llama.cpp settings for the local Falcon model.
+
+n_threads follows the physical core count; n_batch is picked by a short
+prefill calibration. The result is cached per host + model file in
+models/falcon_tuning.json so later starts skip the calibration.
+FALCON_N_THREADS / FALCON_N_BATCH override both.
+"""
+
+import json
+import os
+import socket
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+TUNING_PATH = PROJECT_ROOT / "models" / "falcon_tuning.json"
+
+N_CTX = 2048
+BATCH_CANDIDATES = [64, 128, 256, 512]
+# ~300 tokens of typical prompt text for the prefill timing
+CALIBRATION_TEXT = (
+    "You are a professional HR consultant. Answer clearly and briefly. "
+    "Question: What are the main drivers of attrition among employees who work overtime "
+    "in Research & Development, and how should HR respond? "
+) * 6
+
+
+def physical_cores() -> int:
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+        if cores:
+            return cores
+    except ImportError:
+        pass
+    logical = os.cpu_count() or 2
+    # Assume SMT when psutil is unavailable
+    return max(1, logical // 2)
+
+
+def default_threads() -> int:
+    # Leave one core for Streamlit/SQLite on larger hosts
+    cores = physical_cores()
+    return cores - 1 if cores > 4 else cores
+
+
+def _host_key(model_path: Path) -> str:
+    st = model_path.stat()
+    return f"{socket.gethostname()}|{model_path.name}|{st.st_size}|{int(st.st_mtime)}"
+
+
+def load_cached_settings(model_path: Path) -> dict | None:
+    try:
+        data = json.loads(TUNING_PATH.read_text(encoding="utf-8"))
+        return data.get(_host_key(model_path))
+    except (OSError, ValueError):
+        return None
+
+
+def save_settings(model_path: Path, settings: dict) -> None:
+    try:
+        data = json.loads(TUNING_PATH.read_text(encoding="utf-8")) if TUNING_PATH.exists() else {}
+    except ValueError:
+        data = {}
+    data[_host_key(model_path)] = settings
+    TUNING_PATH.parent.mkdir(parents=True, exist_ok=True)
+    TUNING_PATH.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def calibrate_batch(llm, candidates: list = BATCH_CANDIDATES) -> tuple[int, dict]:
+    """
+    Time a prefill of CALIBRATION_TEXT for each n_batch and return the fastest.
+    The model must have been created with n_batch >= max(candidates);
+    Llama.eval() chunks its input by llm.n_batch.
+    """
+    tokens = llm.tokenize(CALIBRATION_TEXT.encode("utf-8"))
+    max_batch = llm.n_batch
+    timings = {}
+    for n_batch in candidates:
+        if n_batch > max_batch:
+            break
+        llm.n_batch = n_batch
+        llm.reset()
+        start = time.perf_counter()
+        llm.eval(tokens)
+        timings[n_batch] = time.perf_counter() - start
+    llm.reset()
+    best = min(timings, key=timings.get)
+    llm.n_batch = best
+    return best, timings
+
+
+def env_overrides() -> dict:
+    out = {}
+    if os.getenv("FALCON_N_THREADS"):
+        out["n_threads"] = int(os.getenv("FALCON_N_THREADS"))
+    if os.getenv("FALCON_N_BATCH"):
+        out["n_batch"] = int(os.getenv("FALCON_N_BATCH"))
+    return out
@@ -1,10 +1,11 @@
 import os
+import time
 from dotenv import load_dotenv
-from groq import Groq
 
-load_dotenv()
+from src.chat.telemetry import observe, record_tokens, span
+from src.llm.groq_pool import DEFAULT_MODEL, chat_completion
 
-DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+load_dotenv()
 
 def groq_chat(prompt: str, system_prompt: str = None) -> str:
     """
@@ -23,8 +24,7 @@ def groq_chat(prompt: str, system_prompt: str = None) -> str:
         system_prompt = "You are a professional HR consultant. Be concise and data-driven."
 
     try:
-        client = Groq(api_key=api_key)
-        response = client.chat.completions.create(
+        response = chat_completion(
             model=DEFAULT_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -35,4 +35,44 @@ def groq_chat(prompt: str, system_prompt: str = None) -> str:
         return response.choices[0].message.content.strip()
 
     except Exception as e:
-        return f"[Groq error] {str(e)}"
\ No newline at end of file
+        return f"[Groq error] {str(e)}"
+
+
+def groq_chat_stream(prompt: str, system_prompt: str = None):
+    """
+    Streaming variant of groq_chat: yields text chunks as Groq produces them.
+    """
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        yield "Groq API key not found. Please add GROQ_API_KEY to .env."
+        return
+
+    if system_prompt is None:
+        system_prompt = "You are a professional HR consultant. Be concise and data-driven."
+
+    try:
+        with span("llm_stream", provider="groq", model=DEFAULT_MODEL) as s:
+            stream = chat_completion(
+                model=DEFAULT_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+                stream=True,
+            )
+            start, first = time.perf_counter(), True
+            for chunk in stream:
+                # Groq reports usage on the final chunk
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage is not None:
+                    record_tokens("groq", usage.prompt_tokens, usage.completion_tokens)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first:
+                        first = False
+                        observe("hr_llm_first_token_seconds", time.perf_counter() - start, provider="groq")
+                        s.set(first_token_ms=round((time.perf_counter() - start) * 1000, 1))
+                    yield chunk.choices[0].delta.content
+
+    except Exception as e:
+        yield f"[Groq error] {str(e)}"
@@ -0,0 +1,181 @@
+"""
+Shared Groq client
+One process-wide, pooled keep-alive client for every Groq call site, with
+jittered exponential backoff on 429/5xx and an async counterpart.
+
+Set GROQ_BASE_URL to point it at a local stand-in server (see test_groq_pool.py).
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+from dotenv import load_dotenv
+from groq import APIConnectionError, APIStatusError, AsyncGroq, Groq
+
+from src.chat.telemetry import count, record_tokens, span
+
+load_dotenv()
+
+DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+
+TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+
+MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "8"))
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_client = None
+# httpx async pools are bound to the loop that created them, and the router
+# runs each turn in a fresh asyncio.run() loop -> one async client per loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def has_api_key() -> bool:
+    return bool(os.getenv("GROQ_API_KEY"))
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def _client_kwargs() -> dict:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise RuntimeError("GROQ_API_KEY not found")
+    # SDK retries are disabled; _retry_delay below owns the backoff policy
+    return {
+        "api_key": api_key,
+        "base_url": os.getenv("GROQ_BASE_URL") or None,
+        "timeout": _timeout(),
+        "max_retries": 0,
+    }
+
+
+def get_client() -> Groq:
+    """Return the process-wide Groq client (created on first use)."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+                _client = Groq(http_client=http_client, **_client_kwargs())
+    return _client
+
+
+def get_async_client() -> AsyncGroq:
+    """Return the AsyncGroq client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        http_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+        client = AsyncGroq(http_client=http_client, **_client_kwargs())
+        _async_clients[loop] = client
+    return client
+
+
+def reset_clients() -> None:
+    """Close the pooled clients (e.g. after changing GROQ_* env vars)."""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+    _async_clients.clear()
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in RETRY_STATUS
+    # APITimeoutError is a subclass of APIConnectionError
+    return isinstance(exc, APIConnectionError)
+
+
+def _retry_delay(attempt: int, exc: Exception) -> float:
+    """Full-jitter exponential backoff, honouring Retry-After when sent."""
+    response = getattr(exc, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def chat_completion(messages: list, model: str = None, max_retries: int = None,
+                    cancel: threading.Event = None, **kwargs):
+    """
+    client.chat.completions.create() on the shared client, with retries.
+
+    Args:
+        messages: OpenAI-style chat messages
+        model: Groq model name (defaults to GROQ_MODEL)
+        max_retries: retries on 429/5xx/connection errors (defaults to GROQ_MAX_RETRIES)
+        cancel: once set, no further attempt is made (the backoff wait ends early
+            and the last error is raised)
+        **kwargs: passed through (temperature, max_tokens, stream, ...)
+    """
+    retries = MAX_RETRIES if max_retries is None else max_retries
+    client = get_client()
+    model = model or DEFAULT_MODEL
+    with span("llm_call", provider="groq", model=model, stream=bool(kwargs.get("stream"))) as s:
+        for attempt in range(retries + 1):
+            try:
+                response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    record_tokens("groq", usage.prompt_tokens, usage.completion_tokens)
+                return response
+            except Exception as e:
+                if attempt == retries or not _is_retryable(e):
+                    count("hr_llm_errors_total", provider="groq")
+                    raise
+                count("hr_llm_retries_total", provider="groq")
+                s.set(retries=attempt + 1)
+                delay = _retry_delay(attempt, e)
+                if cancel is None:
+                    time.sleep(delay)
+                elif cancel.wait(delay):
+                    s.set(cancelled=True)
+                    raise
+
+
+async def chat_completion_async(messages: list, model: str = None, max_retries: int = None, **kwargs):
+    """Async counterpart of chat_completion() (client of the running event loop, same retry policy)."""
+    retries = MAX_RETRIES if max_retries is None else max_retries
+    client = get_async_client()
+    model = model or DEFAULT_MODEL
+    with span("llm_call", provider="groq", model=model, stream=bool(kwargs.get("stream"))) as s:
+        for attempt in range(retries + 1):
+            try:
+                response = await client.chat.completions.create(model=model, messages=messages, **kwargs)
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    record_tokens("groq", usage.prompt_tokens, usage.completion_tokens)
+                return response
+            except Exception as e:
+                if attempt == retries or not _is_retryable(e):
+                    count("hr_llm_errors_total", provider="groq")
+                    raise
+                count("hr_llm_retries_total", provider="groq")
+                s.set(retries=attempt + 1)
+                await asyncio.sleep(_retry_delay(attempt, e))
@@ -5,7 +5,8 @@ Uses Groq API to generate SQL (much faster and more accurate than local Falcon)
 
 import os
 from dotenv import load_dotenv
-from groq import Groq
+
+from src.llm.groq_pool import chat_completion
 
 load_dotenv()
 
@@ -25,8 +26,6 @@ def generate_sql_with_groq(question: str, schema: str) -> str:
         return "-- Error: GROQ_API_KEY not found in .env file"
     
     try:
-        client = Groq(api_key=api_key)
-        
         # Build the prompt
         prompt = f"""You are an expert SQL developer specializing in SQLite.
 
@@ -49,7 +48,7 @@ USER QUESTION:
 SQL QUERY (SQLite syntax):"""
 
         # Call Groq API
-        response = client.chat.completions.create(
+        response = chat_completion(
             model="llama-3.3-70b-versatile",
             messages=[
                 {
@@ -1,6 +1,6 @@
-def build_sql_prompt(schema: str, question: str) -> str:
-    return f"""
-You are a senior data analyst.
+# Fixed instructions, kept separate so the local model can reuse their
+# evaluated KV state across calls (see src/llm/falcon_prefix_cache.py)
+SQL_PROMPT_HEADER = """You are a senior data analyst.
 Write ONE valid SQLite query that answers the user's question.
 
 Hard requirements:
@@ -11,10 +11,14 @@ Hard requirements:
 - Return ONLY the SQL query, nothing else.
 
 Schema:
-{schema}
+"""
+
+
+def build_sql_prompt(schema: str, question: str, notes: str = "") -> str:
+    notes = f"{notes.strip()}\n\n" if notes and notes.strip() else ""
+    return f"""{SQL_PROMPT_HEADER}{schema}
 
 User question:
 {question}
 
-SQL (SQLite):
-""".strip()
+{notes}SQL (SQLite):"""
@@ -0,0 +1,121 @@
+"""
+Offline check for src/llm/groq_pool.py against a local stand-in server.
+
+The stand-in speaks the chat-completions endpoint, fails the first requests
+with 429/503 and records which client connections it served, so retry and
+keep-alive pooling can be checked without network access:
+
+    python -m src.llm.test_groq_pool
+"""
+
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInGroq(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    fail_with = []                 # status codes returned before succeeding
+    requests = 0
+    connections = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))))
+        cls = type(self)
+        cls.requests += 1
+        cls.connections.add(self.client_address)
+
+        if cls.fail_with:
+            status = cls.fail_with.pop(0)
+            payload = json.dumps({"error": {"message": f"stand-in {status}"}}).encode()
+            self.send_response(status)
+            self.send_header("retry-after", "0")
+        else:
+            payload = json.dumps({
+                "id": "stand-in",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "OK"},
+                    "finish_reason": "stop",
+                }],
+            }).encode()
+            self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_stand_in() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInGroq)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    server = start_stand_in()
+    os.environ["GROQ_API_KEY"] = "stand-in"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from src.llm import groq_pool
+    groq_pool.reset_clients()
+    messages = [{"role": "user", "content": "ping"}]
+
+    # Retry: 429 then 503, then success on the third attempt
+    StandInGroq.fail_with = [429, 503]
+    out = groq_pool.chat_completion(messages, max_retries=3)
+    print("[test] retried reply:", out.choices[0].message.content, "| requests:", StandInGroq.requests)
+    assert StandInGroq.requests == 3
+
+    # Non-retryable status surfaces immediately
+    StandInGroq.fail_with = [400]
+    StandInGroq.requests = 0
+    try:
+        groq_pool.chat_completion(messages)
+        raise AssertionError("400 should not be retried")
+    except groq_pool.APIStatusError as e:
+        print("[test] 400 raised after", StandInGroq.requests, "request:", e.status_code)
+    assert StandInGroq.requests == 1
+
+    # Cancelled (a discarded speculation): the retry is never sent
+    StandInGroq.fail_with = [503, 503]
+    StandInGroq.requests = 0
+    cancel = threading.Event()
+    cancel.set()
+    try:
+        groq_pool.chat_completion(messages, max_retries=3, cancel=cancel)
+        raise AssertionError("a cancelled call should not be retried")
+    except groq_pool.APIStatusError as e:
+        print("[test] cancelled after", StandInGroq.requests, "request:", e.status_code)
+    assert StandInGroq.requests == 1
+    StandInGroq.fail_with = []
+
+    # Pooling: sequential calls reuse one keep-alive connection
+    StandInGroq.connections = set()
+    for _ in range(10):
+        groq_pool.chat_completion(messages)
+    print("[test] connections for 10 sequential calls:", len(StandInGroq.connections))
+    assert len(StandInGroq.connections) == 1
+
+    # Async counterpart: same retry policy on the running loop's client
+    StandInGroq.fail_with = [502]
+    StandInGroq.requests = 0
+    reply = asyncio.run(groq_pool.chat_completion_async(messages))
+    print("[test] async reply:", reply.choices[0].message.content, "| requests:", StandInGroq.requests)
+    assert StandInGroq.requests == 2
+
+    groq_pool.reset_clients()
+    server.shutdown()
+    print("[test] OK")
+
+
+if __name__ == "__main__":
+    main()